@@ -0,0 +1,123 @@
+import argparse
+import gzip
+import time
+import tracemalloc
+from io import BytesIO
+from typing import Dict
+
+from benchmarks.nflverse_server import NflverseStandIn
+from shared.metrics.events import MemorySink, SyncMetrics
+from shared.repositories.buffers import BufferPool, BufferReader, gunzip_into
+from shared.repositories.file_repo import DataFileRepo
+from shared.sync import UNIT_FETCHERS
+from shared.stats.column_stats import object_stats
+
+YEAR = 2024
+
+
+def traced_peak(run) -> int:
+    """Highest traced Python memory while run() executes."""
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    run()
+    return tracemalloc.get_traced_memory()[1] - base
+
+
+def drain(body) -> int:
+    """Read a file-like body to the end in 1 MiB chunks, like the csv readers do."""
+    total = 0
+    while True:
+        chunk = body.read(1 << 20)
+        if not chunk:
+            return total
+        total += len(chunk)
+
+
+def legacy_file(repo: DataFileRepo, dataset: str, counts: Dict[str, int]):
+    """The byte path before pooling: whole bytes objects at every step.
+
+    Counts each buffer holding a whole payload as an allocation, and each pass that copies a
+    payload into another buffer as a copy.
+    """
+    data = getattr(repo, UNIT_FETCHERS[dataset])(YEAR)
+    counts["allocations"] += 1
+    counts["bytes_allocated"] += len(data)
+    if dataset.startswith("ngs_"):
+        with BytesIO(data) as compressed, gzip.GzipFile(fileobj=compressed, mode="rb") as f:
+            # GzipFile copies the compressed bytes out of the BytesIO and joins its output chunks
+            decompressed = f.read()
+        counts["allocations"] += 1
+        counts["bytes_allocated"] += len(decompressed)
+        counts["copies"] += 2
+        counts["bytes_copied"] += len(data) + len(decompressed)
+        data = decompressed
+    object_stats(dataset, data)
+    with BytesIO(data) as body:
+        drain(body)
+
+
+def pooled_file(repo: DataFileRepo, pool: BufferPool, metrics: SyncMetrics, dataset: str):
+    with metrics.unit(dataset, YEAR), pool.scope():
+        data = getattr(repo, UNIT_FETCHERS[dataset])(YEAR)
+        if dataset.startswith("ngs_"):
+            data = gunzip_into(data, pool)
+        object_stats(dataset, data)
+        with BufferReader(data) as body:
+            drain(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole-bytes vs pooled zero-copy fetch/decompress path")
+    parser.add_argument("--datasets", default="pbp,ngs_passing", help="Comma separated datasets")
+    parser.add_argument("--files", type=int, default=3, help="Files fetched per dataset and path")
+    parser.add_argument("--scale", type=float, default=0.25, help="Multiplier on realistic per-season row counts")
+    parser.add_argument("--ngs-scale", type=float, default=50.0, help="Row multiplier for the (small) NGS files")
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    stand_in = NflverseStandIn(row_scale=args.scale, use_tls=False).start()
+    ngs_stand_in = NflverseStandIn(row_scale=args.ngs_scale, use_tls=False).start()
+    try:
+        print(f"{'dataset':14s} {'path':8s} {'wall s':>8s} {'allocs':>7s} {'MB alloc':>9s} {'copies':>7s} "
+              f"{'MB copied':>10s} {'peak MB':>8s}   (per file; peak once warm)")
+        for dataset in args.datasets.split(","):
+            server = ngs_stand_in if dataset.startswith("ngs_") else stand_in
+            server.prewarm(dataset, YEAR)
+
+            counts = {"allocations": 0, "bytes_allocated": 0, "copies": 0, "bytes_copied": 0}
+            repo = DataFileRepo(connection_factory=server.connection_factory)
+            start = time.perf_counter()
+            peaks = [traced_peak(lambda: legacy_file(repo, dataset, counts)) for _ in range(args.files)]
+            legacy = {
+                "wall": time.perf_counter() - start,
+                "peak": max(peaks[1:] or peaks),
+                **counts,
+            }
+
+            sink = MemorySink()
+            metrics = SyncMetrics(sink)
+            pool = BufferPool(metrics=metrics)
+            repo = DataFileRepo(connection_factory=server.connection_factory, metrics=metrics, buffers=pool)
+            start = time.perf_counter()
+            peaks = [traced_peak(lambda: pooled_file(repo, pool, metrics, dataset)) for _ in range(args.files)]
+            pooled = {
+                "wall": time.perf_counter() - start,
+                "peak": max(peaks[1:] or peaks),
+                "allocations": sum(event.get("buffer_allocations", 0) for event in sink.events),
+                "bytes_allocated": sum(event.get("bytes_allocated", 0) for event in sink.events),
+                "copies": sum(event.get("copies", 0) for event in sink.events),
+                "bytes_copied": sum(event.get("bytes_copied", 0) for event in sink.events),
+            }
+
+            for name, row in (("bytes", legacy), ("pooled", pooled)):
+                n = args.files
+                print(f"{dataset:14s} {name:8s} {row['wall'] / n:8.3f} {row['allocations'] / n:7.1f} "
+                      f"{row['bytes_allocated'] / n / 1e6:9.1f} {row['copies'] / n:7.1f} {row['bytes_copied'] / n / 1e6:10.1f} "
+                      f"{row['peak'] / 1e6:8.1f}")
+    finally:
+        stand_in.stop()
+        ngs_stand_in.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import argparse
+import time
+
+from benchmarks.synthetic import synthetic_csv
+from shared.coercion.type_coercion import TypeCoercer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DDL type coercion throughput on synthetic nflverse files")
+    parser.add_argument("--datasets", default="pbp,weekly,snaps")
+    parser.add_argument("--dirty", type=float, default=0.001, help="Fraction of integer cells written as floats")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'dataset':10s} {'MB':>7s} {'rows':>7s} {'best s':>7s} {'MB/s':>7s} {'nulled':>9s} {'recast':>7s} {'rejected':>9s}")
+    for dataset in args.datasets.split(","):
+        data = synthetic_csv(dataset, 2023, dirty=args.dirty)
+        coercer = TypeCoercer(dataset)
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = coercer.coerce(data)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{dataset:10s} {len(data) / 1e6:7.1f} {result.rows:7d} {best:7.3f} {len(data) / 1e6 / best:7.1f} "
+              f"{result.nulled:9d} {result.recast:7d} {result.rejected:9d}")
+
+
+if __name__ == "__main__":
+    main()
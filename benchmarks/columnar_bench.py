@@ -0,0 +1,63 @@
+import argparse
+import csv
+import io
+import time
+import tracemalloc
+from collections import Counter
+
+from benchmarks.synthetic import synthetic_csv
+from shared.columnar.columnar_dataset import ColumnarDataset
+
+
+def retained(build):
+    """(result, seconds, bytes still traced once build() returns, traced peak while it ran).
+
+    Timed on an untraced run first, since tracemalloc slows allocation heavy code severalfold.
+    """
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rows as dicts vs ColumnarDataset for a synthetic play_by_play season")
+    parser.add_argument("--rows", type=int, default=48000)
+    args = parser.parse_args()
+
+    data = synthetic_csv("pbp", 2023, args.rows)
+    print(f"play_by_play season: {args.rows} rows, {len(data) / 1e6:.1f} MB csv")
+    print(f"{'representation':18s} {'build s':>8s} {'held MB':>8s} {'peak MB':>8s}")
+
+    dicts, elapsed, held, peak = retained(lambda: list(csv.DictReader(io.StringIO(data.decode()))))
+    print(f"{'list of dicts':18s} {elapsed:8.2f} {held / 1e6:8.1f} {peak / 1e6:8.1f}")
+    del dicts
+
+    frame, elapsed, held, peak = retained(lambda: ColumnarDataset.from_csv(io.BytesIO(data), "pbp"))
+    print(f"{'ColumnarDataset':18s} {elapsed:8.2f} {held / 1e6:8.1f} {peak / 1e6:8.1f}")
+
+    footprint = frame.footprint()
+    by_encoding = Counter()
+    columns = Counter()
+    for column in footprint["columns"].values():
+        by_encoding[column["encoding"]] += column["bytes"]
+        columns[column["encoding"]] += 1
+    print(f"footprint {footprint['bytes'] / 1e6:.1f} MB: " + ", ".join(
+        f"{encoding} {columns[encoding]} columns {size / 1e6:.1f} MB" for encoding, size in by_encoding.most_common()
+    ))
+
+    start = time.perf_counter()
+    kc = frame.where("posteam", ["KC"])
+    early = kc.filter(kc.mask("week", lambda week: week <= 4))
+    epa = [value for value in early.values("epa") if value is not None]
+    elapsed = time.perf_counter() - start
+    print(f"KC weeks 1-4: {len(early)} plays, mean epa {sum(epa) / max(len(epa), 1):.3f} in {elapsed * 1000:.1f} ms, "
+          f"selection {early.footprint()['selection_bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
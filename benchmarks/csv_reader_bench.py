@@ -0,0 +1,70 @@
+import argparse
+import csv
+import io
+import time
+
+from benchmarks.synthetic import synthetic_csv
+from shared.readers.projected_csv_reader import ProjectedCsvReader
+from shared.repositories.s3_utils import iter_lines
+
+DEFAULT_COLUMNS = ["season", "week", "posteam", "defteam", "play_type", "epa", "wpa", "success",
+                   "air_yards", "passer_player_id", "rusher_player_id", "receiver_player_id"]
+
+
+def bench_dict_reader(data: bytes, columns):
+    rows = 0
+    for row in csv.DictReader(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", newline="")):
+        [row[column] for column in columns]
+        rows += 1
+    return rows
+
+
+def bench_projected_rows(data: bytes, columns):
+    return sum(1 for _ in ProjectedCsvReader(io.BytesIO(data), columns, "pbp").rows())
+
+
+def bench_projected_batches(data: bytes, columns):
+    return sum(len(batch) for batch in ProjectedCsvReader(io.BytesIO(data), columns, "pbp").batches())
+
+
+def bench_csv_reader(data: bytes, columns):
+    rows = 0
+    reader = csv.reader(iter_lines(io.BytesIO(data)))
+    index = {name: i for i, name in enumerate(next(reader))}
+    positions = [index[column] for column in columns]
+    for row in reader:
+        [row[i] for i in positions]
+        rows += 1
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ProjectedCsvReader vs csv.DictReader on a synthetic play_by_play season")
+    parser.add_argument("--rows", type=int, default=48000)
+    parser.add_argument("--columns", default=",".join(DEFAULT_COLUMNS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    columns = args.columns.split(",")
+    data = synthetic_csv("pbp", 2023, args.rows)
+    print(f"play_by_play season: {args.rows} rows, {len(data) / 1e6:.1f} MB, projecting {len(columns)} columns")
+
+    baseline = None
+    for name, bench in (
+        ("csv.DictReader", bench_dict_reader),
+        ("csv.reader + index", bench_csv_reader),
+        ("ProjectedCsvReader.rows", bench_projected_rows),
+        ("ProjectedCsvReader.batches", bench_projected_batches),
+    ):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            rows = bench(data, columns)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        baseline = baseline or best
+        print(f"{name:28s} {best:7.3f}s  {rows / best:10.0f} rows/s  {baseline / best:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(REPO_ROOT, "lambdas", "update_s3")
+
+# module -> cold start budget in ms (cumulative import time, bytecode precompiled as deployed)
+IMPORT_BUDGET_MS: Dict[str, float] = {
+    "shared.sync": 90.0,
+}
+
+# Modules the sync must not pull in at import time; they load on first use
+DEFERRED_MODULES = (
+    "shared.config.queries",
+    "shared.indexes.player_id_crosswalk",
+    "shared.metrics.memory",
+    "tracemalloc",
+)
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Return (module, self_us, cumulative_us, depth) for each line of -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def import_once(module: str, root: str, precompiled: bool) -> List[Tuple[str, int, int, int]]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.path.join(root, "lambdas", "update_s3")]))
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    if not precompiled:
+        # -B without __pycache__ compiles every module from source, like an unbundled cold start
+        command.insert(1, "-B")
+    completed = subprocess.run(command, cwd=root, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr.splitlines()[-1]}")
+    return parse_importtime(completed.stderr)
+
+
+def stage_tree(precompiled: bool) -> str:
+    """Copy the python sources to a scratch dir, with or without fresh bytecode."""
+    root = tempfile.mkdtemp(prefix="import-bench-")
+    ignore = shutil.ignore_patterns("__pycache__", "node_modules", "cdk.out", ".git")
+    shutil.copytree(os.path.join(REPO_ROOT, "shared"), os.path.join(root, "shared"), ignore=ignore)
+    shutil.copytree(LAMBDA_DIR, os.path.join(root, "lambdas", "update_s3"), ignore=ignore)
+    if precompiled:
+        subprocess.run(
+            [sys.executable, "-m", "compileall", "-q", "--invalidation-mode", "unchecked-hash", root], check=True
+        )
+    return root
+
+
+def measure(module: str, runs: int, precompiled: bool) -> Dict:
+    root = stage_tree(precompiled)
+    try:
+        samples = [import_once(module, root, precompiled) for _ in range(runs)]
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    totals = [next(cumulative for name, _, cumulative, depth in sample if name == module and depth == 0)
+              for sample in samples]
+    self_times: Dict[str, List[int]] = {}
+    for sample in samples:
+        for name, self_us, _, _ in sample:
+            self_times.setdefault(name, []).append(self_us)
+    return {
+        "total_ms": statistics.median(totals) / 1000,
+        "modules": {name: statistics.median(times) / 1000 for name, times in self_times.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start import time of the sync lambda (python -X importtime)")
+    parser.add_argument("modules", nargs="*", default=list(IMPORT_BUDGET_MS))
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters per measurement; the median is reported")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, help="Override the budget for every module")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        precompiled = measure(module, args.runs, precompiled=True)
+        from_source = measure(module, args.runs, precompiled=False)
+        budget = args.budget_ms or IMPORT_BUDGET_MS.get(module)
+        print(f"{module}: {precompiled['total_ms']:.1f} ms precompiled, {from_source['total_ms']:.1f} ms from source"
+              + (f" (budget {budget:.0f} ms)" if budget else ""))
+        for name, ms in sorted(precompiled["modules"].items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"  {ms:7.2f} ms  {name}")
+
+        if budget and precompiled["total_ms"] > budget:
+            failures.append(f"{module} imports in {precompiled['total_ms']:.1f} ms, over its {budget:.0f} ms budget")
+        eager = [name for name in DEFERRED_MODULES if name in precompiled["modules"]]
+        if eager:
+            failures.append(f"{module} eagerly imports {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import json
+import resource
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.nflverse_server import NflverseStandIn
+from benchmarks.stubs import InMemoryS3
+from shared.config.env import CPU_WORKERS
+from shared.metrics.events import MemorySink, SyncMetrics
+from shared.repositories.file_repo import DataFileRepo
+from shared.sync import SYNC_UNITS, UpdateS3
+
+BUCKET = "bench-datalake"
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def phase_totals(events) -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for event in events:
+        for name, value in event.items():
+            if name.endswith("_ms") and name != "duration_ms":
+                totals[name[:-3]] = round(totals.get(name[:-3], 0.0) + value, 1)
+    return totals
+
+
+def plan(updater: UpdateS3, datasets: List[str], seasons: int, mode: str) -> List[Tuple[str, Optional[int]]]:
+    units = []
+    for dataset in datasets:
+        _, first_year = SYNC_UNITS[dataset]
+        if first_year is None:
+            units.append((dataset, None))
+        elif mode == "update":
+            units.append((dataset, updater.off_season_year if dataset == "weekly_rosters" else updater.in_season_year))
+        else:
+            last = updater.in_season_year
+            units += [(dataset, year) for year in range(max(first_year, last - seasons + 1), last + 1)]
+    return units
+
+
+def run(args) -> Dict[str, Dict]:
+    capacity = {"assets": args.capacity} if args.capacity else None
+    stand_in = NflverseStandIn(
+        row_scale=args.scale, use_tls=not args.no_tls, capacity=capacity, latency_s=args.latency_ms / 1000
+    ).start()
+    s3 = InMemoryS3()
+    sink = MemorySink()
+    updater = UpdateS3(
+        s3,
+        BUCKET,
+        file_repo=DataFileRepo(connection_factory=stand_in.connection_factory),
+        metrics=SyncMetrics(sink),
+        workers=args.workers,
+        cpu_workers=args.cpu_workers,
+    )
+    units = plan(updater, args.datasets, args.seasons, args.mode)
+
+    print(f"Generating {len(units)} synthetic files..")
+    for dataset, year in units:
+        stand_in.prewarm(dataset, year)
+
+    results: Dict[str, Dict] = {}
+    try:
+        for dataset in args.datasets:
+            years = [year for name, year in units if name == dataset]
+            requests, served = stand_in.request_count(), stand_in.bytes_served()
+            start = time.perf_counter()
+            run_report = updater.run([(dataset, year) for year in years], "bench")
+            wall = time.perf_counter() - start
+            bytes_in = stand_in.bytes_served() - served
+            results[dataset] = {
+                "units": len(years),
+                "wall_s": round(wall, 3),
+                "mb_in": round(bytes_in / 1e6, 3),
+                "mb_out": round(run_report["totals"]["bytes_out"] / 1e6, 3),
+                "mb_per_s": round(bytes_in / 1e6 / wall, 2) if wall else None,
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+                "requests": stand_in.request_count() - requests,
+                "failed": run_report["totals"]["failed"],
+                "phases_ms": phase_totals(event for event in sink.events if event.get("dataset") == dataset),
+            }
+        limits = {host: limiter["limit"] for host, limiter in updater.file_repo.concurrency.snapshot().items()}
+        print(f"Final concurrency limits: {limits}, peak in flight: {stand_in.peak_in_flight}, "
+              f"throttled: {stand_in.throttled}")
+    finally:
+        stand_in.stop()
+    return results
+
+
+def report(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None):
+    header = f"{'dataset':16s} {'units':>5s} {'wall s':>8s} {'MB in':>8s} {'MB out':>8s} {'MB/s':>7s} {'RSS MB':>8s} {'reqs':>5s}"
+    print(header + ("  vs baseline" if baseline else ""))
+    for dataset, row in results.items():
+        line = (
+            f"{dataset:16s} {row['units']:5d} {row['wall_s']:8.3f} {row['mb_in']:8.2f} {row['mb_out']:8.2f} "
+            f"{row['mb_per_s'] or 0:7.1f} {row['peak_rss_mb']:8.1f} {row['requests']:5d}"
+        )
+        if row.get("failed"):
+            line += f"  {row['failed']} failed"
+        before = (baseline or {}).get(dataset)
+        if before and before["wall_s"]:
+            line += f"  {100 * (row['wall_s'] - before['wall_s']) / before['wall_s']:+6.1f}% wall"
+        print(line)
+        if row.get("phases_ms"):
+            print(" " * 17 + "  ".join(f"{phase} {ms:.0f}ms" for phase, ms in row["phases_ms"].items()))
+    total_wall = sum(row["wall_s"] for row in results.values())
+    total_in = sum(row["mb_in"] for row in results.values())
+    print(f"{'total':16s} {'':5s} {total_wall:8.3f} {total_in:8.2f} {'':8s} {total_in / total_wall if total_wall else 0:7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline UpdateS3 ingestion benchmark against local nflverse and S3 stand-ins")
+    parser.add_argument("--mode", choices=("update", "init"), default="update",
+                        help="update: in-season files only, init: the last --seasons seasons of every dataset")
+    parser.add_argument("--seasons", type=int, default=2)
+    parser.add_argument("--datasets", default=",".join(SYNC_UNITS), help="Comma separated datasets")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier on realistic per-season row counts")
+    parser.add_argument("--no-tls", action="store_true", help="Serve plain http instead of https")
+    parser.add_argument("--workers", type=int, default=4, help="UpdateS3 worker threads")
+    parser.add_argument("--cpu-workers", type=int, default=CPU_WORKERS,
+                        help="Transform processes for casting, stats and rollups (1 runs them on the worker threads)")
+    parser.add_argument("--capacity", type=int, help="Concurrent requests the asset host serves before answering 429")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every stand-in response")
+    parser.add_argument("--save", help="Write results as json")
+    parser.add_argument("--baseline", help="Compare against results saved by an earlier --save")
+    args = parser.parse_args()
+    args.datasets = args.datasets.split(",")
+    unknown = [dataset for dataset in args.datasets if dataset not in SYNC_UNITS]
+    if unknown:
+        parser.error(f"Unknown datasets: {unknown}")
+
+    results = run(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
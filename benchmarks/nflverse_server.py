@@ -0,0 +1,243 @@
+import gzip
+import os
+import re
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from benchmarks.synthetic import DEFAULT_ROWS, SEASON_ROWS, synthetic_csv, synthetic_player_ids
+from shared.repositories.file_repo import TimedHTTPConnection, TimedHTTPSConnection
+
+RELEASES_PREFIX = "/nflverse/nflverse-data/releases/download/"
+ASSET_HOST = "objects.githubusercontent.com"
+ORIGIN_HOSTS = ("github.com", "nflgamedata.com", "raw.githubusercontent.com")
+
+# path pattern -> dataset, mirroring the paths DataFileRepo requests
+ROUTES = [
+    (re.compile(r"/pbp/play_by_play_(\d{4})\.csv$"), "pbp"),
+    (re.compile(r"/players/players\.csv$"), "players"),
+    (re.compile(r"/player_stats/player_stats_(\d{4})\.csv$"), "weekly"),
+    (re.compile(r"/injuries/injuries_(\d{4})\.csv$"), "injuries"),
+    (re.compile(r"/combine/combine\.csv$"), "combine"),
+    (re.compile(r"/nextgen_stats/ngs_(\d{4})_rushing\.csv\.gz$"), "ngs_rushing"),
+    (re.compile(r"/nextgen_stats/ngs_(\d{4})_passing\.csv\.gz$"), "ngs_passing"),
+    (re.compile(r"/nextgen_stats/ngs_(\d{4})_receiving\.csv\.gz$"), "ngs_receiving"),
+    (re.compile(r"/depth_charts/depth_charts_(\d{4})\.csv$"), "depth_chart"),
+    (re.compile(r"/advstats_week_rush_(\d{4})\.csv$"), "pfr_rushing"),
+    (re.compile(r"/advstats_week_rec_(\d{4})\.csv$"), "pfr_receiving"),
+    (re.compile(r"/advstats_week_pass_(\d{4})\.csv$"), "pfr_passing"),
+    (re.compile(r"/snap_counts/snap_counts_(\d{4})\.csv$"), "snaps"),
+    (re.compile(r"/ftn_charting/ftn_charting_(\d{4})\.csv$"), "ftn"),
+    (re.compile(r"/weekly_rosters/roster_weekly_(\d{4})\.csv$"), "weekly_rosters"),
+    (re.compile(r"^/games\.csv$"), "odds"),
+    (re.compile(r"/db_playerids\.csv$"), "player_ids"),
+]
+
+
+def route(path: str) -> Optional[Tuple[str, Optional[int]]]:
+    """Return (dataset, year) for a DataFileRepo request path."""
+    path = path.split("?", 1)[0]
+    for pattern, dataset in ROUTES:
+        match = pattern.search(path)
+        if match:
+            return dataset, int(match.group(1)) if match.groups() else None
+    return None
+
+
+class NflverseStandIn:
+    """Local stand-in for the nflverse release hosts.
+
+    An origin server answers for github.com (302 redirecting release downloads to a second
+    asset host, like GitHub does), nflgamedata.com and raw.githubusercontent.com; an asset
+    server answers for objects.githubusercontent.com. Files are synthetic but keep the real
+    column widths, and NGS files are gzipped. Both speak TLS with a throwaway self-signed
+    certificate when openssl is available.
+
+    capacity caps concurrent requests per server ("origin" / "assets"); requests over it get a
+    429, like a rate limiting upstream. latency_s delays every response to make concurrency
+    matter on loopback.
+    """
+
+    def __init__(
+        self,
+        row_scale: float = 1.0,
+        use_tls: bool = True,
+        missing_years: Optional[Dict[str, set]] = None,
+        capacity: Optional[Dict[str, int]] = None,
+        latency_s: float = 0.0,
+    ):
+        self.row_scale = row_scale
+        self.missing_years = missing_years or {}
+        self.capacity = capacity or {}
+        self.latency_s = latency_s
+        self.in_flight: Dict[str, int] = {"origin": 0, "assets": 0}
+        self.peak_in_flight: Dict[str, int] = {"origin": 0, "assets": 0}
+        self.throttled: Dict[str, int] = {"origin": 0, "assets": 0}
+        self.requests: Dict[Tuple[str, str], int] = {}
+        self.bytes_sent: Dict[str, int] = {}
+        self._files: Dict[Tuple[str, Optional[int]], bytes] = {}
+        self._lock = threading.Lock()
+        self._cert_dir = None
+        self.server_context = None
+        self.client_context = None
+        if use_tls and shutil.which("openssl"):
+            self._create_certificate()
+        self.origin = self._server("origin")
+        self.assets = self._server("assets")
+
+    @property
+    def scheme(self) -> str:
+        return "https" if self.server_context else "http"
+
+    def start(self):
+        for server in (self.origin, self.assets):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"nflverse stand-in serving {self.scheme} on ports {self.origin.server_port} / {self.assets.server_port}")
+        return self
+
+    def stop(self):
+        for server in (self.origin, self.assets):
+            server.shutdown()
+            server.server_close()
+        if self._cert_dir:
+            shutil.rmtree(self._cert_dir, ignore_errors=True)
+
+    def connection_factory(self, hostname: str):
+        """DataFileRepo connection_factory routing the real hostnames to the local servers."""
+        if hostname == ASSET_HOST:
+            port = self.assets.server_port
+        elif hostname in ORIGIN_HOSTS:
+            port = self.origin.server_port
+        else:
+            raise ValueError(f"No stand-in for host {hostname}")
+        if self.client_context:
+            return TimedHTTPSConnection("127.0.0.1", port, context=self.client_context)
+        return TimedHTTPConnection("127.0.0.1", port)
+
+    def file(self, path: str) -> Optional[bytes]:
+        routed = route(path)
+        if routed is None:
+            return None
+        return self.prewarm(*routed)
+
+    def prewarm(self, dataset: str, year: Optional[int] = None) -> Optional[bytes]:
+        """Generate (once) the file served for dataset/year, or None if it is configured missing."""
+        if year in self.missing_years.get(dataset, ()):
+            return None
+        with self._lock:
+            data = self._files.get((dataset, year))
+        if data is None:
+            data = self._generate(dataset, year or 2024)
+            with self._lock:
+                self._files[(dataset, year)] = data
+        return data
+
+    def request_count(self, dataset: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(count for (_, name), count in self.requests.items() if dataset is None or name == dataset)
+
+    def bytes_served(self, dataset: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(count for name, count in self.bytes_sent.items() if dataset is None or name == dataset)
+
+    def _count(self, server_name: str, path: str):
+        routed = route(path)
+        with self._lock:
+            key = (server_name, routed[0] if routed else "unknown")
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def _enter(self, server_name: str) -> bool:
+        with self._lock:
+            if self.in_flight[server_name] >= self.capacity.get(server_name, 1 << 30):
+                self.throttled[server_name] += 1
+                return False
+            self.in_flight[server_name] += 1
+            self.peak_in_flight[server_name] = max(self.peak_in_flight[server_name], self.in_flight[server_name])
+            return True
+
+    def _leave(self, server_name: str):
+        with self._lock:
+            self.in_flight[server_name] -= 1
+
+    def _generate(self, dataset: str, year: int) -> bytes:
+        if dataset == "player_ids":
+            return synthetic_player_ids()
+        rows = max(1, int(SEASON_ROWS.get(dataset, DEFAULT_ROWS) * self.row_scale))
+        data = synthetic_csv(dataset, year, rows)
+        return gzip.compress(data) if dataset.startswith("ngs_") else data
+
+    def _create_certificate(self):
+        self._cert_dir = tempfile.mkdtemp(prefix="nflverse-standin-")
+        cert, key = os.path.join(self._cert_dir, "cert.pem"), os.path.join(self._cert_dir, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+             "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost", "-keyout", key, "-out", cert],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.server_context.load_cert_chain(cert, key)
+        self.client_context = ssl.create_default_context(cafile=cert)
+
+    def _server(self, name: str) -> ThreadingHTTPServer:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._respond(send_body=True)
+
+            def do_HEAD(self):
+                self._respond(send_body=False)
+
+            def _respond(self, send_body: bool):
+                stand_in._count(name, self.path)
+                if not stand_in._enter(name):
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                try:
+                    if stand_in.latency_s:
+                        time.sleep(stand_in.latency_s)
+                    self._serve(send_body)
+                finally:
+                    stand_in._leave(name)
+
+            def _serve(self, send_body: bool):
+                if name == "origin" and self.path.startswith(RELEASES_PREFIX):
+                    self.send_response(302)
+                    self.send_header("Location", f"{stand_in.scheme}://{ASSET_HOST}/assets{self.path}?X-Amz-Signature=standin")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = stand_in.file(self.path)
+                if data is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(data)
+                    with stand_in._lock:
+                        dataset = route(self.path)[0]
+                        stand_in.bytes_sent[dataset] = stand_in.bytes_sent.get(dataset, 0) + len(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        if self.server_context:
+            server.socket = self.server_context.wrap_socket(server.socket, server_side=True)
+        return server
@@ -0,0 +1,139 @@
+import datetime
+import hashlib
+import os
+import threading
+import time
+import uuid
+from io import BytesIO
+from typing import Dict, Optional
+
+from shared.repositories.multipart import multipart_etag
+
+
+class InMemoryS3:
+    """In-process stand-in for the boto3 S3 client calls the sync makes. Keeps objects in a
+    dict and counts calls and bytes so benchmarks can attribute upload work.
+
+    stream_mb_per_s caps each PUT or part upload at one connection's throughput, and the first
+    fail_parts upload_part calls fail with a 500, to exercise parallel and retried uploads.
+    """
+
+    def __init__(self, stream_mb_per_s: Optional[float] = None, fail_parts: int = 0):
+        self.objects: Dict[str, Dict] = {}
+        self.uploads: Dict[str, Dict] = {}
+        self.calls: Dict[str, int] = {}
+        self.bytes_in = 0
+        self.stream_mb_per_s = stream_mb_per_s
+        self.fail_parts = fail_parts
+        # Every instance is a new, empty store
+        self.storage_id = f"memory:{uuid.uuid4().hex}"
+        self._lock = threading.Lock()
+
+    def _count(self, method: str):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+    def _transfer(self, data: bytes):
+        if self.stream_mb_per_s:
+            time.sleep(len(data) / 1e6 / self.stream_mb_per_s)
+        with self._lock:
+            self.bytes_in += len(data)
+
+    def _store(self, bucket: str, key: str, data: bytes, etag: str, metadata: Optional[Dict[str, str]]):
+        with self._lock:
+            self.objects[f"{bucket}/{key}"] = {
+                "Body": data,
+                "ETag": etag,
+                "Metadata": metadata or {},
+                "LastModified": datetime.datetime.now(datetime.timezone.utc),
+            }
+
+    def put_object(self, Bucket: str, Key: str, Body, Metadata: Optional[Dict[str, str]] = None, **kwargs):
+        self._count("put_object")
+        data = Body.read() if hasattr(Body, "read") else bytes(Body)
+        self._transfer(data)
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        self._store(Bucket, Key, data, etag, Metadata)
+        return {"ETag": etag}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, Metadata: Optional[Dict[str, str]] = None, **kwargs):
+        self._count("create_multipart_upload")
+        upload_id = os.urandom(8).hex()
+        with self._lock:
+            self.uploads[upload_id] = {"Key": f"{Bucket}/{Key}", "Metadata": Metadata, "Parts": {}}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body, **kwargs):
+        self._count("upload_part")
+        with self._lock:
+            failing = self.fail_parts > 0
+            self.fail_parts -= failing
+        if failing:
+            error = Exception(f"Injected failure of part {PartNumber}")
+            error.response = {"Error": {"Code": "500"}}
+            raise error
+        data = Body.read() if hasattr(Body, "read") else bytes(Body)
+        self._transfer(data)
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        with self._lock:
+            self.uploads[UploadId]["Parts"][PartNumber] = (data, etag)
+        return {"ETag": etag}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict, **kwargs):
+        self._count("complete_multipart_upload")
+        with self._lock:
+            upload = self.uploads.pop(UploadId)
+        parts = [upload["Parts"][part["PartNumber"]] for part in MultipartUpload["Parts"]]
+        etag = multipart_etag([bytes.fromhex(part_etag.strip('"')) for _, part_etag in parts])
+        self._store(Bucket, Key, b"".join(data for data, _ in parts), etag, upload["Metadata"])
+        return {"ETag": etag}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str, **kwargs):
+        self._count("abort_multipart_upload")
+        with self._lock:
+            self.uploads.pop(UploadId, None)
+        return {}
+
+    def head_object(self, Bucket: str, Key: str, **kwargs):
+        self._count("head_object")
+        stored = self.objects.get(f"{Bucket}/{Key}")
+        if stored is None:
+            error = Exception(f"Not Found: s3://{Bucket}/{Key}")
+            error.response = {"Error": {"Code": "404"}}
+            raise error
+        return {
+            "ContentLength": len(stored["Body"]),
+            "ETag": stored["ETag"],
+            "LastModified": stored["LastModified"],
+            "Metadata": stored["Metadata"],
+        }
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs):
+        self._count("delete_object")
+        with self._lock:
+            self.objects.pop(f"{Bucket}/{Key}", None)
+        return {}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs):
+        response = self.head_object(Bucket=Bucket, Key=Key)
+        self._count("get_object")
+        response["Body"] = BytesIO(self.objects[f"{Bucket}/{Key}"]["Body"])
+        return response
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", ContinuationToken: Optional[str] = None, MaxKeys: int = 1000, **kwargs):
+        self._count("list_objects_v2")
+        keys = sorted(
+            name[len(Bucket) + 1:]
+            for name in self.objects
+            if name.startswith(f"{Bucket}/{Prefix}") and (not ContinuationToken or name[len(Bucket) + 1:] > ContinuationToken)
+        )
+        page = keys[:MaxKeys]
+        response = {"KeyCount": len(page), "IsTruncated": len(keys) > MaxKeys, "Contents": []}
+        for key in page:
+            stored = self.objects[f"{Bucket}/{key}"]
+            response["Contents"].append(
+                {"Key": key, "Size": len(stored["Body"]), "ETag": stored["ETag"], "LastModified": stored["LastModified"]}
+            )
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]
+        return response
@@ -0,0 +1,111 @@
+import csv
+import io
+import random
+
+from shared.config.nfl_config import config_map
+from shared.config.schema import parse_columns
+
+TEAMS = ["ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB", "HOU", "IND", "JAX", "KC",
+         "LA", "LAC", "LV", "MIA", "MIN", "NE", "NO", "NYG", "NYJ", "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS"]
+TEAM_COLUMNS = {"posteam", "defteam", "home_team", "away_team", "team", "recent_team", "team_abbr", "club_code",
+                "opponent", "opponent_team", "side_of_field", "timeout_team", "td_team", "draft_team", "draft_club"}
+PLAY_TYPES = ["pass", "run", "punt", "kickoff", "field_goal", "extra_point", "no_play", "qb_kneel"]
+SEASON_ROWS = {"pbp": 48000, "weekly": 5600, "snaps": 26000, "depth_chart": 37000, "weekly_rosters": 45000, "ftn": 48000}
+DEFAULT_ROWS = 600
+GAMES_PER_SEASON = 272
+# FTN charts every play_by_play play but one in this many (timeouts, end of quarter, ...)
+FTN_UNCHARTED_EVERY = 12
+PLAYER_ID_ROWS = 11000
+
+
+def synthetic_csv(dataset: str, season: int, rows: int = None, seed: int = 0, dirty: float = 0.0) -> bytes:
+    """Return a csv shaped like the nflverse release for dataset: every DDL column in table
+    order, nflverse style NA nulls, and quoted free text with embedded commas.
+
+    With dirty, that fraction of integer cells is written as floats (1.0) and a hundredth of
+    it of float cells as values no type accepts.
+
+    Rows are laid out over a season of games, so game_id and play_id line up across datasets of
+    the same season, e.g. ftn's nflverse_game_id / nflverse_play_id with play_by_play's.
+    """
+    columns = parse_columns(config_map[dataset].create_query)
+    rows = rows or SEASON_ROWS.get(dataset, DEFAULT_ROWS)
+    rnd = random.Random(f"{dataset}-{season}-{seed}")
+    # One season's players, shared by every dataset and present in synthetic_player_ids
+    players = random.Random(f"players-{season}").sample(range(PLAYER_ID_ROWS), 1800)
+
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow([name for name, _ in columns])
+    for i in range(rows):
+        if dataset == "ftn" and i % FTN_UNCHARTED_EVERY == 0:
+            continue
+        game = i * GAMES_PER_SEASON // rows
+        week = 1 + game * 18 // GAMES_PER_SEASON
+        home, away = random.Random(f"{season}-{game}").sample(TEAMS, 2)
+        record = []
+        for name, column_type in columns:
+            if name == "season":
+                record.append(season)
+            elif name == "week":
+                record.append(week)
+            elif name in ("play_id", "nflverse_play_id"):
+                record.append(i + 1)
+            elif name in ("game_id", "nflverse_game_id"):
+                record.append(f"{season}_{week:02d}_{away}_{home}")
+            elif name in TEAM_COLUMNS:
+                record.append(rnd.choice((home, away)))
+            elif name == "play_type":
+                record.append(rnd.choice(PLAY_TYPES))
+            elif name == "desc":
+                tackle = "(N.Bolton, W.Gay)" if rnd.random() < 0.4 else "(N.Bolton)"
+                record.append(f"({rnd.randint(1, 15)}:00) (Shotgun) P.Mahomes pass short right to T.Kelce to KC {rnd.randint(1, 50)} for {rnd.randint(1, 30)} yards {tackle}.")
+            elif column_type == "text" and name.endswith("_id"):
+                player = rnd.choice(players) if rnd.random() < 0.6 else None
+                record.append("NA" if player is None else _player_id(name, player))
+            elif column_type in ("int4", "int8"):
+                value = rnd.randint(0, 1) if name in ("pass", "rush") else rnd.randint(0, 99)
+                record.append(f"{value}.0" if dirty and rnd.random() < dirty else value)
+            elif column_type == "float8":
+                if dirty and rnd.random() < dirty / 100:
+                    record.append("--")
+                else:
+                    record.append(round(rnd.gauss(0, 1.5), 6) if rnd.random() < 0.9 else "NA")
+            elif column_type == "date":
+                record.append(f"{season}-09-{rnd.randint(1, 30):02d}")
+            elif column_type == "timestamp":
+                record.append(f"{season}-09-{rnd.randint(1, 30):02d} 17:{rnd.randint(0, 59):02d}:00")
+            elif column_type == "bool":
+                record.append(rnd.choice(("TRUE", "FALSE", "NA")))
+            else:
+                record.append(rnd.choice(("A", "B", "C", "NA")))
+        writer.writerow(record)
+    return out.getvalue().encode()
+
+
+PLAYER_ID_COLUMNS = ["mfl_id", "sportradar_id", "fantasypros_id", "gsis_id", "pff_id", "sleeper_id", "nfl_id", "espn_id",
+                     "yahoo_id", "fleaflicker_id", "cbs_id", "pfr_id", "cfbref_id", "rotowire_id", "rotoworld_id", "ktc_id",
+                     "stats_id", "stats_global_id", "fantasy_data_id", "swish_id"]
+
+
+def _player_id(column: str, player: int) -> str:
+    """The id of the player-th synthetic_player_ids row in column's namespace."""
+    return f"Play{player:04d}00" if column.startswith("pfr_") else f"00-00{20000 + player}"
+
+
+def synthetic_player_ids(rows: int = PLAYER_ID_ROWS, seed: int = 0) -> bytes:
+    """Return a csv shaped like dynastyprocess' db_playerids.csv."""
+    rnd = random.Random(f"player_ids-{seed}")
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(PLAYER_ID_COLUMNS + ["name", "merge_name", "position", "team", "birthdate", "db_season"])
+    for i in range(rows):
+        record = []
+        for column in PLAYER_ID_COLUMNS:
+            if column in ("gsis_id", "pfr_id"):
+                record.append(_player_id(column, i))
+            else:
+                record.append(f"{column[:3]}{i}" if rnd.random() < 0.7 else "NA")
+        record += [f"Player {i}", f"player {i}", rnd.choice(("QB", "RB", "WR", "TE")), rnd.choice(TEAMS), "1995-01-01", 2024]
+        writer.writerow(record)
+    return out.getvalue().encode()
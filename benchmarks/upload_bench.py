@@ -0,0 +1,49 @@
+import argparse
+import hashlib
+import os
+import time
+
+from benchmarks.stubs import InMemoryS3
+from shared.repositories.multipart import MultipartUploader
+
+BUCKET = "bench-datalake"
+
+
+def bench(s3: InMemoryS3, uploader: MultipartUploader, data: bytes, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = uploader.put_object(Bucket=BUCKET, Key="bench/object.csv", Body=data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    stored = s3.objects[f"{BUCKET}/bench/object.csv"]["Body"]
+    assert hashlib.sha256(stored).digest() == hashlib.sha256(data).digest(), "uploaded object differs"
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single PUT vs parallel multipart upload against a bandwidth capped S3 stand-in")
+    parser.add_argument("--size-mb", type=int, default=128)
+    parser.add_argument("--part-mb", type=int, default=16)
+    parser.add_argument("--concurrency", default="1,4,8,16", help="Comma separated part concurrencies to compare")
+    parser.add_argument("--stream-mb-per-s", type=float, default=100.0, help="Throughput cap of one upload stream")
+    parser.add_argument("--fail-parts", type=int, default=0, help="Fail this many part uploads per run to exercise retries")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = os.urandom(args.size_mb << 20)
+    print(f"{args.size_mb} MB object, {args.part_mb} MB parts, {args.stream_mb_per_s:.0f} MB/s per stream")
+
+    s3 = InMemoryS3(stream_mb_per_s=args.stream_mb_per_s)
+    single, _ = bench(s3, MultipartUploader(s3, threshold=len(data) + 1), data, args.repeat)
+    print(f"{'single PUT':20s} {single:7.3f}s  {args.size_mb / single:8.1f} MB/s")
+    for concurrency in (int(value) for value in args.concurrency.split(",")):
+        s3.fail_parts = args.fail_parts
+        uploader = MultipartUploader(s3, part_size=args.part_mb << 20, concurrency=concurrency)
+        elapsed, result = bench(s3, uploader, data, args.repeat)
+        print(f"{f'multipart x{concurrency}':20s} {elapsed:7.3f}s  {args.size_mb / elapsed:8.1f} MB/s  "
+              f"{single / elapsed:5.1f}x  {result['parts']} parts, {result['retries']} retries")
+
+
+if __name__ == "__main__":
+    main()
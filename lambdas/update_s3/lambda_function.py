@@ -1,32 +1,87 @@
 import json
+import time
 
 import boto3
 
 from shared.sync import UpdateS3
-from shared.config.env import NFL_DATA_BUCKET
+from shared.config.env import NFL_DATA_BUCKET, STORAGE_ROOT
+from shared.metrics.events import SyncMetrics
+from shared.repositories.storage import open_storage
+
+# run report status -> lambda response status code
+STATUS_CODES = {"ok": 200, "partial": 207, "failed": 500}
+# Stop starting new units this long before the lambda times out; the slowest unit (a play by
+# play season) has to fit in it
+DEADLINE_MARGIN_S = 180
+# Upper bound on a self re-invoking init_s3 chain
+MAX_INVOCATIONS = 40
 
 
 def lambda_handler(event, context):
     method = event.get('method')
 
-    s3 = boto3.client("s3")
-    upater = UpdateS3(s3,  NFL_DATA_BUCKET)
+    # {"storage_root": "/mnt/lake"} syncs into a local mirror (e.g. an EFS mount) instead of S3
+    s3 = open_storage(event.get('storage_root', STORAGE_ROOT), event.get('storage_backend'))
+    # {"profile_memory": true} records peak memory and top allocation sites per phase
+    profiler = None
+    if event.get('profile_memory'):
+        from shared.metrics.memory import MemoryProfiler
+
+        profiler = MemoryProfiler(event.get('profile_top', 5))
+    upater = UpdateS3(s3,  NFL_DATA_BUCKET, metrics=SyncMetrics(profiler=profiler))
 
 
+    if event.get('dry_run'):
+        # {"dry_run": true} only HEADs the planned files and estimates the run
+        print("planning run")
+        report = upater.dry_run(method or "update_s3", force=event.get('force', False) or event.get('reseal', False))
+        return {"statusCode": 200, "body": json.dumps(report)}
+
+    # {"prune": true/false} overrides whether missing files are dropped from the plan first
     if method == "init_s3":
         print("initializing s3")
-        upater.initialize_s3()
+        # {"resume": false} ignores the checkpoint of an unfinished backfill; {"reseal": true} fetches
+        # sealed seasons again instead of verifying them in place
+        report = upater.initialize_s3(
+            prune=event.get('prune', True),
+            resume=event.get('resume', True),
+            deadline=invocation_deadline(context),
+            reseal=event.get('reseal', False),
+        )
+        # {"self_invoke": true} keeps re-invoking the function until the backfill is done
+        if event.get('self_invoke') and report["checkpoint"] and report["checkpoint"]["remaining"]:
+            reinvoke(event, context)
+    elif method == "redrive":
+        print("re-driving failed units")
+        report = upater.redrive(event.get('run_id'))
     else:
         print("updating s3")
-        upater.update_s3()
+        # {"force": true} refreshes every dataset, even those its refresh schedule says are current
+        report = upater.update_s3(prune=event.get('prune', False), force=event.get('force', False))
 
     response = {
-        "statusCode": 200,
-        "body": json.dumps(
-            {
-                "message": "AWS Lambda Update NFL S3 Bucket function executed successfully",
-            }
-        ),
+        "statusCode": STATUS_CODES[report["status"]],
+        "body": json.dumps(report),
     }
 
     return response
+
+
+def invocation_deadline(context):
+    """time.monotonic() value after which no new units should start, or None outside lambda."""
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    return time.monotonic() + context.get_remaining_time_in_millis() / 1000 - DEADLINE_MARGIN_S
+
+
+def reinvoke(event, context):
+    invocation = event.get('invocation', 1)
+    if invocation >= MAX_INVOCATIONS:
+        print(f"not re-invoking: reached {MAX_INVOCATIONS} invocations")
+        return
+    print(f"re-invoking for invocation {invocation + 1}")
+    boto3.client("lambda").invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType="Event",
+        Payload=json.dumps({**event, "invocation": invocation + 1}).encode(),
+    )
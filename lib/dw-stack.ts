@@ -37,6 +37,8 @@ export class DataWarehouseStack extends Stack {
             'bash', '-c', [
               'cp -R /asset-input/lambdas/update_s3/* /asset-output/',
               'cp -R /asset-input/shared/ /asset-output/',
+              // Ship bytecode so cold starts don't compile every module on the read-only filesystem
+              'python -m compileall -q --invalidation-mode unchecked-hash /asset-output',
             ].join(' && ')
           ],
         },
@@ -53,6 +55,20 @@ export class DataWarehouseStack extends Stack {
 
     s3DataLake.grantPut(s3Lambda);
     s3DataLake.grantReadWrite(s3Lambda);
+    s3DataLake.grantDelete(s3Lambda);
+
+    // init_s3 backfills re-invoke the function until their checkpointed plan is done. A
+    // standalone policy avoids the function <-> role default policy dependency cycle that
+    // s3Lambda.grantInvoke(s3Lambda) would create.
+    new iam.Policy(this, 'LambdaSelfInvokePolicy', {
+      roles: [s3Lambda.role!],
+      statements: [
+        new iam.PolicyStatement({
+          actions: ['lambda:InvokeFunction'],
+          resources: [s3Lambda.functionArn],
+        }),
+      ],
+    });
 
     const rdsRole = new iam.Role(this, 'RdsS3ReadRole', {
       assumedBy: new iam.ServicePrincipal('rds.amazonaws.com'),
@@ -0,0 +1,257 @@
+import csv
+import datetime
+import io
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from shared.config.schema import FLOAT_TYPES, INTEGER_TYPES, column_types
+from shared.readers.projected_csv_reader import NULL_VALUES, _records
+from shared.repositories.buffers import Buffer, BufferReader
+from shared.repositories.s3_utils import iter_lines
+
+REJECTS_PREFIX = "_rejects"
+COERCE_BATCH_SIZE = 4096
+# Reject object columns appended after the source row
+REJECT_COLUMNS = ("_line", "_reasons")
+INTEGER_RANGES = {"int4": (-(1 << 31), (1 << 31) - 1), "int8": (-(1 << 63), (1 << 63) - 1)}
+# Literals postgres accepts for bool, as nflverse writes them
+NULL_LITERALS = {"NA": ""}
+BOOL_LITERALS = frozenset(("TRUE", "FALSE", "True", "False", "true", "false", "1", "0", "t", "f", "T", "F"))
+
+# (row index within the batch, reason)
+CellErrors = List[Tuple[int, str]]
+
+
+def reject_key(key: str) -> str:
+    return f"{REJECTS_PREFIX}/{key}"
+
+
+class CoercionResult:
+    """A csv cast to its table's DDL types, plus the rows that could not be cast.
+
+    data is the loadable csv: NA and empty cells are empty (NULL to COPY ... CSV) and numeric
+    cells are in a form postgres parses for the column's type. rejects is a csv of the source
+    header plus _line and _reasons, or None when every row was loadable.
+    """
+
+    def __init__(self, data: Buffer, rejects: Optional[bytes], rows: int, rejected: int, nulled: int, recast: int):
+        self.data = data
+        self.rejects = rejects
+        self.rows = rows
+        self.rejected = rejected
+        self.nulled = nulled
+        self.recast = recast
+
+
+class TypeCoercer:
+    """Casts a dataset's csv to the column types declared in its CREATE TABLE query.
+
+    Rows are parsed in batches of batch_size and cast column-wise: each column of a batch is
+    first checked in one pass with the C-level int/float parsers, and only a column that fails
+    that check is walked cell by cell to repair values such as 1.0 in an int8 column or to
+    collect the cells that cannot be cast. Rows with an uncastable cell, or the wrong number of
+    fields, are left out of data and written to rejects with every reason. A batch that needs
+    no change is passed through as its source lines, so clean files come out byte for byte.
+    """
+
+    def __init__(self, dataset: str, batch_size: int = COERCE_BATCH_SIZE):
+        self.dataset = dataset
+        self.types = column_types(dataset)
+        self.batch_size = batch_size
+
+    @property
+    def enabled(self) -> bool:
+        """Datasets without DDL are loaded as they are."""
+        return bool(self.types)
+
+    def coerce(self, data: Buffer) -> CoercionResult:
+        lines = _records(iter_lines(BufferReader(data)))
+        header_line = next(lines, None)
+        if header_line is None:
+            return CoercionResult(data, None, 0, 0, 0, 0)
+        header = next(csv.reader([header_line]))
+        column_types = [self.types.get(name, "text") for name in header]
+        casters = [_caster(column_type) for column_type in column_types]
+
+        out = [header_line]
+        rejects: List[str] = []
+        rows = nulled = recast = 0
+        for first_line, batch in _batches(lines, self.batch_size):
+            parsed = list(csv.reader(batch))
+            rows += len(parsed)
+            reasons: Dict[int, List[str]] = {
+                i: [f"expected {len(header)} fields, found {len(fields)}"]
+                for i, fields in enumerate(parsed)
+                if len(fields) != len(header)
+            }
+            # Short and long rows can't be lined up with the columns; cast the rest
+            positions = [i for i in range(len(parsed)) if i not in reasons] if reasons else range(len(parsed))
+            columns = list(zip(*(parsed[i] for i in positions)))
+            changed = False
+            for c, (name, column_type, cast) in enumerate(zip(header, column_types, casters)):
+                if not columns:
+                    break
+                cells, column_nulled, column_recast, errors = cast(columns[c], column_type)
+                if cells is not columns[c]:
+                    columns[c] = cells
+                    changed = True
+                nulled += column_nulled
+                recast += column_recast
+                for index, reason in errors:
+                    reasons.setdefault(positions[index], []).append(f"{name}: {reason}")
+
+            if not changed and not reasons:
+                out.extend(batch)
+            elif columns:
+                columns = [_quoted(cells) for cells in columns]
+                records = map(",".join, zip(*columns))
+                if reasons:
+                    records = (record for i, record in zip(positions, records) if i not in reasons)
+                out.extend(records)
+            for i in sorted(reasons):
+                rejects.append(_csv_line(parsed[i] + [str(first_line + i), "; ".join(reasons[i])]))
+
+        reject_body = None
+        if rejects:
+            reject_header = _csv_line(header + list(REJECT_COLUMNS))
+            reject_body = "\n".join([reject_header] + rejects + [""]).encode()
+        out.append("")
+        return CoercionResult("\n".join(out).encode(), reject_body, rows, len(rejects), nulled, recast)
+
+
+def _batches(lines: Iterator[str], batch_size: int) -> Iterator[Tuple[int, List[str]]]:
+    """Yield (line number of the first record, records) for runs of non-blank records."""
+    batch: List[str] = []
+    first = line_number = 1
+    for line in lines:
+        line_number += 1
+        if not line:
+            continue
+        if not batch:
+            first = line_number
+        batch.append(line)
+        if len(batch) == batch_size:
+            yield first, batch
+            batch = []
+    if batch:
+        yield first, batch
+
+
+def _quoted(cells: Sequence[str]) -> Sequence[str]:
+    """Quote the cells of a column that holds delimiters, quotes or line breaks, as csv.writer would."""
+    joined = "".join(cells)
+    if "," not in joined and '"' not in joined and "\n" not in joined and "\r" not in joined:
+        return cells
+    # Empty cells stay unquoted so they load as NULL
+    return ['"' + cell.replace('"', '""') + '"' if cell else cell for cell in cells]
+
+
+def _csv_line(fields: List[str]) -> str:
+    line = io.StringIO()
+    csv.writer(line, lineterminator="").writerow(fields)
+    return line.getvalue()
+
+
+def _normalize_nulls(cells: Sequence[str]) -> Tuple[Sequence[str], int]:
+    """NA to empty; returns the same sequence when there is nothing to normalize."""
+    if "NA" not in cells:
+        return cells, 0
+    return tuple(map(NULL_LITERALS.get, cells, cells)), cells.count("NA")
+
+
+def _cast_text(cells: Sequence[str], column_type: str):
+    cells, nulled = _normalize_nulls(cells)
+    return cells, nulled, 0, []
+
+
+def _cast_integer(cells: Sequence[str], column_type: str):
+    cells, nulled = _normalize_nulls(cells)
+    low, high = INTEGER_RANGES.get(column_type, INTEGER_RANGES["int8"])
+    try:
+        values = list(map(int, filter(None, cells)))
+        if not values or (low <= min(values) and max(values) <= high):
+            return cells, nulled, 0, []
+    except ValueError:
+        pass
+    # Cell by cell: integral floats are written as integers, anything else is rejected
+    cast: List[str] = []
+    errors: CellErrors = []
+    recast = 0
+    for i, cell in enumerate(cells):
+        if cell in NULL_VALUES:
+            cast.append("")
+            continue
+        try:
+            value = int(cell)
+        except ValueError:
+            try:
+                number = float(cell)
+            except ValueError:
+                number = None
+            if number is None or not number.is_integer():
+                errors.append((i, f"{cell!r} is not {column_type}"))
+                cast.append(cell)
+                continue
+            value = int(number)
+            cell = str(value)
+            recast += 1
+        if not low <= value <= high:
+            errors.append((i, f"{cell!r} is out of range for {column_type}"))
+        cast.append(cell)
+    return tuple(cast), nulled, recast, errors
+
+
+def _cast_float(cells: Sequence[str], column_type: str):
+    cells, nulled = _normalize_nulls(cells)
+    try:
+        deque(map(float, filter(None, cells)), maxlen=0)
+        return cells, nulled, 0, []
+    except ValueError:
+        pass
+    errors: CellErrors = []
+    for i, cell in enumerate(cells):
+        if cell:
+            try:
+                float(cell)
+            except ValueError:
+                errors.append((i, f"{cell!r} is not {column_type}"))
+    return cells, nulled, 0, errors
+
+
+def _cast_bool(cells: Sequence[str], column_type: str):
+    cells, nulled = _normalize_nulls(cells)
+    invalid = set(cells) - BOOL_LITERALS - {""}
+    if not invalid:
+        return cells, nulled, 0, []
+    errors = [(i, f"{cell!r} is not bool") for i, cell in enumerate(cells) if cell in invalid]
+    return cells, nulled, 0, errors
+
+
+def _parse_timestamp(cell: str):
+    # fromisoformat only takes a trailing Z from Python 3.11
+    return datetime.datetime.fromisoformat(cell[:-1] + "+00:00" if cell.endswith("Z") else cell)
+
+
+def _cast_temporal(cells: Sequence[str], column_type: str):
+    cells, nulled = _normalize_nulls(cells)
+    parse = datetime.date.fromisoformat if column_type == "date" else _parse_timestamp
+    errors: CellErrors = []
+    for i, cell in enumerate(cells):
+        if cell:
+            try:
+                parse(cell)
+            except ValueError:
+                errors.append((i, f"{cell!r} is not {column_type}"))
+    return cells, nulled, 0, errors
+
+
+def _caster(column_type: str) -> Callable:
+    if column_type in INTEGER_TYPES:
+        return _cast_integer
+    if column_type in FLOAT_TYPES:
+        return _cast_float
+    if column_type == "bool":
+        return _cast_bool
+    if column_type in ("date", "timestamp"):
+        return _cast_temporal
+    return _cast_text
@@ -0,0 +1,332 @@
+import sys
+from array import array
+from itertools import accumulate, compress
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from shared.config.schema import FLOAT_TYPES, INTEGER_TYPES, column_types
+from shared.readers.projected_csv_reader import DEFAULT_BATCH_SIZE, ProjectedCsvReader
+
+# A text column stops being dictionary encoded once it has more distinct values than this...
+MAX_DICTIONARY_SIZE = 1 << 16
+# ...or, when finished, more distinct values than this share of its rows (free text such as desc)
+MAX_DICTIONARY_RATIO = 0.5
+# Dictionaries up to this size (null included) use one byte codes
+BYTE_CODES = 256
+
+# Integer array typecodes from narrowest, with the magnitude each holds
+INTEGER_WIDTHS = (("b", 1 << 7), ("h", 1 << 15), ("i", 1 << 31), ("q", 1 << 63))
+
+# Physical row numbers a dataset covers: a range, or a memoryview over an array('q') of them
+Rows = Union[range, memoryview]
+
+
+class NumericColumn:
+    """int4/int8 (the narrowest signed array that holds them), float8 (array('d')) or bool
+    (array('b')) values with a null mask.
+    """
+
+    encoding = "numeric"
+
+    def __init__(self, column_type: str, values: array, nulls: bytearray):
+        self.column_type = column_type
+        self.values = values
+        self.nulls = nulls
+
+    def __len__(self):
+        return len(self.values)
+
+    def to_list(self, rows: Rows) -> List[Any]:
+        values, nulls = self.values, self.nulls
+        if 1 not in nulls:
+            picked = list(_take(values, rows))
+        else:
+            picked = [None if nulls[i] else values[i] for i in rows]
+        if self.column_type == "bool":
+            return [None if value is None else bool(value) for value in picked]
+        return picked
+
+    def mask(self, predicate: Callable[[Any], bool], rows: Rows) -> bytearray:
+        values, nulls = self.values, self.nulls
+        return bytearray(not nulls[i] and bool(predicate(values[i])) for i in rows)
+
+    def isin(self, wanted: Iterable[Any], rows: Rows) -> bytearray:
+        return self.mask(set(wanted).__contains__, rows)
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.buffer_info()[1] * self.values.itemsize + len(self.nulls)
+
+
+class DictionaryColumn:
+    """Low-cardinality text as integer codes into a dictionary of distinct values.
+
+    Code 0 is null (dictionary[0] is None). Dictionaries of up to 256 entries use one byte
+    codes, so isin() is a single bytes.translate over the codes.
+    """
+
+    encoding = "dictionary"
+
+    def __init__(self, codes: array, dictionary: List[Optional[str]]):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    def __len__(self):
+        return len(self.codes)
+
+    def to_list(self, rows: Rows) -> List[Optional[str]]:
+        return list(map(self.dictionary.__getitem__, _take(self.codes, rows)))
+
+    def mask(self, predicate: Callable[[str], bool], rows: Rows) -> bytearray:
+        return self._code_mask({code for code, value in enumerate(self.dictionary) if code and predicate(value)}, rows)
+
+    def isin(self, wanted: Iterable[str], rows: Rows) -> bytearray:
+        wanted = set(wanted)
+        return self._code_mask({code for code, value in enumerate(self.dictionary) if code and value in wanted}, rows)
+
+    def _code_mask(self, codes: set, rows: Rows) -> bytearray:
+        if self.codes.typecode == "B":
+            table = bytes(code in codes for code in range(BYTE_CODES))
+            return bytearray(bytes(_take(self.codes, rows)).translate(table))
+        return bytearray(map(codes.__contains__, _take(self.codes, rows)))
+
+    @property
+    def nbytes(self) -> int:
+        strings = sum(sys.getsizeof(value) for value in self.dictionary if value is not None)
+        return self.codes.buffer_info()[1] * self.codes.itemsize + sys.getsizeof(self.dictionary) + strings
+
+
+class StringColumn:
+    """High-cardinality text as one utf-8 buffer and an array('q') of len + 1 offsets into it."""
+
+    encoding = "utf8"
+
+    def __init__(self, data: bytes, offsets: array, nulls: bytearray):
+        self.data = data
+        self.offsets = offsets
+        self.nulls = nulls
+
+    def __len__(self):
+        return len(self.nulls)
+
+    def to_list(self, rows: Rows) -> List[Optional[str]]:
+        data, offsets, nulls = self.data, self.offsets, self.nulls
+        return [None if nulls[i] else str(data[offsets[i]:offsets[i + 1]], "utf-8") for i in rows]
+
+    def mask(self, predicate: Callable[[str], bool], rows: Rows) -> bytearray:
+        return bytearray(value is not None and bool(predicate(value)) for value in self.to_list(rows))
+
+    def isin(self, wanted: Iterable[str], rows: Rows) -> bytearray:
+        encoded = {value.encode() for value in wanted}
+        data, offsets, nulls = self.data, self.offsets, self.nulls
+        return bytearray(not nulls[i] and data[offsets[i]:offsets[i + 1]] in encoded for i in rows)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.buffer_info()[1] * self.offsets.itemsize + len(self.nulls)
+
+
+Column = Union[NumericColumn, DictionaryColumn, StringColumn]
+
+
+class ColumnarDataset:
+    """A dataset held column-wise in typed arrays, built from the schema registry's DDL types.
+
+    Numeric and bool columns are arrays with a null mask, low-cardinality text (teams,
+    play_type, positions, player ids) is dictionary encoded and free text is one utf-8
+    buffer. A 50k row x 370 column play_by_play season takes a small fraction of the memory
+    of the same rows as dicts of str.
+
+    slice(), filter() and select() never copy column data: the result shares the columns
+    and only carries its own rows, a range or an index array of physical row numbers.
+    Values are turned back into Python objects only by values() and rows().
+    """
+
+    def __init__(self, columns: Dict[str, Column], rows: Optional[Rows] = None):
+        self.columns = columns
+        if rows is None:
+            rows = range(len(next(iter(columns.values()))) if columns else 0)
+        self.rows_selected = rows
+
+    @classmethod
+    def from_csv(cls, body, dataset: str, columns: Optional[Sequence[str]] = None) -> "ColumnarDataset":
+        """Build from one csv, read from the binary file-like object body."""
+        return ColumnarBuilder(dataset, columns).add_csv(body).finish()
+
+    def __len__(self):
+        return len(self.rows_selected)
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns)
+
+    def __getitem__(self, item: Union[str, slice]):
+        if isinstance(item, slice):
+            return self.slice(item.start, item.stop)
+        return self.values(item)
+
+    def values(self, column: str) -> List[Any]:
+        """The column's values for the selected rows, None where null."""
+        return self.columns[column].to_list(self.rows_selected)
+
+    def rows(self, columns: Optional[Sequence[str]] = None) -> Iterator[Tuple[Any, ...]]:
+        return zip(*(self.values(column) for column in (columns or self.column_names)))
+
+    def slice(self, start: Optional[int] = None, stop: Optional[int] = None) -> "ColumnarDataset":
+        return ColumnarDataset(self.columns, self.rows_selected[start:stop])
+
+    def select(self, columns: Sequence[str]) -> "ColumnarDataset":
+        missing = [column for column in columns if column not in self.columns]
+        if missing:
+            raise ValueError(f"Columns {missing} are not in the dataset")
+        return ColumnarDataset({column: self.columns[column] for column in columns}, self.rows_selected)
+
+    def filter(self, mask: Iterable[Any]) -> "ColumnarDataset":
+        """Keep the selected rows whose mask entry is truthy; mask is aligned with the selection."""
+        kept = array("q", compress(self.rows_selected, mask))
+        return ColumnarDataset(self.columns, memoryview(kept))
+
+    def isin(self, column: str, values: Iterable[Any]) -> bytearray:
+        return self.columns[column].isin(values, self.rows_selected)
+
+    def mask(self, column: str, predicate: Callable[[Any], bool]) -> bytearray:
+        """Mask of the selected rows whose non-null value in column satisfies predicate."""
+        return self.columns[column].mask(predicate, self.rows_selected)
+
+    def where(self, column: str, values: Iterable[Any]) -> "ColumnarDataset":
+        return self.filter(self.isin(column, values))
+
+    def footprint(self) -> Dict[str, Any]:
+        """Bytes held per column and in total, including the row selection."""
+        columns = {name: {"encoding": column.encoding, "bytes": column.nbytes} for name, column in self.columns.items()}
+        selection = 0 if isinstance(self.rows_selected, range) else self.rows_selected.nbytes
+        return {
+            "rows": len(self),
+            "physical_rows": len(next(iter(self.columns.values()))) if self.columns else 0,
+            "bytes": sum(column["bytes"] for column in columns.values()) + selection,
+            "selection_bytes": selection,
+            "columns": columns,
+        }
+
+
+class ColumnarBuilder:
+    """Appends csv files of one dataset into a ColumnarDataset.
+
+    columns defaults to the first file's header columns that the DDL declares. Columns a
+    later file lacks (an older season's release) are filled with nulls.
+    """
+
+    def __init__(self, dataset: str, columns: Optional[Sequence[str]] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.dataset = dataset
+        self.types = column_types(dataset)
+        self.columns = list(columns) if columns is not None else None
+        self.batch_size = batch_size
+        self.length = 0
+        self._builders: Dict[str, Any] = {}
+
+    def add_csv(self, body) -> "ColumnarBuilder":
+        reader = ProjectedCsvReader(body, dataset=self.dataset if self.types else None, batch_size=self.batch_size)
+        try:
+            header = reader.read_header()
+            if not header:
+                return self
+            if self.columns is None:
+                self.columns = [column for column in header if not self.types or column in self.types]
+            for column in self.columns:
+                if column not in self._builders:
+                    self._builders[column] = _builder(self.types.get(column, "text"))
+            present = [column for column in self.columns if column in header]
+            absent = [column for column in self.columns if column not in header]
+            if not present:
+                return self
+            reader.project(present)
+            for batch in reader.batches():
+                for column in present:
+                    self._builders[column].append(batch.columns[column], batch.nulls[column])
+                for column in absent:
+                    self._builders[column].append_nulls(len(batch))
+                self.length += len(batch)
+        finally:
+            reader.close()
+        return self
+
+    def finish(self) -> ColumnarDataset:
+        columns = {column: self._builders[column].finish() for column in self.columns or ()}
+        return ColumnarDataset(columns, range(self.length))
+
+
+class _NumericBuilder:
+    def __init__(self, column_type: str):
+        self.column_type = column_type
+        typecode = "q" if column_type in INTEGER_TYPES else "d" if column_type in FLOAT_TYPES else "b"
+        self.values = array(typecode)
+        self.nulls = bytearray()
+
+    def append(self, values: array, nulls: bytearray):
+        self.values.extend(values)
+        self.nulls += nulls
+
+    def append_nulls(self, count: int):
+        self.values.extend(array(self.values.typecode, bytes(count * self.values.itemsize)))
+        self.nulls += b"\x01" * count
+
+    def finish(self) -> NumericColumn:
+        values = self.values
+        if values.typecode == "q" and values:
+            # Most integer columns are flags, downs and yardages: store them in the narrowest type
+            low, high = min(values), max(values)
+            typecode = next(code for code, bound in INTEGER_WIDTHS if -bound <= low and high < bound)
+            if typecode != "q":
+                values = array(typecode, values)
+        return NumericColumn(self.column_type, values, self.nulls)
+
+
+class _TextBuilder:
+    """Dictionary encodes until the dictionary outgrows MAX_DICTIONARY_SIZE, then keeps utf-8 strings."""
+
+    def __init__(self):
+        self.codes: Optional[array] = array("I")
+        self.index: Dict[Optional[str], int] = {None: 0}
+        self.strings: Optional[List[Optional[str]]] = None
+
+    def append(self, cells: List[Optional[str]], nulls: bytearray):
+        if self.strings is not None:
+            self.strings.extend(cells)
+            return
+        index = self.index
+        for value in set(cells).difference(index):
+            index[value] = len(index)
+        self.codes.extend(map(index.__getitem__, cells))
+        if len(index) > MAX_DICTIONARY_SIZE:
+            self.strings = self._decoded()
+            self.codes = None
+
+    def append_nulls(self, count: int):
+        self.append([None] * count, bytearray(count))
+
+    def finish(self) -> Union[DictionaryColumn, StringColumn]:
+        if self.strings is None and len(self.index) - 1 <= max(BYTE_CODES, MAX_DICTIONARY_RATIO * len(self.codes)):
+            dictionary = list(self.index)
+            typecode = "B" if len(dictionary) <= BYTE_CODES else "H" if len(dictionary) <= 1 << 16 else "I"
+            return DictionaryColumn(array(typecode, self.codes), dictionary)
+        strings = self.strings if self.strings is not None else self._decoded()
+        encoded = [value.encode() if value is not None else b"" for value in strings]
+        offsets = array("q", [0])
+        offsets.extend(accumulate(map(len, encoded)))
+        nulls = bytearray(value is None for value in strings)
+        return StringColumn(b"".join(encoded), offsets, nulls)
+
+    def _decoded(self) -> List[Optional[str]]:
+        return list(map(list(self.index).__getitem__, self.codes))
+
+
+def _builder(column_type: str):
+    if column_type in INTEGER_TYPES or column_type in FLOAT_TYPES or column_type == "bool":
+        return _NumericBuilder(column_type)
+    return _TextBuilder()
+
+
+def _take(values: array, rows: Rows):
+    """values at rows: a zero-copy view for a contiguous range, else the picked values."""
+    if isinstance(rows, range) and rows.step == 1:
+        return memoryview(values)[rows.start:rows.stop]
+    return map(values.__getitem__, rows)
@@ -0,0 +1,129 @@
+import json
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List
+
+from shared.columnar.columnar_dataset import ColumnarDataset, DictionaryColumn, NumericColumn, StringColumn
+
+MAGIC = b"NFLCOLS\0"
+VERSION = 1
+# magic, version, byte order (0 little / 1 big), row count, directory length
+HEADER = struct.Struct("<8sIIQQ")
+ALIGNMENT = 8
+
+
+def dumps(dataset: ColumnarDataset) -> bytes:
+    """Serialize the selected rows of dataset as one columnar object.
+
+    The layout follows the player id crosswalk index: a fixed header, a json directory of
+    each column's encoding, type and section offsets, then every array as raw native-order
+    bytes aligned to 8. Dictionary values are kept in the directory. Reading a column back is
+    one copy of its section, with no parsing.
+    """
+    if not isinstance(dataset.rows_selected, range) or dataset.rows_selected.step != 1 or len(dataset) != _physical(dataset):
+        # Only whole datasets are written as they are; a selection is gathered first
+        dataset = _gathered(dataset)
+
+    directory: List[Dict[str, Any]] = []
+    sections: List[bytes] = []
+    position = 0
+
+    def section(data: bytes) -> List[int]:
+        nonlocal position
+        bounds = [position, len(data)]
+        padding = _align(len(data)) - len(data)
+        sections.append(data + b"\0" * padding)
+        position += len(data) + padding
+        return bounds
+
+    for name, column in dataset.columns.items():
+        entry: Dict[str, Any] = {"name": name, "encoding": column.encoding}
+        if isinstance(column, NumericColumn):
+            entry["type"] = column.column_type
+            entry["typecode"] = column.values.typecode
+            entry["values"] = section(column.values.tobytes())
+            entry["nulls"] = section(bytes(column.nulls))
+        elif isinstance(column, DictionaryColumn):
+            entry["typecode"] = column.codes.typecode
+            entry["dictionary"] = column.dictionary
+            entry["codes"] = section(column.codes.tobytes())
+        else:
+            entry["data"] = section(bytes(column.data))
+            entry["offsets"] = section(column.offsets.tobytes())
+            entry["nulls"] = section(bytes(column.nulls))
+        directory.append(entry)
+
+    encoded = json.dumps({"columns": directory}).encode()
+    start = _align(HEADER.size + len(encoded))
+    header = HEADER.pack(MAGIC, VERSION, _native_byte_order(), len(dataset), len(encoded))
+    return b"".join([header, encoded.ljust(start - HEADER.size, b"\0")] + sections)
+
+
+def loads(data) -> ColumnarDataset:
+    """Read an object written by dumps() from bytes or a buffer."""
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise ValueError("Not a columnar object: too short")
+    magic, version, byte_order, rows, directory_length = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a columnar object")
+    if byte_order != _native_byte_order():
+        raise ValueError("Columnar object was written on a machine with a different byte order")
+    directory = json.loads(bytes(view[HEADER.size:HEADER.size + directory_length]))
+    start = _align(HEADER.size + directory_length)
+
+    def section(bounds: List[int]) -> memoryview:
+        offset, length = bounds
+        return view[start + offset:start + offset + length]
+
+    def typed(typecode: str, bounds: List[int]) -> array:
+        values = array(typecode)
+        values.frombytes(section(bounds))
+        return values
+
+    columns = {}
+    for entry in directory["columns"]:
+        if entry["encoding"] == NumericColumn.encoding:
+            column = NumericColumn(entry["type"], typed(entry["typecode"], entry["values"]), bytearray(section(entry["nulls"])))
+        elif entry["encoding"] == DictionaryColumn.encoding:
+            column = DictionaryColumn(typed(entry["typecode"], entry["codes"]), entry["dictionary"])
+        else:
+            column = StringColumn(bytes(section(entry["data"])), typed("q", entry["offsets"]), bytearray(section(entry["nulls"])))
+        columns[entry["name"]] = column
+    return ColumnarDataset(columns, range(rows))
+
+
+def _physical(dataset: ColumnarDataset) -> int:
+    return len(next(iter(dataset.columns.values()))) if dataset.columns else 0
+
+
+def _gathered(dataset: ColumnarDataset) -> ColumnarDataset:
+    """A copy of dataset's selected rows as new, unshared columns."""
+    rows = dataset.rows_selected
+    columns = {}
+    for name, column in dataset.columns.items():
+        if isinstance(column, NumericColumn):
+            columns[name] = NumericColumn(
+                column.column_type,
+                array(column.values.typecode, map(column.values.__getitem__, rows)),
+                bytearray(map(column.nulls.__getitem__, rows)),
+            )
+        elif isinstance(column, DictionaryColumn):
+            columns[name] = DictionaryColumn(array(column.codes.typecode, map(column.codes.__getitem__, rows)), column.dictionary)
+        else:
+            values = column.to_list(rows)
+            encoded = [value.encode() if value is not None else b"" for value in values]
+            offsets = array("q", [0])
+            for value in encoded:
+                offsets.append(offsets[-1] + len(value))
+            columns[name] = StringColumn(b"".join(encoded), offsets, bytearray(value is None for value in values))
+    return ColumnarDataset(columns, range(len(rows)))
+
+
+def _align(size: int) -> int:
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _native_byte_order() -> int:
+    return 0 if sys.byteorder == "little" else 1
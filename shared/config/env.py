@@ -1,4 +1,15 @@
 import os
 
 NFL_DATA_BUCKET = os.environ.get('NFL_DATA_BUCKET')
-RAW_SCHEMA = "raw"
\ No newline at end of file
+# Local directory mirror of the lake used instead of S3, e.g. an EFS mount; empty uses S3
+STORAGE_ROOT = os.environ.get('STORAGE_ROOT', '')
+RAW_SCHEMA = "raw"
+LOCAL_CACHE_DIR = os.environ.get('LOCAL_CACHE_DIR', '/tmp')
+SYNC_WORKERS = int(os.environ.get('SYNC_WORKERS', '4'))
+# Worker processes for casting, stats and rollups; 1 or less keeps them on the sync threads
+CPU_WORKERS = int(os.environ.get('CPU_WORKERS', str(os.cpu_count() or 1)))
+UPLOAD_PART_SIZE_MB = int(os.environ.get('UPLOAD_PART_SIZE_MB', '16'))
+UPLOAD_CONCURRENCY = int(os.environ.get('UPLOAD_CONCURRENCY', '8'))
+# libpq connection string for exports; empty uses the PG* environment variables
+WAREHOUSE_DSN = os.environ.get('WAREHOUSE_DSN', '')
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', '4'))
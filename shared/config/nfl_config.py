@@ -1,52 +1,51 @@
 import datetime
-from typing import Dict, List, Optional
+import importlib
+from typing import Dict, List, Optional, Union
 
 from shared.config.env import RAW_SCHEMA
-from shared.config.queries import (
-    CREATE_COMBINE_QUERY,
-    CREATE_DEPTH_CHARTS_QUERY,
-    CREATE_FTN_QUERY,
-    CREATE_GAME_ODDS_QUERY,
-    CREATE_INJURIES_QUERY,
-    CREATE_NGS_PASSING_QUERY,
-    CREATE_NGS_RECEIVING_QUERY,
-    CREATE_NGS_RUSHING_QUERY,
-    CREATE_PFR_PASSING_QUERY,
-    CREATE_PFR_RECEIVING_QUERY,
-    CREATE_PFR_RUSHING_QUERY,
-    CREATE_PLAY_BY_PLAY_QUERY,
-    CREATE_PLAYERS_QUERY,
-    CREATE_SNAPS_QUERY,
-    CREATE_WEEKLY_QUERY,
-    CREATE_WEEKLY_ROSTERS_QUERY,
-)
 
 this_year = int(datetime.datetime.now().year)
 
 
+class DeferredQuery:
+    """Names a DDL string in shared.config.queries, which is only imported once a query is read."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def resolve(self) -> str:
+        return getattr(importlib.import_module("shared.config.queries"), self.name)
+
+
 class NFLDataSourceConfig:
     def __init__(
         self,
         nfl_data_py_method: Optional[str],
         schema: str,
-        create_query: str,
+        create_query: Union[str, DeferredQuery],
         table: str,
         constraints: List[str],
         current_s3_key: str,
     ):
         self.nfl_data_py_method = nfl_data_py_method
         self.schema = schema
-        self.create_query = create_query
+        self._create_query = create_query
         self.table = table
         self.constraints = constraints
         self.current_s3_key = current_s3_key
 
+    @property
+    def create_query(self) -> str:
+        if isinstance(self._create_query, DeferredQuery):
+            self._create_query = self._create_query.resolve()
+        return self._create_query
+
 
 config_map: Dict[str, NFLDataSourceConfig] = {
     "pbp": NFLDataSourceConfig(
         nfl_data_py_method="pbp",
         schema=RAW_SCHEMA,
-        create_query=CREATE_PLAY_BY_PLAY_QUERY,
+        create_query=DeferredQuery("CREATE_PLAY_BY_PLAY_QUERY"),
         table="play_by_play",
         constraints=["play_id", "game_id"],
         current_s3_key=f"play_by_play/{this_year}.csv",
@@ -54,7 +53,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "players": NFLDataSourceConfig(
         nfl_data_py_method="players",
         schema=RAW_SCHEMA,
-        create_query=CREATE_PLAYERS_QUERY,
+        create_query=DeferredQuery("CREATE_PLAYERS_QUERY"),
         table="players",
         constraints=["esb_id", "gsis_id"],
         current_s3_key="players/players.csv",
@@ -62,7 +61,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "weekly": NFLDataSourceConfig(
         nfl_data_py_method="weekly",
         schema=RAW_SCHEMA,
-        create_query=CREATE_WEEKLY_QUERY,
+        create_query=DeferredQuery("CREATE_WEEKLY_QUERY"),
         table="weekly",
         constraints=["player_id", "week", "season"],
         current_s3_key=f"weekly/{this_year}.csv",
@@ -70,7 +69,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "injuries": NFLDataSourceConfig(
         nfl_data_py_method="injuries",
         schema=RAW_SCHEMA,
-        create_query=CREATE_INJURIES_QUERY,
+        create_query=DeferredQuery("CREATE_INJURIES_QUERY"),
         table="injuries",
         constraints=["gsis_id", "season", "week", "team"],
         current_s3_key=f"injuries/{this_year}.csv",
@@ -78,7 +77,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "combine": NFLDataSourceConfig(
         nfl_data_py_method="combine",
         schema=RAW_SCHEMA,
-        create_query=CREATE_COMBINE_QUERY,
+        create_query=DeferredQuery("CREATE_COMBINE_QUERY"),
         table="combine",
         constraints=["player_name, season, draft_team", "pos"],
         current_s3_key="combine/combine.csv",
@@ -86,7 +85,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "ngs_rushing": NFLDataSourceConfig(
         nfl_data_py_method="ngs_rushing",
         schema=RAW_SCHEMA,
-        create_query=CREATE_NGS_RUSHING_QUERY,
+        create_query=DeferredQuery("CREATE_NGS_RUSHING_QUERY"),
         table="rushing_next_gen_stats",
         constraints=["player_gsis_id", "season", "week"],
         current_s3_key=f"rushing_next_gen_stats/{this_year}.csv",
@@ -94,7 +93,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "ngs_receiving": NFLDataSourceConfig(
         nfl_data_py_method="ngs_receiving",
         schema=RAW_SCHEMA,
-        create_query=CREATE_NGS_RECEIVING_QUERY,
+        create_query=DeferredQuery("CREATE_NGS_RECEIVING_QUERY"),
         table="receiving_next_gen_stats",
         constraints=["player_gsis_id", "season", "week"],
         current_s3_key=f"receiving_next_gen_stats/{this_year}.csv",
@@ -102,7 +101,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "ngs_passing": NFLDataSourceConfig(
         nfl_data_py_method="ngs_passing",
         schema=RAW_SCHEMA,
-        create_query=CREATE_NGS_PASSING_QUERY,
+        create_query=DeferredQuery("CREATE_NGS_PASSING_QUERY"),
         table="passing_next_gen_stats",
         constraints=["player_gsis_id", "season", "week"],
         current_s3_key=f"passing_next_gen_stats/{this_year}.csv",
@@ -110,7 +109,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "depth_chart": NFLDataSourceConfig(
         nfl_data_py_method="depth_chart",
         schema=RAW_SCHEMA,
-        create_query=CREATE_DEPTH_CHARTS_QUERY,
+        create_query=DeferredQuery("CREATE_DEPTH_CHARTS_QUERY"),
         table="depth_charts",
         constraints=[
             "gsis_id",
@@ -127,7 +126,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "pfr_rushing": NFLDataSourceConfig(
         nfl_data_py_method="pfr_rushing",
         schema=RAW_SCHEMA,
-        create_query=CREATE_PFR_RUSHING_QUERY,
+        create_query=DeferredQuery("CREATE_PFR_RUSHING_QUERY"),
         table="rushing_pro_football_reference",
         constraints=["pfr_game_id", "pfr_player_id"],
         current_s3_key=f"rushing_pro_football_reference/{this_year}.csv",
@@ -135,7 +134,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "pfr_receiving": NFLDataSourceConfig(
         nfl_data_py_method="pfr_receiving",
         schema=RAW_SCHEMA,
-        create_query=CREATE_PFR_RECEIVING_QUERY,
+        create_query=DeferredQuery("CREATE_PFR_RECEIVING_QUERY"),
         table="receiving_pro_football_reference",
         constraints=["pfr_game_id", "pfr_player_id"],
         current_s3_key=f"receiving_pro_football_reference/{this_year}.csv",
@@ -143,7 +142,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "pfr_passing": NFLDataSourceConfig(
         nfl_data_py_method="pfr_passing",
         schema=RAW_SCHEMA,
-        create_query=CREATE_PFR_PASSING_QUERY,
+        create_query=DeferredQuery("CREATE_PFR_PASSING_QUERY"),
         table="passing_pro_football_reference",
         constraints=["pfr_game_id", "pfr_player_id"],
         current_s3_key=f"passing_pro_football_reference/{this_year}.csv",
@@ -151,7 +150,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "snaps": NFLDataSourceConfig(
         nfl_data_py_method="snaps",
         schema=RAW_SCHEMA,
-        create_query=CREATE_SNAPS_QUERY,
+        create_query=DeferredQuery("CREATE_SNAPS_QUERY"),
         table="snaps",
         constraints=["pfr_game_id", "pfr_player_id"],
         current_s3_key=f"snaps/{this_year}.csv",
@@ -159,7 +158,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "ftn": NFLDataSourceConfig(
         nfl_data_py_method=None,
         schema=RAW_SCHEMA,
-        create_query=CREATE_FTN_QUERY,
+        create_query=DeferredQuery("CREATE_FTN_QUERY"),
         table="ftn",
         constraints=["ftn_game_id", "ftn_play_id"],
         current_s3_key=f"ftn/{this_year}.csv",
@@ -167,7 +166,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "weekly_rosters": NFLDataSourceConfig(
         nfl_data_py_method=None,
         schema=RAW_SCHEMA,
-        create_query=CREATE_WEEKLY_ROSTERS_QUERY,
+        create_query=DeferredQuery("CREATE_WEEKLY_ROSTERS_QUERY"),
         table="rosters",
         constraints=[
             "season",
@@ -183,7 +182,7 @@ config_map: Dict[str, NFLDataSourceConfig] = {
     "odds": NFLDataSourceConfig(
         nfl_data_py_method="game_results",
         schema=RAW_SCHEMA,
-        create_query=CREATE_GAME_ODDS_QUERY,
+        create_query=DeferredQuery("CREATE_GAME_ODDS_QUERY"),
         table="odds",
         constraints=["insert_date", "game_id"],
         current_s3_key="odds/odds.csv",
@@ -196,4 +195,36 @@ config_map: Dict[str, NFLDataSourceConfig] = {
         constraints=["mfl_id"],
         current_s3_key="player_ids/player_ids.csv",
     ),
+    "team_week_rollup": NFLDataSourceConfig(
+        nfl_data_py_method=None,
+        schema=RAW_SCHEMA,
+        create_query="",
+        table="team_week_rollups",
+        constraints=["season", "week", "team"],
+        current_s3_key=f"team_week_rollups/{this_year}.csv",
+    ),
+    "player_week_rollup": NFLDataSourceConfig(
+        nfl_data_py_method=None,
+        schema=RAW_SCHEMA,
+        create_query="",
+        table="player_week_rollups",
+        constraints=["season", "week", "player_id"],
+        current_s3_key=f"player_week_rollups/{this_year}.csv",
+    ),
+    "pbp_ftn": NFLDataSourceConfig(
+        nfl_data_py_method=None,
+        schema=RAW_SCHEMA,
+        create_query="",
+        table="play_by_play_ftn",
+        constraints=["game_id", "play_id"],
+        current_s3_key=f"play_by_play_ftn/{this_year}.csv",
+    ),
+    "player_week": NFLDataSourceConfig(
+        nfl_data_py_method=None,
+        schema=RAW_SCHEMA,
+        create_query="",
+        table="player_weeks",
+        constraints=["season", "week", "player_id"],
+        current_s3_key=f"player_weeks/{this_year}.cols",
+    ),
 }
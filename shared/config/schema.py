@@ -0,0 +1,25 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from shared.config.nfl_config import config_map
+
+COLUMN_PATTERN = re.compile(r'^\s*"?(?P<name>\w+)"?\s+(?P<type>\w+)\s+NULL', re.MULTILINE)
+
+INTEGER_TYPES = {"int4", "int8"}
+FLOAT_TYPES = {"float8"}
+NUMERIC_TYPES = INTEGER_TYPES | FLOAT_TYPES
+
+
+def parse_columns(create_query: str) -> List[Tuple[str, str]]:
+    """Return the (column, type) pairs declared in a CREATE TABLE query, in table order."""
+    return [(match.group("name"), match.group("type")) for match in COLUMN_PATTERN.finditer(create_query)]
+
+
+@lru_cache(maxsize=None)
+def column_types(dataset: str) -> Dict[str, str]:
+    """Return the DDL column types for a config_map dataset. Datasets without DDL map to {}."""
+    nfl_config = config_map.get(dataset)
+    if nfl_config is None:
+        raise ValueError(f"Unknown dataset: {dataset}")
+    return dict(parse_columns(nfl_config.create_query))
@@ -0,0 +1,243 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from shared.config.env import EXPORT_WORKERS, NFL_DATA_BUCKET, STORAGE_ROOT, WAREHOUSE_DSN
+from shared.config.nfl_config import config_map
+from shared.repositories.multipart import MultipartUploader
+from shared.repositories.storage import open_storage
+
+EXPORT_PREFIX = "exports"
+# Rows per round trip when streaming through a named cursor
+FETCH_ROWS = 10000
+# Parts in flight per exported object; with EXPORT_WORKERS objects at once this bounds memory
+EXPORT_UPLOAD_CONCURRENCY = 2
+COMPRESS_LEVEL = 6
+EXPORT_MODES = ("copy", "cursor")
+# Object holding the rows of a season partitioned export whose season is NULL
+NO_SEASON = "no_season"
+
+# export name -> feature query in shared.config.queries; raw tables are exported by dataset name
+EXPORT_QUERIES = {
+    "odds_by_team": "GET_ODDS_QUERY",
+    "defense_metrics": "GET_DEFENSE_METRICS_QUERY",
+    "offense_metrics": "GET_OFFENSE_METRICS_QUERY",
+}
+
+
+def connect_postgres(dsn: str = WAREHOUSE_DSN):
+    """A psycopg2 connection; an empty dsn falls back to the PG* environment variables."""
+    try:
+        import psycopg2
+    except ImportError as e:
+        raise RuntimeError("Exporting from the warehouse needs psycopg2 (pip install psycopg2-binary)") from e
+    return psycopg2.connect(dsn)
+
+
+def export_query_sql(name: str) -> str:
+    """The SELECT an export name stands for: a raw.* table by dataset name, or a feature query."""
+    if name in EXPORT_QUERIES:
+        from shared.config import queries
+
+        return getattr(queries, EXPORT_QUERIES[name])
+    nfl_config = config_map.get(name)
+    if nfl_config is None:
+        raise ValueError(f"Unknown export: {name}")
+    return f"SELECT * FROM {nfl_config.schema}.{nfl_config.table}"
+
+
+class WarehouseExport:
+    """Streams warehouse query results into gzipped csv objects under exports/ in the lake.
+
+    Rows never collect in memory: either the server writes the csv itself with COPY (...) TO
+    STDOUT (mode "copy"), or a named server-side cursor is read FETCH_ROWS rows at a time and
+    written with csv.writer (mode "cursor", for drivers or poolers without COPY). Either way
+    the csv goes through gzip into a MultipartWriter, so memory stays around
+    (EXPORT_UPLOAD_CONCURRENCY + 1) parts per object. Results with a season column are
+    exported as one object per season, plus one for rows with no season, on up to workers
+    connections at once; others are one object.
+
+    connect is a zero-argument callable returning a DB-API connection (psycopg2 by default);
+    each partition opens and closes its own.
+    """
+
+    def __init__(
+        self,
+        s3_repo: Any,
+        s3_bucket: str,
+        connect: Callable[[], Any] = connect_postgres,
+        uploader: Optional[MultipartUploader] = None,
+        workers: int = EXPORT_WORKERS,
+        mode: str = "copy",
+        fetch_rows: int = FETCH_ROWS,
+        compresslevel: int = COMPRESS_LEVEL,
+    ):
+        if mode not in EXPORT_MODES:
+            raise ValueError(f"mode must be one of {EXPORT_MODES}")
+        self.s3 = s3_repo
+        self.s3_bucket = s3_bucket
+        self.connect = connect
+        self.uploader = uploader or MultipartUploader(s3_repo, concurrency=EXPORT_UPLOAD_CONCURRENCY)
+        self.workers = workers
+        self.mode = mode
+        self.fetch_rows = fetch_rows
+        self.compresslevel = compresslevel
+
+    def export(self, name: str, seasons: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+        """Export a raw table (by dataset name) or a feature query (EXPORT_QUERIES)."""
+        return self.export_query(name, export_query_sql(name), seasons)
+
+    def export_query(self, name: str, query: str, seasons: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+        """Export query to exports/<name>/, one object per season when it has a season column.
+
+        seasons limits which seasons are exported; by default every season the query returns,
+        and rows with a NULL season go to exports/<name>/no_season.csv.gz.
+        """
+        start = time.perf_counter()
+        query = query.strip().rstrip(";")
+        with closing(self.connect()) as connection:
+            columns = self._columns(connection, query)
+            if "season" not in columns and seasons is not None:
+                raise ValueError(f"Cannot export {name} by season: the query has no season column")
+            if "season" in columns and seasons is None:
+                seasons = self._seasons(connection, query)
+        if "season" in columns:
+            seasons = set(seasons)
+            partitions = [
+                (f"{EXPORT_PREFIX}/{name}/{int(season)}.csv.gz",
+                 f"SELECT * FROM ({query}) AS export WHERE season = {int(season)}")
+                for season in sorted(season for season in seasons if season is not None)
+            ]
+            if None in seasons:
+                partitions.append((
+                    f"{EXPORT_PREFIX}/{name}/{NO_SEASON}.csv.gz",
+                    f"SELECT * FROM ({query}) AS export WHERE season IS NULL",
+                ))
+        else:
+            partitions = [(f"{EXPORT_PREFIX}/{name}/{name}.csv.gz", query)]
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(partitions)))) as pool:
+            results = list(pool.map(lambda partition: self._export_partition(*partition), partitions))
+        report = {
+            "name": name,
+            "mode": self.mode,
+            "objects": len(results),
+            "rows": sum(result["rows"] for result in results),
+            "csv_bytes": sum(result["csv_bytes"] for result in results),
+            "bytes_out": sum(result["bytes_out"] for result in results),
+            "duration_s": round(time.perf_counter() - start, 3),
+            "partitions": results,
+        }
+        print(f"Exported {name}: {report['rows']} rows in {report['objects']} objects, "
+              f"{report['csv_bytes'] / 1e6:.1f} MB csv -> {report['bytes_out'] / 1e6:.1f} MB gzip")
+        return report
+
+    def _export_partition(self, key: str, query: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        with closing(self.connect()) as connection:
+            with self.uploader.writer(
+                self.s3_bucket, key, ContentType="text/csv", ContentEncoding="gzip"
+            ) as target:
+                with gzip.GzipFile(fileobj=target, mode="wb", compresslevel=self.compresslevel, mtime=0) as compressed:
+                    counted = _CountingWriter(compressed)
+                    if self.mode == "copy":
+                        rows = self._copy(connection, query, counted)
+                    else:
+                        rows = self._fetch(connection, query, counted)
+            # Nothing was written to the warehouse; end the read transaction
+            connection.rollback()
+        return {
+            "key": key,
+            "rows": rows,
+            "csv_bytes": counted.written,
+            "bytes_out": target.response["bytes"],
+            "parts": target.response["parts"],
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    def _copy(self, connection, query: str, out) -> int:
+        with closing(connection.cursor()) as cursor:
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", out)
+            return cursor.rowcount
+
+    def _fetch(self, connection, query: str, out) -> int:
+        text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+        writer = csv.writer(text, lineterminator="\n")
+        rows = 0
+        # A named cursor keeps the result on the server; fetchmany pulls one batch at a time
+        with closing(connection.cursor(name=f"export_{id(text):x}")) as cursor:
+            cursor.itersize = self.fetch_rows
+            cursor.execute(query)
+            batch = cursor.fetchmany(self.fetch_rows)
+            writer.writerow([column[0] for column in cursor.description])
+            while batch:
+                writer.writerows(batch)
+                rows += len(batch)
+                batch = cursor.fetchmany(self.fetch_rows)
+        text.flush()
+        text.detach()
+        return rows
+
+    @staticmethod
+    def _columns(connection, query: str) -> List[str]:
+        with closing(connection.cursor()) as cursor:
+            cursor.execute(f"SELECT * FROM ({query}) AS export LIMIT 0")
+            return [column[0] for column in cursor.description]
+
+    @staticmethod
+    def _seasons(connection, query: str) -> List[Optional[int]]:
+        """The query's distinct seasons; None stands for rows whose season is NULL."""
+        with closing(connection.cursor()) as cursor:
+            cursor.execute(f"SELECT DISTINCT season FROM ({query}) AS export ORDER BY 1")
+            return [None if row[0] is None else int(row[0]) for row in cursor.fetchall()]
+
+
+class _CountingWriter(io.RawIOBase):
+    """Passes writes through to target, counting the uncompressed bytes."""
+
+    def __init__(self, target):
+        super().__init__()
+        self.target = target
+        self.written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if isinstance(data, str):
+            data = data.encode()
+        self.target.write(data)
+        self.written += len(data)
+        return len(data)
+
+
+def _csv_ints(value: Optional[str]) -> Optional[List[int]]:
+    return [int(part) for part in value.split(",")] if value else None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Stream warehouse tables or feature queries into gzipped csvs in S3.")
+    parser.add_argument("names", nargs="+", help=f"Datasets (raw tables) or feature queries: {', '.join(EXPORT_QUERIES)}")
+    parser.add_argument("--dsn", default=WAREHOUSE_DSN, help="libpq connection string, e.g. postgresql://localhost/dw")
+    parser.add_argument("--root", default=STORAGE_ROOT, help="Local directory mirror of the lake (uses S3 when omitted)")
+    parser.add_argument("--bucket", default=NFL_DATA_BUCKET or "nfl-staging-datalake")
+    parser.add_argument("--season", help="Comma separated seasons (default: every season)")
+    parser.add_argument("--mode", choices=EXPORT_MODES, default="copy")
+    parser.add_argument("--workers", type=int, default=EXPORT_WORKERS)
+    args = parser.parse_args(argv)
+
+    s3 = open_storage(args.root)
+
+    exporter = WarehouseExport(s3, args.bucket, lambda: connect_postgres(args.dsn), workers=args.workers, mode=args.mode)
+    seasons = _csv_ints(args.season)
+    print(json.dumps({name: exporter.export(name, seasons) for name in args.names}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
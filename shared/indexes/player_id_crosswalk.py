@@ -0,0 +1,281 @@
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from shared.repositories.s3_utils import is_not_found
+
+MAGIC = b"NFLXWALK"
+VERSION = 1
+# magic, version, byte order (0 little / 1 big), row count, directory length, source sha256
+HEADER = struct.Struct("<8sIIIQ32s")
+ALIGNMENT = 8
+NULL_VALUES = ("", "NA")
+SOURCE_SHA_METADATA_KEY = "source-sha256"
+
+
+def source_hash(source: bytes) -> bytes:
+    return hashlib.sha256(source).digest()
+
+
+class PlayerIdCrosswalk:
+    """Memory-mapped crosswalk between every *_id namespace in dynastyprocess' db_playerids.csv.
+
+    Each namespace is stored as a concatenated utf-8 string blob, a uint32 row offset array and
+    an open addressing hash table of uint32 row numbers, so any-to-any lookups are O(1) and the
+    file is paged in by the OS instead of being parsed into Python objects.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+
+        magic, version, byte_order, rows, directory_length, sha = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a player id crosswalk index")
+        if byte_order != _native_byte_order():
+            raise ValueError(f"{path} was built on a machine with a different byte order")
+        self.rows = rows
+        self.source_sha256 = sha
+
+        directory_start = HEADER.size
+        directory = json.loads(bytes(self._buffer[directory_start:directory_start + directory_length]))
+        self._namespaces: Dict[str, Dict[str, memoryview]] = {}
+        for name, sections in directory.items():
+            self._namespaces[name] = {
+                "strings": self._section(sections["strings"]),
+                "offsets": self._section(sections["offsets"]).cast("I"),
+                "slots": self._section(sections["slots"]).cast("I"),
+            }
+
+    @property
+    def namespaces(self) -> List[str]:
+        return list(self._namespaces)
+
+    def close(self):
+        for sections in self._namespaces.values():
+            for section in sections.values():
+                section.release()
+        self._namespaces = {}
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def row_for(self, namespace: str, value: str) -> Optional[int]:
+        """Return the crosswalk row holding value in namespace, or None."""
+        if value in NULL_VALUES:
+            return None
+        sections = self._get_namespace(namespace)
+        strings, offsets, slots = sections["strings"], sections["offsets"], sections["slots"]
+        encoded = value.encode()
+        mask = len(slots) - 1
+        slot = zlib.crc32(encoded) & mask
+        while True:
+            entry = slots[slot]
+            if entry == 0:
+                return None
+            row = entry - 1
+            if strings[offsets[row]:offsets[row + 1]] == encoded:
+                return row
+            slot = (slot + 1) & mask
+
+    def value_at(self, namespace: str, row: int) -> Optional[str]:
+        sections = self._get_namespace(namespace)
+        offsets = sections["offsets"]
+        start, end = offsets[row], offsets[row + 1]
+        if start == end:
+            return None
+        return bytes(sections["strings"][start:end]).decode()
+
+    def lookup(self, value: str, from_namespace: str, to_namespace: str) -> Optional[str]:
+        """Translate a single id, e.g. lookup("00-0033873", "gsis_id", "pfr_id")."""
+        self._get_namespace(to_namespace)
+        row = self.row_for(from_namespace, value)
+        return None if row is None else self.value_at(to_namespace, row)
+
+    def translate(self, values: Iterable[str], from_namespace: str, to_namespace: str) -> List[Optional[str]]:
+        """Translate a whole id column. Ids repeat heavily across a season file, so each
+        distinct value is resolved once and the rest of the column is a dict hit.
+        """
+        self._get_namespace(to_namespace)
+        resolved: Dict[str, Optional[str]] = {}
+
+        def resolve(value: str) -> Optional[str]:
+            row = self.row_for(from_namespace, value)
+            result = resolved[value] = None if row is None else self.value_at(to_namespace, row)
+            return result
+
+        return [resolved[value] if value in resolved else resolve(value) for value in values]
+
+    def _get_namespace(self, namespace: str) -> Dict[str, memoryview]:
+        sections = self._namespaces.get(namespace)
+        if sections is None:
+            raise ValueError(f"Unknown id namespace: {namespace}")
+        return sections
+
+    def _section(self, bounds: List[int]) -> memoryview:
+        start, length = bounds
+        return self._buffer[start:start + length]
+
+    @classmethod
+    def build(cls, source: bytes, path: str) -> "PlayerIdCrosswalk":
+        """Build an index file at path from the raw db_playerids.csv bytes."""
+        rows = list(csv.reader(io.StringIO(str(source, "utf-8"))))
+        header, rows = rows[0], rows[1:]
+        id_columns = [(i, name) for i, name in enumerate(header) if name.endswith("_id")]
+
+        directory: Dict[str, Dict[str, List[int]]] = {}
+        sections: List[bytes] = []
+        # The directory size depends on the section offsets, so lay the sections out
+        # after a generously sized placeholder and patch the real offsets in.
+        directory_budget = 192 * (len(id_columns) + 1)
+        position = _align(HEADER.size + directory_budget)
+
+        for column, name in id_columns:
+            strings = bytearray()
+            offsets = array("I", [0])
+            for row in rows:
+                value = row[column] if column < len(row) else ""
+                if value not in NULL_VALUES:
+                    strings += value.encode()
+                offsets.append(len(strings))
+            slots = _build_slots(strings, offsets)
+
+            directory[name] = {}
+            for section_name, data in (("strings", bytes(strings)), ("offsets", offsets.tobytes()), ("slots", slots.tobytes())):
+                directory[name][section_name] = [position, len(data)]
+                padding = _align(len(data)) - len(data)
+                sections.append(data + b"\0" * padding)
+                position += len(data) + padding
+
+        encoded_directory = json.dumps(directory).encode()
+        if len(encoded_directory) > directory_budget:
+            raise ValueError("Crosswalk directory exceeds its reserved space")
+
+        with _replacing(path) as f:
+            f.write(HEADER.pack(MAGIC, VERSION, _native_byte_order(), len(rows), len(encoded_directory), source_hash(source)))
+            f.write(encoded_directory.ljust(_align(HEADER.size + directory_budget) - HEADER.size, b"\0"))
+            for section in sections:
+                f.write(section)
+        return cls(path)
+
+    @classmethod
+    def ensure(cls, source: bytes, path: str) -> "PlayerIdCrosswalk":
+        """Open the index at path, rebuilding it only if it was built from different source bytes."""
+        if stored_source_hash(path) == source_hash(source):
+            return cls(path)
+        return cls.build(source, path)
+
+    @classmethod
+    def from_s3(cls, s3_repo: Any, s3_bucket: str, key: str, path: str) -> "PlayerIdCrosswalk":
+        """Open a published index, downloading it only when the local copy is stale."""
+        published = s3_repo.head_object(Bucket=s3_bucket, Key=key).get("Metadata", {}).get(SOURCE_SHA_METADATA_KEY)
+        local = stored_source_hash(path)
+        if local is None or local.hex() != published:
+            body = s3_repo.get_object(Bucket=s3_bucket, Key=key)["Body"]
+            with _replacing(path) as f:
+                for chunk in iter(lambda: body.read(1 << 20), b""):
+                    f.write(chunk)
+            body.close()
+        return cls(path)
+
+
+@contextmanager
+def _replacing(path: str):
+    """A file to write that replaces path once complete. Each writer gets its own temporary file
+    in path's directory, so concurrent writers never rename each other's half-written index.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def stored_source_hash(path: str) -> Optional[bytes]:
+    """Return the source sha256 recorded in an index file header, or None if there is no valid index."""
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    magic, version, _, _, _, sha = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return sha
+
+
+def publish_crosswalk(s3_repo: Any, s3_bucket: str, key: str, source: bytes, path: str) -> bool:
+    """Build and upload the index for source unless the published one was built from the same bytes.
+    Returns True if a new index was published.
+    """
+    sha = source_hash(source).hex()
+    try:
+        published = s3_repo.head_object(Bucket=s3_bucket, Key=key).get("Metadata", {}).get(SOURCE_SHA_METADATA_KEY)
+    except Exception as e:
+        if not is_not_found(e):
+            raise
+        published = None
+    if published == sha:
+        print(f"Player id crosswalk is up to date ({sha[:12]})")
+        return False
+
+    PlayerIdCrosswalk.ensure(source, path).close()
+    with open(path, "rb") as f:
+        s3_repo.put_object(Bucket=s3_bucket, Key=key, Body=f.read(), Metadata={SOURCE_SHA_METADATA_KEY: sha})
+    print(f"Published player id crosswalk {key} ({sha[:12]})")
+    return True
+
+
+def _build_slots(strings: bytearray, offsets: array) -> array:
+    populated = sum(1 for row in range(len(offsets) - 1) if offsets[row] != offsets[row + 1])
+    capacity = 8
+    while capacity < populated * 2:
+        capacity *= 2
+    mask = capacity - 1
+    slots = array("I", bytes(4 * capacity))
+    seen = set()
+    for row in range(len(offsets) - 1):
+        start, end = offsets[row], offsets[row + 1]
+        if start == end:
+            continue
+        value = bytes(strings[start:end])
+        if value in seen:
+            # Keep the first row for duplicated ids
+            continue
+        seen.add(value)
+        slot = zlib.crc32(value) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = row + 1
+    return slots
+
+
+def _align(size: int) -> int:
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _native_byte_order() -> int:
+    return 0 if sys.byteorder == "little" else 1
@@ -0,0 +1,131 @@
+import csv
+import io
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.readers.projected_csv_reader import NULL_VALUES, ProjectedCsvReader, _records
+from shared.repositories.s3_utils import iter_lines
+
+# play_by_play columns that identify a play in the joined output
+PLAY_KEY_COLUMNS = ("game_id", "play_id", "season", "week")
+# ftn columns holding the nflverse keys, and the ones that repeat play_by_play's
+FTN_GAME_COLUMN = "nflverse_game_id"
+FTN_PLAY_COLUMN = "nflverse_play_id"
+FTN_DROPPED_COLUMNS = (FTN_GAME_COLUMN, FTN_PLAY_COLUMN, "season", "week")
+
+
+class PlayByPlayFtnJoin:
+    """Left join of a play_by_play season with FTN charting, one game at a time.
+
+    FTN keys plays by its own ftn_game_id / ftn_play_id but carries the nflverse game_id and
+    play_id alongside, so those are the join keys. The FTN file (a few MB a season) is indexed
+    by game as its unparsed csv records; play_by_play is then streamed through a projected
+    reader and joined game by game, so only one game's FTN rows are ever parsed, and each
+    game's joined rows are written out before the next game is read. Every play_by_play play
+    gets one output row of its keys plus the FTN columns, empty where FTN did not chart the play.
+    """
+
+    def __init__(self, ftn_body):
+        lines = _records(iter_lines(ftn_body))
+        header_line = next(lines, None)
+        self.ftn_header = next(csv.reader([header_line])) if header_line else []
+        missing = [column for column in (FTN_GAME_COLUMN, FTN_PLAY_COLUMN) if column not in self.ftn_header]
+        if self.ftn_header and missing:
+            raise ValueError(f"Columns {missing} are not in the ftn header")
+        self.ftn_columns = [column for column in self.ftn_header if column not in FTN_DROPPED_COLUMNS]
+        self.games: Dict[str, List[str]] = {}
+        self.ftn_plays = 0
+        if self.ftn_header:
+            game_index = self.ftn_header.index(FTN_GAME_COLUMN)
+            for line in lines:
+                if line:
+                    self.games.setdefault(_field(line, game_index), []).append(line)
+                    self.ftn_plays += 1
+        self.plays = 0
+        self.plays_charted = 0
+        self.games_charted = 0
+        # Distinct FTN play keys no play_by_play play matched; known once join() has run
+        self.ftn_unmatched = 0
+
+    def join(self, play_by_play_body, out):
+        """Stream a play_by_play csv from the binary file-like object play_by_play_body and write
+        the joined csv to the binary file-like object out, one game at a time.
+        """
+        rows = io.StringIO()
+        writer = csv.writer(rows, lineterminator="\n")
+        writer.writerow(list(PLAY_KEY_COLUMNS) + self.ftn_columns)
+        empty = ("",) * len(self.ftn_columns)
+        # Each game's FTN plays not yet matched, kept in case play_by_play lists the game again
+        unmatched: Dict[str, Dict[Optional[str], Tuple[str, ...]]] = {}
+        reader = ProjectedCsvReader(play_by_play_body, PLAY_KEY_COLUMNS, "pbp")
+        for game_id, plays in groupby(reader.rows(), key=itemgetter(0)):
+            if game_id not in unmatched:
+                unmatched[game_id] = self._game(game_id) or {}
+                if unmatched[game_id]:
+                    self.games_charted += 1
+            charted = unmatched[game_id]
+            for play in plays:
+                self.plays += 1
+                ftn_row = charted.pop(_play_key(play[1]), None) if charted else None
+                if ftn_row is None:
+                    writer.writerow(play + empty)
+                else:
+                    self.plays_charted += 1
+                    writer.writerow(play + ftn_row)
+            out.write(rows.getvalue().encode())
+            rows.seek(0)
+            rows.truncate()
+        out.write(rows.getvalue().encode())
+        # FTN plays repeating a key count once, like the play they chart
+        self.ftn_unmatched = sum(map(len, unmatched.values())) + sum(
+            len(self._game(game_id)) for game_id in self.games if game_id not in unmatched
+        )
+
+    def match_rates(self) -> Dict[str, Any]:
+        return {
+            "plays": self.plays,
+            "plays_charted": self.plays_charted,
+            "ftn_plays": self.ftn_plays,
+            "ftn_unmatched": self.ftn_unmatched,
+            "games_charted": self.games_charted,
+            "games": len(self.games),
+            "charted_rate": _rate(self.plays_charted, self.plays),
+            "ftn_match_rate": _rate(self.plays_charted, self.ftn_plays),
+        }
+
+    def _game(self, game_id: str) -> Optional[Dict[Optional[str], Tuple[str, ...]]]:
+        """Parse one game's FTN records into play_id -> the output FTN columns."""
+        lines = self.games.get(game_id)
+        if not lines:
+            return None
+        header = self.ftn_header
+        play_index = header.index(FTN_PLAY_COLUMN)
+        project = itemgetter(*(header.index(column) for column in self.ftn_columns))
+        rows: Dict[Optional[str], Tuple[str, ...]] = {}
+        for fields in csv.reader(lines):
+            fields += [""] * (len(header) - len(fields))
+            cells = project(fields)
+            rows[_play_key(fields[play_index])] = cells if isinstance(cells, tuple) else (cells,)
+        return rows
+
+
+def _field(line: str, index: int) -> str:
+    """The index-th field of a csv record, splitting no further than needed."""
+    quote = line.find('"')
+    if quote == -1 or line.count(",", 0, quote) > index:
+        fields = line.split(",", index + 1)
+    else:
+        fields = next(csv.reader([line]))
+    return fields[index] if len(fields) > index else ""
+
+
+def _play_key(cell: str) -> Optional[str]:
+    """play_id as written by either file: 68, 68.0 and NA/empty for none."""
+    if cell in NULL_VALUES:
+        return None
+    return cell[:-2] if cell.endswith(".0") else cell
+
+
+def _rate(part: int, whole: int) -> float:
+    return round(part / whole, 4) if whole else 0.0
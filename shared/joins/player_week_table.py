@@ -0,0 +1,166 @@
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from shared.columnar.columnar_dataset import ColumnarDataset, DictionaryColumn, NumericColumn, StringColumn
+from shared.config.schema import FLOAT_TYPES, INTEGER_TYPES, NUMERIC_TYPES, column_types
+
+# dataset -> (player id column, its crosswalk namespace), in the order their columns are laid out
+PLAYER_WEEK_SOURCES: Dict[str, Tuple[str, str]] = {
+    "weekly": ("player_id", "gsis_id"),
+    "snaps": ("pfr_player_id", "pfr_id"),
+    "ngs_passing": ("player_gsis_id", "gsis_id"),
+    "ngs_rushing": ("player_gsis_id", "gsis_id"),
+    "ngs_receiving": ("player_gsis_id", "gsis_id"),
+    "pfr_passing": ("pfr_player_id", "pfr_id"),
+    "pfr_rushing": ("pfr_player_id", "pfr_id"),
+    "pfr_receiving": ("pfr_player_id", "pfr_id"),
+}
+KEY_COLUMNS = ("season", "week", "player_id")
+# The table is keyed by gsis id, the namespace weekly and NGS use
+KEY_NAMESPACE = "gsis_id"
+# Descriptive text kept from weekly; every other carried column is numeric
+WEEKLY_TEXT_COLUMNS = ("player_display_name", "position", "position_group", "recent_team", "season_type", "opponent_team")
+NOT_CARRIED = ("season", "week", "player_jersey_number")
+
+
+def carried_columns(dataset: str) -> List[Tuple[str, str]]:
+    """(source column, table column) pairs dataset contributes. weekly's keep their names;
+    the rest are prefixed with their dataset, e.g. ngs_passing_attempts.
+    """
+    types = column_types(dataset)
+    columns = [name for name, column_type in types.items() if column_type in NUMERIC_TYPES and name not in NOT_CARRIED]
+    if dataset == "weekly":
+        return [(name, name) for name in list(WEEKLY_TEXT_COLUMNS) + columns]
+    return [(name, f"{dataset}_{name}") for name in columns]
+
+
+class PlayerWeekTable:
+    """One row per (season, week, player) joining weekly, snaps, NGS and PFR for a season.
+
+    Each source file is read typed into a ColumnarDataset and hash joined on (week, gsis id):
+    weekly and NGS carry gsis ids, while snaps and PFR are translated from pfr ids through
+    the player id crosswalk, once per distinct id. The table is the full outer join, so a
+    player-week present in any source gets a row, with nulls for the sources that lack it.
+    NGS season totals (week 0) are not player-weeks and are left out. Columns of a source
+    missing for the season (NGS before 2016, PFR before 2018) are all null, so every season
+    has the same columns.
+    """
+
+    def __init__(self, season: int, crosswalk: Any = None):
+        self.season = season
+        self.crosswalk = crosswalk
+        self.slots: Dict[Tuple[int, str], int] = {}
+        self.keys: List[Tuple[int, str]] = []
+        # dataset -> (its rows, the table slot of each row or -1)
+        self.sources: Dict[str, Tuple[ColumnarDataset, array]] = {}
+        self.report: Dict[str, Dict[str, int]] = {}
+
+    def add(self, dataset: str, body) -> "PlayerWeekTable":
+        """Read one source's season csv from the binary file-like object body and key its rows."""
+        id_column, namespace = PLAYER_WEEK_SOURCES[dataset]
+        columns = [id_column, "week"] + [source for source, _ in carried_columns(dataset)]
+        rows = ColumnarDataset.from_csv(body, dataset, columns)
+        ids = rows.values(id_column)
+        if namespace != KEY_NAMESPACE:
+            # The crosswalk takes nflverse cells, where an empty id is null
+            cells = ["" if value is None else value for value in ids]
+            ids = self.crosswalk.translate(cells, namespace, KEY_NAMESPACE) if self.crosswalk else [None] * len(ids)
+
+        row_slots = array("q")
+        used = set()
+        unmatched = duplicates = 0
+        for player_id, week in zip(ids, rows.values("week")):
+            if player_id is None or not week:
+                unmatched += player_id is None
+                row_slots.append(-1)
+                continue
+            key = (week, player_id)
+            slot = self.slots.get(key)
+            if slot is None:
+                slot = self.slots[key] = len(self.keys)
+                self.keys.append(key)
+            elif slot in used:
+                # A second row for the same player-week (a mid-week trade in snaps); keep the first
+                duplicates += 1
+                row_slots.append(-1)
+                continue
+            used.add(slot)
+            row_slots.append(slot)
+        self.sources[dataset] = (rows, row_slots)
+        self.report[dataset] = {
+            "rows": len(rows), "joined": len(used), "unmatched_ids": unmatched, "duplicates": duplicates
+        }
+        return self
+
+    def finish(self) -> ColumnarDataset:
+        """The table, ordered by week and player id."""
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        position = array("q", bytes(8 * len(order)))
+        for row, slot in enumerate(order):
+            position[slot] = row
+        length = len(order)
+
+        player_ids = [self.keys[slot][1] for slot in order]
+        dictionary = [None] + sorted(set(player_ids))
+        codes = {player_id: code for code, player_id in enumerate(dictionary)}
+        columns: Dict[str, Any] = {
+            "season": NumericColumn("int4", array("h", [self.season]) * length, bytearray(length)),
+            "week": NumericColumn("int4", array("b", (self.keys[slot][0] for slot in order)), bytearray(length)),
+            "player_id": DictionaryColumn(
+                array("H" if len(dictionary) <= 1 << 16 else "I", map(codes.__getitem__, player_ids)), dictionary
+            ),
+        }
+        for dataset in PLAYER_WEEK_SOURCES:
+            types = column_types(dataset)
+            source = self.sources.get(dataset)
+            pairs = [] if source is None else [(row, position[slot]) for row, slot in enumerate(source[1]) if slot >= 0]
+            for source_column, table_column in carried_columns(dataset):
+                if source is None:
+                    columns[table_column] = _null_column(types[source_column], length)
+                else:
+                    columns[table_column] = _gather(source[0].columns[source_column], pairs, length)
+        return ColumnarDataset(columns, range(length))
+
+    def match_report(self) -> Dict[str, Any]:
+        return {
+            "season": self.season,
+            "rows": len(self.keys),
+            "players": len({key[1] for key in self.keys}),
+            "sources": self.report,
+        }
+
+
+def _gather(column, pairs: Sequence[Tuple[int, int]], length: int):
+    """column's values moved to their table rows; rows without a source row are null."""
+    if isinstance(column, NumericColumn):
+        source_values, source_nulls = column.values, column.nulls
+        values = array(source_values.typecode, bytes(source_values.itemsize * length))
+        nulls = bytearray(b"\x01" * length)
+        for row, target in pairs:
+            values[target] = source_values[row]
+            nulls[target] = source_nulls[row]
+        return NumericColumn(column.column_type, values, nulls)
+    if isinstance(column, DictionaryColumn):
+        source_codes = column.codes
+        codes = array(source_codes.typecode, bytes(source_codes.itemsize * length))
+        for row, target in pairs:
+            codes[target] = source_codes[row]
+        return DictionaryColumn(codes, column.dictionary)
+    cells: List[Optional[str]] = [None] * length
+    for (row, target), value in zip(pairs, column.to_list([row for row, _ in pairs])):
+        cells[target] = value
+    encoded = [value.encode() if value is not None else b"" for value in cells]
+    offsets = array("q", [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    return StringColumn(b"".join(encoded), offsets, bytearray(value is None for value in cells))
+
+
+def _null_column(column_type: str, length: int):
+    if column_type in FLOAT_TYPES:
+        values = array("d", bytes(8 * length))
+    elif column_type in INTEGER_TYPES or column_type == "bool":
+        values = array("b", bytes(length))
+    else:
+        return DictionaryColumn(array("B", bytes(length)), [None])
+    return NumericColumn(column_type, values, bytearray(b"\x01" * length))
@@ -0,0 +1,124 @@
+import datetime
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.repositories.s3_utils import is_not_found
+
+CHECKPOINT_KEY = "_sync/checkpoint.json"
+# A unit that fails this many invocations in a row is left for redrive instead of blocking the plan
+MAX_UNIT_ATTEMPTS = 3
+
+SyncUnit = Tuple[str, Optional[int]]
+
+
+def unit_key(unit: SyncUnit) -> str:
+    dataset, year = unit
+    return f"{dataset}/{'*' if year is None else year}"
+
+
+class SyncCheckpoint:
+    """Durable progress of a run that spans several lambda invocations.
+
+    Every finished unit is written back to S3 straight away as one whole-object PUT, so a reader
+    sees either the previous or the new checkpoint, never a partial one. Completed and missing
+    units are skipped on resume; failed units are retried until MAX_UNIT_ATTEMPTS. One run
+    writes the checkpoint at a time; the lambda never overlaps its own invocations of a method.
+    """
+
+    def __init__(self, s3_repo: Any, s3_bucket: str, method: str, key: str = CHECKPOINT_KEY):
+        self.s3 = s3_repo
+        self.s3_bucket = s3_bucket
+        self.method = method
+        self.key = key
+        self.plan: List[str] = []
+        self.completed: Dict[str, str] = {}
+        self.attempts: Dict[str, int] = {}
+        self.created_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self.invocations = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, s3_repo: Any, s3_bucket: str, method: str, key: str = CHECKPOINT_KEY) -> "SyncCheckpoint":
+        checkpoint = cls(s3_repo, s3_bucket, method, key)
+        try:
+            body = s3_repo.get_object(Bucket=s3_bucket, Key=key)["Body"]
+        except Exception as e:
+            if not is_not_found(e):
+                raise
+            return checkpoint
+        try:
+            stored = json.loads(body.read())
+        finally:
+            body.close()
+        # A checkpoint left by another method describes a different plan
+        if stored.get("method") == method:
+            checkpoint.plan = stored["plan"]
+            checkpoint.completed = stored["completed"]
+            checkpoint.attempts = stored["attempts"]
+            checkpoint.created_at = stored["created_at"]
+            checkpoint.invocations = stored["invocations"]
+        return checkpoint
+
+    def remaining(self, units: List[SyncUnit]) -> List[SyncUnit]:
+        """Units still to run, in plan order."""
+        return [unit for unit in units if self._pending(unit_key(unit))]
+
+    def start(self, units: List[SyncUnit]):
+        """Begin an invocation of the plan units; progress already recorded carries over."""
+        with self._lock:
+            self.plan = [unit_key(unit) for unit in units]
+            self.invocations += 1
+        self.save()
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            remaining = [key for key in self.plan if self._pending(key)]
+            exhausted = [
+                key for key in self.plan
+                if key not in self.completed and self.attempts.get(key, 0) >= MAX_UNIT_ATTEMPTS
+            ]
+            return {
+                "invocations": self.invocations,
+                "planned": len(self.plan),
+                "completed": sum(key in self.completed for key in self.plan),
+                "remaining": len(remaining),
+                "exhausted": exhausted,
+            }
+
+    def _pending(self, key: str) -> bool:
+        return key not in self.completed and self.attempts.get(key, 0) < MAX_UNIT_ATTEMPTS
+
+    def mark(self, unit: SyncUnit, status: str, save: bool = True):
+        """Record a finished unit ("ok", "sealed", "missing" or "failed") and persist the checkpoint.
+
+        With save=False the unit is only recorded in memory, so a batch of units marked together
+        costs one save() afterwards instead of a PUT each.
+        """
+        key = unit_key(unit)
+        with self._lock:
+            if status == "failed":
+                self.attempts[key] = self.attempts.get(key, 0) + 1
+            else:
+                self.completed[key] = status
+                self.attempts.pop(key, None)
+        if save:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            body = json.dumps({
+                "method": self.method,
+                "created_at": self.created_at,
+                "updated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "invocations": self.invocations,
+                "plan": self.plan,
+                "completed": self.completed,
+                "attempts": self.attempts,
+            }).encode()
+            # Serialised under the lock so a slower PUT can't overwrite a newer checkpoint
+            self.s3.put_object(Bucket=self.s3_bucket, Key=self.key, Body=body, ContentType="application/json")
+
+    def clear(self):
+        """Forget the checkpoint once its plan is exhausted, so the next run starts a fresh pass."""
+        self.s3.delete_object(Bucket=self.s3_bucket, Key=self.key)
@@ -0,0 +1,159 @@
+import datetime
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from shared.repositories.s3_utils import is_not_found
+
+MANIFEST_KEY = "_manifest/manifest.json"
+
+
+class SyncManifest:
+    """Index of every csv object the sync has written: size, sha256 and ingest-time column stats.
+
+    Consumers use the per-column min/max (zone maps), null counts and distinct estimates to
+    prune and validate objects without reading them.
+    """
+
+    def __init__(self, s3_repo: Any, s3_bucket: str, key: str = MANIFEST_KEY):
+        self.s3 = s3_repo
+        self.s3_bucket = s3_bucket
+        self.key = key
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+
+    @classmethod
+    def load(cls, s3_repo: Any, s3_bucket: str, key: str = MANIFEST_KEY) -> "SyncManifest":
+        manifest = cls(s3_repo, s3_bucket, key)
+        try:
+            body = s3_repo.get_object(Bucket=s3_bucket, Key=key)["Body"]
+        except Exception as e:
+            if not is_not_found(e):
+                raise
+            return manifest
+        try:
+            manifest.entries = json.loads(body.read()).get("objects", {})
+        finally:
+            body.close()
+        return manifest
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def record(
+        self,
+        key: str,
+        dataset: str,
+        data: Optional[bytes],
+        stats: Dict[str, Any],
+        season: Optional[int] = None,
+        sha256: Optional[str] = None,
+        source_bytes: Optional[int] = None,
+        source_sha256: Optional[str] = None,
+        rejected: int = 0,
+        inputs: Optional[str] = None,
+        size: Optional[int] = None,
+    ):
+        """Record the object written to key. data is what was uploaded; source_* describe the
+        fetched file it was cast from, when that differs. inputs fingerprints the lake objects a
+        derived object was built from. An object streamed up as it was built has no data, only
+        its size and sha256.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        sha256 = sha256 or hashlib.sha256(data).hexdigest()
+        size = len(data) if size is None else size
+        entry = {
+            "dataset": dataset,
+            "season": season,
+            "bytes": size,
+            "sha256": sha256,
+            "source_bytes": size if source_bytes is None else source_bytes,
+            "source_sha256": source_sha256 or sha256,
+            "rejected": rejected,
+            "synced_at": now,
+            "checked_at": now,
+            "rows": stats["rows"],
+            "columns": stats["columns"],
+        }
+        if inputs is not None:
+            entry["inputs"] = inputs
+        with self._lock:
+            self.entries[key] = entry
+            self._dirty = True
+
+    def touch(self, key: str, inputs: Optional[str] = None):
+        """Note that key's source was fetched again and found unchanged (or a derived object was
+        rebuilt from new inputs with the same result).
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry["checked_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+                if inputs is not None:
+                    entry["inputs"] = inputs
+                self._dirty = True
+
+    def seal(self, key: str, etag: str):
+        """Mark key's object final: later runs verify it by its S3 ETag and size instead of fetching it."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry["sealed"] = {
+                    "sealed_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                    "etag": etag,
+                    "sha256": entry["sha256"],
+                }
+                self._dirty = True
+
+    def forget(self, key: str):
+        with self._lock:
+            if self.entries.pop(key, None) is not None:
+                self._dirty = True
+
+    def sealed(self, key: str) -> Optional[Dict[str, Any]]:
+        return (self.entries.get(key) or {}).get("sealed")
+
+    def checked_at(self, key: str) -> Optional[datetime.datetime]:
+        """When key's source was last fetched, whether or not it had changed."""
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+        return datetime.datetime.fromisoformat(entry.get("checked_at") or entry["synced_at"])
+
+    def save(self, force: bool = False):
+        # Concurrent savers PUT in the order they snapshot, so an older body never lands last
+        with self._save_lock:
+            with self._lock:
+                if not (self._dirty or force):
+                    return
+                body = json.dumps({"objects": self.entries}, sort_keys=True).encode()
+                self._dirty = False
+            self.s3.put_object(Bucket=self.s3_bucket, Key=self.key, Body=body, ContentType="application/json")
+        print(f"Saved sync manifest with {len(self.entries)} objects")
+
+    def unchanged(self, key: str, data: bytes, sha256: str) -> bool:
+        """True when key was last synced from exactly this source content.
+
+        Entries written before sources were cast to their DDL types have no source_sha256, so
+        their sources count as changed once and are cast on the next sync.
+        """
+        entry = self.entries.get(key)
+        return bool(entry) and entry.get("source_bytes") == len(data) and entry.get("source_sha256") == sha256
+
+    def zone_map(self, key: str, column: str):
+        """Return (min, max) recorded for column in key, or None if unknown."""
+        stats = self.entries.get(key, {}).get("columns", {}).get(column)
+        if not stats or stats.get("min") is None:
+            return None
+        return stats["min"], stats["max"]
+
+    def may_contain(self, key: str, column: str, values: Iterable[float]) -> bool:
+        """False only when the zone map proves no value of column in key is in values."""
+        bounds = self.zone_map(key, column)
+        if bounds is None:
+            return True
+        low, high = bounds
+        return any(low <= value <= high for value in values)
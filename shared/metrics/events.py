@@ -0,0 +1,204 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    # tracemalloc is only needed when profiling; keep it off the cold start path
+    from shared.metrics.memory import MemoryProfiler
+
+METRICS_NAMESPACE = "NflDataSync"
+
+
+class StdoutSink:
+    """Prints each event as one json line; Lambda ships stdout to CloudWatch Logs, which
+    extracts the metrics from the EMF envelope.
+    """
+
+    def emit(self, event: Dict[str, Any]):
+        print(json.dumps(event, default=str))
+
+
+class MemorySink:
+    """Collects events in memory for local runs and benchmarks."""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: Dict[str, Any]):
+        with self._lock:
+            self.events.append(event)
+
+
+class UnitMetrics:
+    """Timings and byte counts for one dataset/year unit of sync work."""
+
+    def __init__(self, dataset: str, year: Optional[int]):
+        self.dataset = dataset
+        self.year = year
+        self.durations: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.properties: Dict[str, Any] = {}
+        # phase -> peak/retained bytes and top allocation sites, when memory profiling is on
+        self.memory: Dict[str, Dict[str, Any]] = {}
+        self.status = "running"
+        self.error: Optional[str] = None
+        self.error_type: Optional[str] = None
+        self.started = time.time()
+        self.elapsed = 0.0
+
+    def add_duration(self, phase: str, seconds: float):
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+
+    def incr(self, counter: str, amount: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def add_memory(self, phase: str, profile: Dict[str, Any]):
+        # Repeated phases (several uploads per unit) keep the profile with the highest peak
+        previous = self.memory.get(phase)
+        if previous is None or profile["peak_traced_bytes"] > previous["peak_traced_bytes"]:
+            self.memory[phase] = profile
+
+    def to_event(self, namespace: str = METRICS_NAMESPACE) -> Dict[str, Any]:
+        metrics = {f"{phase}_ms": round(seconds * 1000, 3) for phase, seconds in self.durations.items()}
+        metrics["duration_ms"] = round(self.elapsed * 1000, 3)
+        gauges = {}
+        if self.memory:
+            gauges["peak_traced_bytes"] = max(profile["peak_traced_bytes"] for profile in self.memory.values())
+            gauges["rss_hwm_bytes"] = max(profile["rss_hwm_bytes"] or 0 for profile in self.memory.values())
+        event: Dict[str, Any] = {
+            "_aws": {
+                "Timestamp": int(self.started * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": namespace,
+                        "Dimensions": [["dataset"]],
+                        "Metrics": [{"Name": name, "Unit": "Milliseconds"} for name in metrics]
+                        + [{"Name": name, "Unit": "Bytes" if name.startswith("bytes") else "Count"} for name in self.counters]
+                        + [{"Name": name, "Unit": "Bytes"} for name in gauges],
+                    }
+                ],
+            },
+            "event": "sync_unit",
+            "dataset": self.dataset,
+            "year": self.year,
+            "status": self.status,
+        }
+        if self.error:
+            event["error"] = self.error
+            event["error_type"] = self.error_type
+        event.update(self.properties)
+        event.update(metrics)
+        event.update(self.counters)
+        event.update(gauges)
+        if self.memory:
+            event["memory"] = self.memory
+        return event
+
+
+class SyncMetrics:
+    """Records a structured event per dataset/year unit.
+
+    unit() opens a unit for the current thread; timed(), incr() and set() called anywhere
+    below it (UpdateS3, DataFileRepo) attribute to that unit and are no-ops outside one. When
+    the unit closes its event is handed to every sink. With a MemoryProfiler, every timed()
+    phase inside a unit is also memory profiled.
+    """
+
+    def __init__(self, sink=None, namespace: str = METRICS_NAMESPACE, profiler: Optional["MemoryProfiler"] = None):
+        self.sinks = [sink or StdoutSink()]
+        self.namespace = namespace
+        self.profiler = profiler
+        self._local = threading.local()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+
+    def current(self) -> Optional[UnitMetrics]:
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def unit(self, dataset: str, year: Optional[int] = None):
+        unit = UnitMetrics(dataset, year)
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(unit)
+        start = time.perf_counter()
+        try:
+            yield unit
+            unit.status = "ok"
+        except Exception as e:
+            unit.status = "error"
+            unit.error = f"{type(e).__name__}: {e}"
+            unit.error_type = type(e).__name__
+            raise
+        finally:
+            unit.elapsed = time.perf_counter() - start
+            stack.pop()
+            event = unit.to_event(self.namespace)
+            for sink in list(self.sinks):
+                sink.emit(event)
+
+    def emit(self, name: str, dimensions: Dict[str, str], metrics: Dict[str, float], **properties):
+        """Send a standalone event (not tied to a unit), e.g. a concurrency limit change."""
+        event: Dict[str, Any] = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": [list(dimensions)],
+                        "Metrics": [{"Name": metric, "Unit": "Count"} for metric in metrics],
+                    }
+                ],
+            },
+            "event": name,
+        }
+        event.update(dimensions)
+        event.update(properties)
+        event.update(metrics)
+        for sink in list(self.sinks):
+            sink.emit(event)
+
+    def log(self, name: str, message: str, **properties):
+        """Send a log event without metrics, tagged with the current unit's dataset and year."""
+        event: Dict[str, Any] = {"event": name, "message": message}
+        unit = self.current()
+        if unit is not None:
+            event.update(dataset=unit.dataset, year=unit.year)
+        event.update(properties)
+        for sink in list(self.sinks):
+            sink.emit(event)
+
+    @contextmanager
+    def timed(self, phase: str):
+        unit = self.current()
+        profiling = self.profiler is not None and unit is not None
+        with self.profiler.phase() if profiling else nullcontext() as profile:
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.record_duration(phase, time.perf_counter() - start)
+        if profile is not None:
+            unit.add_memory(phase, profile)
+
+    def record_duration(self, phase: str, seconds: float):
+        unit = self.current()
+        if unit is not None:
+            unit.add_duration(phase, seconds)
+
+    def incr(self, counter: str, amount: int = 1):
+        unit = self.current()
+        if unit is not None:
+            unit.incr(counter, amount)
+
+    def set(self, name: str, value: Any):
+        unit = self.current()
+        if unit is not None:
+            unit.properties[name] = value
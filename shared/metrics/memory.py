@@ -0,0 +1,116 @@
+import os
+import resource
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+TOP_ALLOCATION_SITES = 5
+PROC_STATUS = "/proc/self/status"
+PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+# Ignore allocations made by the profiler and the import machinery
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+class MemoryProfiler:
+    """Peak memory per sync phase (fetch, decompress, stats, rollup, upload).
+
+    While a phase runs, tracemalloc's peak is reset so the recorded peak_traced_bytes is the
+    phase's own high-water mark of Python allocations, and the kernel's RSS high-water mark is
+    reset where Linux allows it (/proc/self/clear_refs). The top allocation sites are the
+    lines whose allocations grew most between the start and end of the phase, which is what
+    the phase left behind for the next one. Figures are process wide, so concurrent units
+    blur into each other. tracemalloc slows allocation heavy code noticeably; only enable
+    it for profiling runs.
+    """
+
+    def __init__(self, top: int = TOP_ALLOCATION_SITES, frames: int = 1):
+        self.top = top
+        self.frames = frames
+        self._peaks: List[int] = []
+        self._rss_resettable = os.access(PROC_CLEAR_REFS, os.W_OK)
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def phase(self):
+        """Profile the enclosed block; yields a dict that is filled in when the block exits."""
+        self.start()
+        result: Dict[str, Any] = {}
+        # Fold the enclosing phase's peak so far into it before resetting the counter
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+        self._peaks.append(0)
+        before = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS) if self.top else None
+        start_traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self._reset_rss_peak()
+        try:
+            yield result
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._peaks.pop())
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            result["peak_traced_bytes"] = peak - start_traced
+            result["retained_bytes"] = current - start_traced
+            result["rss_hwm_bytes"] = rss_high_water_mark()
+            if before is not None:
+                result["top"] = top_allocation_sites(before, self.top)
+
+    def _reset_rss_peak(self):
+        if not self._rss_resettable:
+            return
+        try:
+            with open(PROC_CLEAR_REFS, "w") as f:
+                f.write("5")
+        except OSError:
+            self._rss_resettable = False
+
+
+def top_allocation_sites(before: tracemalloc.Snapshot, limit: int) -> List[Dict[str, Any]]:
+    after = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+    sites = []
+    for stat in after.compare_to(before, "lineno")[:limit]:
+        if stat.size_diff <= 0:
+            break
+        frame = stat.traceback[0]
+        sites.append({
+            "site": f"{_short_path(frame.filename)}:{frame.lineno}",
+            "size_bytes": stat.size_diff,
+            "blocks": stat.count_diff,
+        })
+    return sites
+
+
+def rss_high_water_mark() -> Optional[int]:
+    """Peak resident set size in bytes since the last reset (VmHWM), or since process start."""
+    try:
+        with open(PROC_STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _short_path(filename: str) -> str:
+    parts = filename.replace(os.sep, "/").split("/")
+    if "shared" in parts:
+        return "/".join(parts[parts.index("shared"):])
+    return "/".join(parts[-2:])
@@ -0,0 +1,166 @@
+import datetime
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from shared.repositories.s3_utils import is_not_found
+
+RUNS_PREFIX = "_runs"
+LATEST_RUN_KEY = f"{RUNS_PREFIX}/latest.json"
+SLOWEST_UNITS = 5
+
+
+class RunReport:
+    """Machine-readable summary of one sync run, built from the per-unit metric events.
+
+    Acts as a metrics sink: every unit event emitted while the run is active is folded into a
+    per-unit row. finish() derives totals, the slowest units and the failed units, and save()
+    persists the report under _runs/ so later runs can be compared and failures re-driven.
+    """
+
+    def __init__(self, method: str, slowest: int = SLOWEST_UNITS):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.run_id = f"{now:%Y%m%dT%H%M%SZ}-{os.urandom(4).hex()}"
+        self.method = method
+        self.slowest = slowest
+        self.started_at = now
+        self.units: List[Dict[str, Any]] = []
+        self._start = time.perf_counter()
+        self._report: Optional[Dict[str, Any]] = None
+
+    @property
+    def key(self) -> str:
+        return f"{RUNS_PREFIX}/{self.run_id}.json"
+
+    def emit(self, event: Dict[str, Any]):
+        if event.get("event") != "sync_unit":
+            return
+        unit = {
+            "dataset": event["dataset"],
+            "year": event["year"],
+            "status": unit_status(event),
+            "duration_ms": event.get("duration_ms", 0.0),
+            "bytes_in": event.get("bytes_in", 0),
+            "bytes_out": event.get("bytes_out", 0),
+        }
+        if event.get("rows_rejected"):
+            unit["rows_rejected"] = event["rows_rejected"]
+        if event.get("ftn_plays"):
+            unit["match"] = {
+                counter: event.get(counter, 0) for counter in ("plays", "plays_charted", "ftn_plays", "ftn_unmatched")
+            }
+        if event.get("player_weeks"):
+            unit["match"] = {counter: event.get(counter, 0) for counter in ("player_weeks", "ids_unmatched")}
+        if "error" in event:
+            unit["error"] = event["error"]
+        if "memory" in event:
+            unit["peak_traced_bytes"] = event["peak_traced_bytes"]
+            unit["rss_hwm_bytes"] = event["rss_hwm_bytes"]
+            unit["memory"] = event["memory"]
+        self.units.append(unit)
+
+    def add_missing(self, dataset: str, year: Optional[int]):
+        """Record a unit pruned from the plan because its source file does not exist (yet)."""
+        self._add_skipped(dataset, year, "missing")
+
+    def add_deferred(self, dataset: str, year: Optional[int]):
+        """Record a unit left for a later invocation because this one ran out of time."""
+        self._add_skipped(dataset, year, "deferred")
+
+    def add_sealed(self, dataset: str, year: Optional[int]):
+        """Record a unit of a closed season whose sealed object was verified in place."""
+        self._add_skipped(dataset, year, "sealed")
+
+    def add_fresh(self, dataset: str, year: Optional[int], schedule: str):
+        """Record a unit skipped because its refresh schedule shows it cannot have changed."""
+        self._add_skipped(dataset, year, "fresh", schedule=schedule)
+
+    def _add_skipped(self, dataset: str, year: Optional[int], status: str, **detail):
+        self.units.append({"dataset": dataset, "year": year, "status": status, "duration_ms": 0.0,
+                           "bytes_in": 0, "bytes_out": 0, **detail})
+
+    def finish(
+        self, concurrency: Optional[Dict[str, Any]] = None, checkpoint: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        duration = time.perf_counter() - self._start
+        counts = {status: 0 for status in ("ok", "unchanged", "sealed", "fresh", "missing", "deferred", "failed")}
+        for unit in self.units:
+            counts[unit["status"]] += 1
+        bytes_in = sum(unit["bytes_in"] for unit in self.units)
+        if not counts["failed"]:
+            status = "ok"
+        elif counts["failed"] == counts["ok"] + counts["unchanged"] + counts["failed"]:
+            status = "failed"
+        else:
+            status = "partial"
+        self._report = {
+            "run_id": self.run_id,
+            "method": self.method,
+            "status": status,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "duration_s": round(duration, 3),
+            "totals": {
+                "units": len(self.units),
+                **counts,
+                "bytes_in": bytes_in,
+                "bytes_out": sum(unit["bytes_out"] for unit in self.units),
+                "rows_rejected": sum(unit.get("rows_rejected", 0) for unit in self.units),
+                "mb_per_s": round(bytes_in / 1e6 / duration, 3) if duration else None,
+            },
+            "memory": memory_summary(self.units),
+            "concurrency": concurrency,
+            "checkpoint": checkpoint,
+            "slowest": sorted(self.units, key=lambda unit: unit["duration_ms"], reverse=True)[:self.slowest],
+            "failed": [
+                {"dataset": unit["dataset"], "year": unit["year"]} for unit in self.units if unit["status"] == "failed"
+            ],
+            "units": self.units,
+        }
+        return self._report
+
+    def save(self, s3_repo: Any, s3_bucket: str):
+        body = json.dumps(self._report or self.finish()).encode()
+        for key in (self.key, LATEST_RUN_KEY):
+            s3_repo.put_object(Bucket=s3_bucket, Key=key, Body=body, ContentType="application/json")
+        print(f"Saved run report {self.key}")
+
+
+def memory_summary(units: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Highest RSS and traced peaks per dataset for a memory profiled run, or None."""
+    profiled = [unit for unit in units if "memory" in unit]
+    if not profiled:
+        return None
+    datasets: Dict[str, Dict[str, int]] = {}
+    for unit in profiled:
+        peaks = datasets.setdefault(unit["dataset"], {"rss_hwm_bytes": 0, "peak_traced_bytes": 0})
+        peaks["rss_hwm_bytes"] = max(peaks["rss_hwm_bytes"], unit["rss_hwm_bytes"])
+        peaks["peak_traced_bytes"] = max(peaks["peak_traced_bytes"], unit["peak_traced_bytes"])
+    return {
+        "max_rss_hwm_bytes": max(peaks["rss_hwm_bytes"] for peaks in datasets.values()),
+        "datasets": datasets,
+    }
+
+
+def unit_status(event: Dict[str, Any]) -> str:
+    if event.get("status") == "error":
+        return "failed"
+    if event.get("unchanged") and not event.get("objects"):
+        return "unchanged"
+    return "ok"
+
+
+def load_run_report(s3_repo: Any, s3_bucket: str, run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Return a saved run report (the latest one if run_id is None), or None if there is none."""
+    key = f"{RUNS_PREFIX}/{run_id}.json" if run_id else LATEST_RUN_KEY
+    try:
+        body = s3_repo.get_object(Bucket=s3_bucket, Key=key)["Body"]
+    except Exception as e:
+        if not is_not_found(e):
+            raise
+        return None
+    try:
+        return json.loads(body.read())
+    finally:
+        body.close()
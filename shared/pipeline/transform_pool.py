@@ -0,0 +1,206 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from shared.repositories.buffers import Buffer
+
+# Bytes per send_bytes when a file is handed to a worker over its pipe
+HANDOFF_CHUNK_SIZE = 4 << 20
+HANDOFF_MODES = ("shm", "pipe")
+
+
+class TransformError(RuntimeError):
+    """A transform raised in a worker process; the message carries the worker's traceback."""
+
+
+def shared_memory_available() -> bool:
+    """Whether POSIX shared memory works here. Lambda does not mount /dev/shm."""
+    try:
+        from multiprocessing import shared_memory
+
+        block = shared_memory.SharedMemory(create=True, size=1)
+    except (ImportError, OSError):
+        return False
+    block.close()
+    block.unlink()
+    return True
+
+
+class TransformPool:
+    """Runs the CPU-bound transforms of a sync (casting, column stats, rollups) in worker processes.
+
+    Fetches and uploads stay on the sync's I/O threads. A thread with a file to transform calls
+    run(), which hands the file to an idle worker and blocks until the result comes back, so
+    the casting of one file no longer holds the GIL against every other unit's network I/O.
+    Idle workers wait in a queue of `processes` slots. That queue is the backpressure between the
+    stages: when every worker is busy, threads stop at the handoff with their file, and no
+    further fetches start until a worker frees up. Time spent waiting is recorded as the
+    cpu_wait phase.
+
+    Files are handed over through a shared memory block when /dev/shm exists, or streamed down
+    the worker's pipe in HANDOFF_CHUNK_SIZE chunks when it does not (Lambda). Lambda has no
+    semaphores either, which rules out ProcessPoolExecutor and multiprocessing.Queue; workers
+    are plain processes, one duplex Pipe each. With processes <= 1, or if workers cannot be
+    started, transforms run inline on the calling thread.
+
+    Transforms are module-level functions taking the file's bytes first; they and their
+    results must pickle.
+    """
+
+    def __init__(self, processes: int, handoff: Optional[str] = None, metrics: Any = None, start_method: str = "spawn"):
+        if handoff is not None and handoff not in HANDOFF_MODES:
+            raise ValueError(f"handoff must be one of {HANDOFF_MODES}")
+        self.processes = processes
+        self.handoff = handoff
+        self.metrics = metrics
+        self.start_method = start_method
+        self._workers: List["_Worker"] = []
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    def start(self) -> "TransformPool":
+        if self.processes <= 1 or self._workers:
+            return self
+        import multiprocessing
+
+        if self.handoff is None:
+            self.handoff = "shm" if shared_memory_available() else "pipe"
+        context = multiprocessing.get_context(self.start_method)
+        try:
+            for _ in range(self.processes):
+                worker = _Worker(context)
+                self._workers.append(worker)
+                self._idle.put(worker)
+        except OSError as e:
+            print(f"Running transforms inline: could not start worker processes ({type(e).__name__}: {e})")
+            self.close()
+            return self
+        print(f"Started {self.processes} transform processes ({self.handoff} handoff)")
+        return self
+
+    def run(self, transform: Callable, data: Buffer, *args) -> Any:
+        """transform(data, *args) on a worker process, or inline when the pool is not started."""
+        if not self._workers:
+            return transform(data, *args)
+        start = time.perf_counter()
+        worker = self._idle.get()
+        self._record_duration("cpu_wait", time.perf_counter() - start)
+        try:
+            return worker.run(transform, data, args, self.handoff)
+        except (EOFError, OSError) as e:
+            import multiprocessing
+
+            # The worker died mid-transform; replace it so the pool keeps its size
+            worker.close()
+            self._workers.remove(worker)
+            worker = _Worker(multiprocessing.get_context(self.start_method))
+            self._workers.append(worker)
+            raise TransformError(f"Transform worker exited: {type(e).__name__}: {e}") from e
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
+        self._idle = queue.Queue()
+
+    def __enter__(self) -> "TransformPool":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _record_duration(self, phase: str, seconds: float):
+        if self.metrics is not None:
+            self.metrics.record_duration(phase, seconds)
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, context):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self._lock = threading.Lock()
+
+    def run(self, transform: Callable, data: Buffer, args: tuple, handoff: str) -> Any:
+        with self._lock:
+            view = memoryview(data).cast("B")
+            if handoff == "shm":
+                from multiprocessing import shared_memory
+
+                block = shared_memory.SharedMemory(create=True, size=max(1, len(view)))
+                try:
+                    block.buf[:len(view)] = view
+                    self.connection.send((transform, args, "shm", block.name, len(view)))
+                    status, result = self.connection.recv()
+                finally:
+                    block.close()
+                    block.unlink()
+            else:
+                self.connection.send((transform, args, "pipe", None, len(view)))
+                for offset in range(0, len(view), HANDOFF_CHUNK_SIZE):
+                    self.connection.send_bytes(view[offset:offset + HANDOFF_CHUNK_SIZE])
+                status, result = self.connection.recv()
+        if status != "ok":
+            raise TransformError(result)
+        return result
+
+    def close(self):
+        try:
+            self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+
+
+def _serve(connection):
+    """Worker process loop: receive a transform and its file, send back the result."""
+    import traceback
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        transform, args, handoff, name, size = message
+        block = None
+        try:
+            if handoff == "shm":
+                from multiprocessing import shared_memory
+
+                block = shared_memory.SharedMemory(name=name)
+                data = block.buf[:size]
+            else:
+                data = bytearray(size)
+                received = 0
+                while received < size:
+                    received += connection.recv_bytes_into(memoryview(data)[received:])
+            try:
+                reply = ("ok", transform(data, *args))
+            except Exception:
+                reply = ("error", traceback.format_exc())
+            finally:
+                if block is not None:
+                    data.release()
+                    del data
+            connection.send(reply)
+        finally:
+            if block is not None:
+                try:
+                    block.close()
+                except BufferError:
+                    # A view of the block outlived the transform; it is unmapped when the worker exits
+                    pass
@@ -0,0 +1,67 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from shared.repositories.buffers import Buffer, BufferReader
+
+# Transforms run by TransformPool: module-level, the file's bytes first, pickleable results.
+# Each returns the seconds it spent per phase last, for the calling thread to record. Run
+# inline, timed is SyncMetrics.timed and the phases are recorded (and memory profiled) directly.
+
+
+def cast_and_describe(
+    data: Buffer, dataset: str, timed: Optional[Callable] = None
+) -> Tuple[Optional[Any], Dict[str, Any], Dict[str, float]]:
+    """Cast data to the dataset's DDL types and collect its column stats.
+
+    Returns (the CoercionResult, or None for datasets without DDL, the stats of what is
+    uploaded, phase durations). A result whose data is None means the file is uploaded as is.
+    """
+    from shared.coercion.type_coercion import TypeCoercer
+    from shared.stats.column_stats import object_stats
+
+    phases = _Phases(timed)
+    coerced = None
+    coercer = TypeCoercer(dataset)
+    if coercer.enabled:
+        with phases.timed("coerce"):
+            coerced = coercer.coerce(data)
+        if coerced.data is data:
+            # Empty files come back as the input, which may be a view of the worker's handoff
+            coerced.data = None
+        else:
+            data = coerced.data
+    # Stats are their own pass over the cast bytes, here in the worker, rather than fed from the
+    # upload's chunks: those are read on the sync's I/O thread, which would parse every csv again
+    # under the GIL alongside the other units' network I/O
+    with phases.timed("stats"):
+        stats = object_stats(dataset, data)
+    return coerced, stats, phases.durations
+
+
+def play_by_play_rollups(data: Buffer, timed: Optional[Callable] = None) -> Tuple[bytes, bytes, Dict[str, float]]:
+    """The team-week and player-week rollup csvs of a play_by_play season."""
+    from shared.rollups.play_by_play_rollup import PlayByPlayRollup
+
+    phases = _Phases(timed)
+    with phases.timed("rollup"), BufferReader(data) as buffer:
+        rollup = PlayByPlayRollup().consume(buffer)
+    return rollup.team_week_csv(), rollup.player_week_csv(), phases.durations
+
+
+class _Phases:
+    def __init__(self, timed: Optional[Callable]):
+        self.delegate = timed
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def timed(self, phase: str):
+        if self.delegate is not None:
+            with self.delegate(phase):
+                yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[phase] = self.durations.get(phase, 0.0) + time.perf_counter() - start
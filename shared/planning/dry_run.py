@@ -0,0 +1,43 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# End to end sync throughput assumed when there is no earlier run report to learn it from
+DEFAULT_MB_PER_S = 10.0
+
+
+def prune_missing(units: List[Tuple[str, Optional[int]]], probes: List[Dict[str, Any]]):
+    """Split units into (kept, missing) by their probes; only assets known to be absent are dropped."""
+    kept, missing = [], []
+    for unit, probe in zip(units, probes):
+        (missing if probe["available"] is False else kept).append(unit)
+    return kept, missing
+
+
+def summarize_probes(method: str, probes: List[Dict[str, Any]], mb_per_s: Optional[float] = None) -> Dict[str, Any]:
+    """Dry-run plan: availability per unit plus estimated transfer volume and duration."""
+    throughput = mb_per_s or DEFAULT_MB_PER_S
+    available = [probe for probe in probes if probe["available"]]
+    missing = [probe for probe in probes if probe["available"] is False]
+    unknown = [probe for probe in probes if probe["available"] is None]
+    total_bytes = sum(probe["bytes"] or 0 for probe in available)
+    datasets: Dict[str, Dict[str, int]] = {}
+    for probe in probes:
+        summary = datasets.setdefault(probe["dataset"], {"units": 0, "missing": 0, "bytes": 0})
+        summary["units"] += 1
+        summary["missing"] += probe["available"] is False
+        summary["bytes"] += probe["bytes"] or 0
+    return {
+        "method": method,
+        "dry_run": True,
+        "units": len(probes),
+        "available": len(available),
+        "missing": [{"dataset": probe["dataset"], "year": probe["year"], "url": probe["url"]} for probe in missing],
+        "unknown": [
+            {"dataset": probe["dataset"], "year": probe["year"], "url": probe["url"], "status": probe["status"]}
+            for probe in unknown
+        ],
+        "estimated_bytes": total_bytes,
+        "estimated_mb_per_s": round(throughput, 3),
+        "estimated_duration_s": round(total_bytes / 1e6 / throughput, 1),
+        "datasets": datasets,
+        "probes": probes,
+    }
@@ -0,0 +1,171 @@
+import abc
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.planning.season_calendar import is_in_season
+
+MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = range(7)
+WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+# Thursday, Sunday and Monday games every week, Saturday games late in the season
+GAME_DAYS = (THURSDAY, SATURDAY, SUNDAY, MONDAY)
+# Stat corrections keep trickling in for a while after the Super Bowl
+STAT_CORRECTION_DAYS = 14
+
+
+def _midnight(day: datetime.date) -> datetime.datetime:
+    return datetime.datetime(day.year, day.month, day.day, tzinfo=datetime.timezone.utc)
+
+
+class Schedule(abc.ABC):
+    """When a dataset's source can next have changed.
+
+    due_since(now) returns the latest moment at or before now after which the source may hold
+    new data; a unit last checked before that moment is due.
+    """
+
+    name = "schedule"
+
+    @abc.abstractmethod
+    def due_since(self, now: datetime.datetime) -> datetime.datetime:
+        ...
+
+    def __repr__(self):
+        return self.name
+
+
+class Daily(Schedule):
+    name = "daily"
+
+    def due_since(self, now: datetime.datetime) -> datetime.datetime:
+        return _midnight(now.date())
+
+
+class Weekly(Schedule):
+    def __init__(self, weekday: int = TUESDAY):
+        self.weekday = weekday
+        self.name = f"weekly ({WEEKDAY_NAMES[weekday]})"
+
+    def due_since(self, now: datetime.datetime) -> datetime.datetime:
+        return _midnight(now.date() - datetime.timedelta(days=(now.weekday() - self.weekday) % 7))
+
+
+class Monthly(Schedule):
+    name = "monthly"
+
+    def due_since(self, now: datetime.datetime) -> datetime.datetime:
+        return _midnight(now.date().replace(day=1))
+
+
+class AfterGameDays(Schedule):
+    """Due from midnight UTC after each game day, once that night's games have been published."""
+
+    name = "after game days"
+
+    def due_since(self, now: datetime.datetime) -> datetime.datetime:
+        day = now.date()
+        while (day - datetime.timedelta(days=1)).weekday() not in GAME_DAYS:
+            day -= datetime.timedelta(days=1)
+        return _midnight(day)
+
+
+class DatasetPolicy:
+    """Refresh schedule of one dataset in and out of season.
+
+    windows are ((month, day), (month, day), schedule) date ranges, inclusive, that override
+    the seasonal schedule, e.g. daily refreshes around the scouting combine.
+    """
+
+    def __init__(
+        self,
+        in_season: Schedule,
+        off_season: Schedule,
+        windows: Tuple[Tuple[Tuple[int, int], Tuple[int, int], Schedule], ...] = (),
+    ):
+        self.in_season = in_season
+        self.off_season = off_season
+        self.windows = windows
+
+    def schedule(self, today: datetime.date, in_season: bool) -> Schedule:
+        for start, end, schedule in self.windows:
+            if start <= (today.month, today.day) <= end:
+                return schedule
+        return self.in_season if in_season else self.off_season
+
+
+GAME_STATS = DatasetPolicy(AfterGameDays(), Monthly())
+
+# dataset -> refresh policy; datasets without one are refreshed on every run
+DATASET_POLICIES: Dict[str, DatasetPolicy] = {
+    "pbp": GAME_STATS,
+    "weekly": GAME_STATS,
+    "snaps": GAME_STATS,
+    "ngs_rushing": GAME_STATS,
+    "ngs_passing": GAME_STATS,
+    "ngs_receiving": GAME_STATS,
+    "pfr_rushing": GAME_STATS,
+    "pfr_passing": GAME_STATS,
+    "pfr_receiving": GAME_STATS,
+    "ftn": GAME_STATS,
+    # Practice reports come out Wednesday to Friday and game statuses on game days
+    "injuries": DatasetPolicy(Daily(), Monthly()),
+    "depth_chart": DatasetPolicy(Daily(), Weekly()),
+    # Lines move daily in season; the schedule is released in May
+    "odds": DatasetPolicy(Daily(), Weekly()),
+    # Signings and cuts, busiest from the new league year through the draft
+    "weekly_rosters": DatasetPolicy(Daily(), Weekly(), windows=(((3, 12), (4, 30), Daily()),)),
+    "players": DatasetPolicy(Weekly(), Weekly(), windows=(((3, 12), (4, 30), Daily()),)),
+    "player_ids": DatasetPolicy(Weekly(), Weekly()),
+    # Workouts in late February and early March, pro days through April
+    "combine": DatasetPolicy(Monthly(), Monthly(), windows=(((2, 20), (4, 30), Daily()),)),
+}
+
+
+class FreshnessPolicy:
+    """Decides which units of a scheduled update can hold new data since they were last checked.
+
+    A unit is due when its dataset's schedule has passed a possible change since the manifest
+    last saw the object. Units never synced, and datasets without a policy, are always due.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, DatasetPolicy]] = None):
+        self.policies = DATASET_POLICIES if policies is None else policies
+
+    def schedule(self, dataset: str, now: datetime.datetime) -> Optional[Schedule]:
+        policy = self.policies.get(dataset)
+        if policy is None:
+            return None
+        today = now.date()
+        in_season = is_in_season(today) or is_in_season(today - datetime.timedelta(days=STAT_CORRECTION_DAYS))
+        return policy.schedule(today, in_season)
+
+    def check(
+        self, dataset: str, last_checked: Optional[datetime.datetime], now: Optional[datetime.datetime] = None
+    ) -> Dict[str, Any]:
+        """Return {"due", "schedule", "due_since"} for a unit of dataset last checked at last_checked."""
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        schedule = self.schedule(dataset, now)
+        if schedule is None:
+            return {"due": True, "schedule": None, "due_since": None}
+        since = schedule.due_since(now)
+        return {
+            "due": last_checked is None or last_checked < since,
+            "schedule": schedule.name,
+            "due_since": since.isoformat(),
+        }
+
+    def split(
+        self,
+        units: List[Tuple[str, Optional[int]]],
+        last_checked: Dict[Tuple[str, Optional[int]], Optional[datetime.datetime]],
+        now: Optional[datetime.datetime] = None,
+    ):
+        """Split units into (due, fresh); fresh is a list of (unit, decision) pairs."""
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        due, fresh = [], []
+        for unit in units:
+            decision = self.check(unit[0], last_checked.get(unit), now)
+            if decision["due"]:
+                due.append(unit)
+            else:
+                fresh.append((unit, decision))
+        return due, fresh
@@ -0,0 +1,71 @@
+import datetime
+from typing import Optional
+
+# Approximate new league year start (offseason begins)
+# In reality, it's usually around March 12 at 4 p.m. ET.
+LEAGUE_YEAR_START = (3, 12)
+# Days after the Super Bowl until a season's files are treated as final
+SEAL_GRACE_DAYS = 45
+
+
+def first_nfl_sunday(year: int) -> datetime.date:
+    """The Sunday after Labor Day, the first Sunday of the year's regular season."""
+    sept_first = datetime.date(year, 9, 1)
+    first_monday_offset = (0 - sept_first.weekday()) % 7
+    labor_day = sept_first + datetime.timedelta(days=first_monday_offset)
+    return labor_day + datetime.timedelta(days=6)  # Labor Day + 6 = Sunday
+
+
+def kickoff(season: int) -> datetime.date:
+    """The season opener, played the Thursday before the first Sunday."""
+    return first_nfl_sunday(season) - datetime.timedelta(days=3)
+
+
+def super_bowl(season: int) -> datetime.date:
+    """The second Sunday of February after the season (since the 18 week schedule)."""
+    feb_first = datetime.date(season + 1, 2, 1)
+    first_sunday = feb_first + datetime.timedelta(days=(6 - feb_first.weekday()) % 7)
+    return first_sunday + datetime.timedelta(days=7)
+
+
+def is_in_season(today: Optional[datetime.date] = None) -> bool:
+    """True from the season opener through the Super Bowl, when games are being played."""
+    today = today or datetime.date.today()
+    # The opener falls before the first Sunday, so look at both seasons the date could belong to
+    return kickoff(today.year) <= today or today <= super_bowl(today.year - 1)
+
+
+def is_season_closed(season: int, today: Optional[datetime.date] = None) -> bool:
+    """True once the season's Super Bowl is more than SEAL_GRACE_DAYS in the past."""
+    today = today or datetime.date.today()
+    return today > super_bowl(season) + datetime.timedelta(days=SEAL_GRACE_DAYS)
+
+
+def nfl_in_season_year_for_today(today: Optional[datetime.date] = None):
+    """Return the NFL season year based on today's date.
+    If today's date is on or after this year's first Sunday of the NFL season,
+    return this year. Otherwise, return the previous year.
+    """
+    today = today or datetime.date.today()
+    year = today.year
+
+    if today >= first_nfl_sunday(year):
+        return year
+    else:
+        return year - 1
+
+
+def nfl_off_season_year_for_today(today: Optional[datetime.date] = None):
+    """Return the NFL season year based on today's date.
+    If today's date is on or after this year's NFL offseason start (new league year),
+    return this year. Otherwise, return the previous year.
+    """
+    today = today or datetime.date.today()
+    year = today.year
+
+    offseason_start = datetime.date(year, *LEAGUE_YEAR_START)
+
+    if today >= offseason_start:
+        return year
+    else:
+        return year - 1
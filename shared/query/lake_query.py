@@ -0,0 +1,322 @@
+import argparse
+import csv
+import json
+import math
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from shared.columnar.columnar_dataset import ColumnarBuilder, ColumnarDataset
+from shared.config.env import NFL_DATA_BUCKET, STORAGE_ROOT
+from shared.config.nfl_config import config_map
+from shared.config.schema import NUMERIC_TYPES, column_types
+from shared.manifest.sync_manifest import SyncManifest
+from shared.readers.projected_csv_reader import ProjectedCsvReader
+from shared.repositories.s3_utils import list_keys
+from shared.repositories.storage import open_storage
+
+NULL_VALUES = ("", "NA")
+
+# Columns a team predicate is matched against; a row qualifies if any of them match.
+TEAM_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "pbp": ("posteam", "defteam"),
+    "players": ("team_abbr",),
+    "weekly": ("recent_team",),
+    "injuries": ("team",),
+    "ngs_rushing": ("team_abbr",),
+    "ngs_receiving": ("team_abbr",),
+    "ngs_passing": ("team_abbr",),
+    "depth_chart": ("club_code",),
+    "pfr_rushing": ("team",),
+    "pfr_receiving": ("team",),
+    "pfr_passing": ("team",),
+    "snaps": ("team",),
+    "weekly_rosters": ("team",),
+    "odds": ("home_team", "away_team"),
+    "team_week_rollup": ("team",),
+}
+
+
+class _Aggregate:
+    def __init__(self, function: str):
+        if function not in ("sum", "count", "mean", "min", "max"):
+            raise ValueError(f"Invalid aggregate function: {function}")
+        self.function = function
+        self.count = 0
+        self.total = 0.0
+        self.value: Optional[float] = None
+
+    def add(self, cell: str):
+        if cell in NULL_VALUES:
+            return
+        if self.function == "count":
+            self.count += 1
+            return
+        number = float(cell)
+        if math.isnan(number):
+            return
+        self.count += 1
+        self.total += number
+        if self.function == "min":
+            self.value = number if self.value is None else min(self.value, number)
+        elif self.function == "max":
+            self.value = number if self.value is None else max(self.value, number)
+
+    def result(self) -> Optional[float]:
+        if self.function == "count":
+            return self.count
+        if self.function == "sum":
+            return self.total
+        if self.function == "mean":
+            return self.total / self.count if self.count else None
+        return self.value
+
+
+class LakeQuery:
+    """Ad-hoc queries over the csv objects UpdateS3 writes to the data lake.
+
+    Season predicates prune which objects are read at all, week and team predicates are
+    applied to each row, and only the projected and predicate columns are pulled out of
+    each row by ProjectedCsvReader. Given the sync manifest, objects whose season/week zone
+    maps cannot match are skipped without being opened. Works against boto3 or a LocalS3Repo
+    directory mirror.
+    """
+
+    def __init__(self, s3_repo: Any, s3_bucket: str, manifest: Optional[SyncManifest] = None):
+        self.s3 = s3_repo
+        self.s3_bucket = s3_bucket
+        self.manifest = manifest
+
+    def object_keys(self, dataset: str, seasons: Optional[Iterable[int]] = None) -> List[str]:
+        """Return the S3 keys for a dataset, pruned to the requested seasons where the
+        dataset is partitioned by season ({table}/{year}.csv).
+        """
+        table_name = self._config(dataset).table
+        wanted = set(seasons) if seasons is not None else None
+        keys = []
+        for key in list_keys(self.s3, self.s3_bucket, f"{table_name}/"):
+            stem = key[len(table_name) + 1:]
+            if not stem.endswith(".csv") or "/" in stem:
+                continue
+            stem = stem[: -len(".csv")]
+            if wanted is not None and stem.isdigit() and int(stem) not in wanted:
+                continue
+            keys.append(key)
+        return keys
+
+    def select(
+        self,
+        dataset: str,
+        columns: Sequence[str],
+        seasons: Optional[Iterable[int]] = None,
+        weeks: Optional[Iterable[int]] = None,
+        teams: Optional[Iterable[str]] = None,
+    ) -> Iterator[Tuple[str, ...]]:
+        """Stream the projected columns of every row matching the predicates."""
+        seasons = set(seasons) if seasons is not None else None
+        weeks = set(weeks) if weeks is not None else None
+        teams = set(teams) if teams is not None else None
+
+        for key in self._pruned_keys(dataset, seasons, weeks):
+            yield from self._scan(dataset, key, list(columns), seasons, weeks, teams)
+
+    def load(
+        self,
+        dataset: str,
+        columns: Optional[Sequence[str]] = None,
+        seasons: Optional[Iterable[int]] = None,
+        weeks: Optional[Iterable[int]] = None,
+        teams: Optional[Iterable[str]] = None,
+    ) -> ColumnarDataset:
+        """Read the matching objects into one ColumnarDataset for in-process analytics.
+
+        columns defaults to every DDL column. Objects are pruned like select(); the season,
+        week and team predicates are then applied as filters, which share the loaded columns.
+        """
+        seasons = set(seasons) if seasons is not None else None
+        weeks = set(weeks) if weeks is not None else None
+        teams = set(teams) if teams is not None else None
+        read_columns = list(columns) if columns is not None else None
+        if read_columns is not None:
+            predicate_columns = [
+                column
+                for column, wanted in (("season", seasons), ("week", weeks))
+                if wanted is not None and column in column_types(dataset)
+            ]
+            if teams is not None:
+                predicate_columns += TEAM_COLUMNS.get(dataset, ())
+            read_columns += [column for column in predicate_columns if column not in read_columns]
+
+        builder = ColumnarBuilder(dataset, read_columns)
+        for key in self._pruned_keys(dataset, seasons, weeks):
+            builder.add_csv(self.s3.get_object(Bucket=self.s3_bucket, Key=key)["Body"])
+        frame = builder.finish()
+
+        if seasons is not None and "season" in frame.columns:
+            frame = frame.where("season", seasons)
+        if weeks is not None:
+            if "week" not in frame.columns:
+                raise ValueError(f"Dataset {dataset} has no week column")
+            frame = frame.where("week", weeks)
+        if teams is not None:
+            team_columns = [column for column in TEAM_COLUMNS.get(dataset, ()) if column in frame.columns]
+            if not team_columns:
+                raise ValueError(f"Dataset {dataset} has no team column")
+            masks = [frame.isin(column, teams) for column in team_columns]
+            frame = frame.filter(map(any, zip(*masks)) if len(masks) > 1 else masks[0])
+        return frame.select(columns) if columns is not None else frame
+
+    def _pruned_keys(self, dataset: str, seasons: Optional[set], weeks: Optional[set]) -> Iterator[str]:
+        """The dataset's keys for seasons, less those whose manifest zone maps rule out seasons or weeks."""
+        for key in self.object_keys(dataset, seasons):
+            if self.manifest is not None and not (
+                (seasons is None or self.manifest.may_contain(key, "season", seasons))
+                and (weeks is None or self.manifest.may_contain(key, "week", weeks))
+            ):
+                continue
+            yield key
+
+    def aggregate(
+        self,
+        dataset: str,
+        group_by: Sequence[str],
+        aggregates: Sequence[Tuple[str, str]],
+        seasons: Optional[Iterable[int]] = None,
+        weeks: Optional[Iterable[int]] = None,
+        teams: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Group matching rows by group_by and fold each (column, function) aggregate
+        while streaming, e.g. aggregates=[("epa", "mean"), ("play_id", "count")].
+        """
+        types = column_types(dataset)
+        for column, function in aggregates:
+            if function != "count" and types and types.get(column) not in NUMERIC_TYPES:
+                raise ValueError(f"Column {column} is not numeric in {dataset}")
+
+        group_width = len(group_by)
+        columns = list(group_by) + [column for column, _ in aggregates]
+        groups: Dict[Tuple[str, ...], List[_Aggregate]] = {}
+        for row in self.select(dataset, columns, seasons, weeks, teams):
+            group = row[:group_width]
+            accumulators = groups.get(group)
+            if accumulators is None:
+                accumulators = groups[group] = [_Aggregate(function) for _, function in aggregates]
+            for accumulator, cell in zip(accumulators, row[group_width:]):
+                accumulator.add(cell)
+
+        results = []
+        for group in sorted(groups):
+            result: Dict[str, Any] = dict(zip(group_by, group))
+            for (column, function), accumulator in zip(aggregates, groups[group]):
+                result[f"{function}_{column}"] = accumulator.result()
+            results.append(result)
+        return results
+
+    def _scan(self, dataset, key, columns, seasons, weeks, teams) -> Iterator[Tuple[str, ...]]:
+        reader = ProjectedCsvReader(self.s3.get_object(Bucket=self.s3_bucket, Key=key)["Body"])
+        try:
+            header = reader.read_header()
+            if not header:
+                return
+            missing = [column for column in columns if column not in header]
+            if missing:
+                raise ValueError(f"Columns {missing} not found in s3://{self.s3_bucket}/{key}")
+
+            # Predicate columns are read after the projection: (position in the row, test)
+            read_columns = list(columns)
+            predicates = []
+            if seasons is not None and "season" in header:
+                read_columns.append("season")
+                predicates.append((len(read_columns) - 1, _int_predicate(seasons)))
+            if weeks is not None:
+                if "week" not in header:
+                    raise ValueError(f"Dataset {dataset} has no week column")
+                read_columns.append("week")
+                predicates.append((len(read_columns) - 1, _int_predicate(weeks)))
+            if teams is not None:
+                team_columns = [column for column in TEAM_COLUMNS.get(dataset, ()) if column in header]
+                if not team_columns:
+                    raise ValueError(f"Dataset {dataset} has no team column")
+                read_columns += team_columns
+                positions = tuple(range(len(read_columns) - len(team_columns), len(read_columns)))
+                predicates.append((positions, teams.__contains__))
+
+            reader.project(read_columns)
+            width = len(columns)
+            for row in reader.rows():
+                if all(_matches(row, position, test) for position, test in predicates):
+                    yield row[:width]
+        finally:
+            reader.close()
+
+    @staticmethod
+    def _config(dataset: str):
+        nfl_config = config_map.get(dataset)
+        if nfl_config is None:
+            raise ValueError(f"Unknown dataset: {dataset}")
+        return nfl_config
+
+
+def _int_predicate(values):
+    def test(cell: str) -> bool:
+        if cell in NULL_VALUES:
+            return False
+        return int(float(cell)) in values
+
+    return test
+
+
+def _matches(row, position, test) -> bool:
+    if isinstance(position, tuple):
+        return any(test(row[i]) for i in position)
+    return test(row[position])
+
+
+def _csv_ints(value: Optional[str]) -> Optional[List[int]]:
+    return [int(part) for part in value.split(",")] if value else None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Query the NFL data lake without loading the warehouse.")
+    parser.add_argument("dataset", choices=sorted(config_map))
+    parser.add_argument("--root", default=STORAGE_ROOT, help="Local directory mirror of the lake (uses S3 when omitted)")
+    parser.add_argument("--bucket", default=NFL_DATA_BUCKET or "nfl-staging-datalake")
+    parser.add_argument("--season", help="Comma separated seasons")
+    parser.add_argument("--week", help="Comma separated weeks")
+    parser.add_argument("--team", help="Comma separated team abbreviations")
+    parser.add_argument("--select", help="Comma separated columns to project")
+    parser.add_argument("--group-by", help="Comma separated group by columns")
+    parser.add_argument("--agg", action="append", default=[], help="column:function, e.g. epa:mean")
+    parser.add_argument(
+        "--footprint", action="store_true", help="Load the matching rows column-wise and print their memory footprint"
+    )
+    args = parser.parse_args(argv)
+
+    s3 = open_storage(args.root)
+
+    query = LakeQuery(s3, args.bucket, SyncManifest.load(s3, args.bucket))
+    seasons = _csv_ints(args.season)
+    weeks = _csv_ints(args.week)
+    teams = args.team.split(",") if args.team else None
+    writer = csv.writer(sys.stdout)
+
+    if args.footprint:
+        columns = args.select.split(",") if args.select else None
+        frame = query.load(args.dataset, columns, seasons, weeks, teams)
+        print(json.dumps(frame.footprint(), indent=2))
+    elif args.agg:
+        group_by = args.group_by.split(",") if args.group_by else []
+        aggregates = [tuple(agg.split(":", 1)) for agg in args.agg]
+        rows = query.aggregate(args.dataset, group_by, aggregates, seasons, weeks, teams)
+        if rows:
+            writer.writerow(rows[0].keys())
+            writer.writerows(row.values() for row in rows)
+    else:
+        if not args.select:
+            parser.error("--select is required without --agg")
+        columns = args.select.split(",")
+        writer.writerow(columns)
+        writer.writerows(query.select(args.dataset, columns, seasons, weeks, teams))
+
+
+if __name__ == "__main__":
+    main()
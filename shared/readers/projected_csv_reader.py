@@ -0,0 +1,213 @@
+import csv
+from array import array
+from itertools import repeat
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from shared.config.schema import FLOAT_TYPES, INTEGER_TYPES, column_types
+from shared.repositories.s3_utils import READ_CHUNK_SIZE, iter_lines
+
+NULL_VALUES = ("", "NA")
+DEFAULT_BATCH_SIZE = 8192
+
+# Lookup tables for map(dict.get, cells, ...), which converts a whole column at C speed
+_NULL_FLAGS = {value: 1 for value in NULL_VALUES}
+_INT_NULLS = {value: "0" for value in NULL_VALUES}
+_FLOAT_NULLS = {value: "nan" for value in NULL_VALUES}
+_TEXT_NULLS = {value: None for value in NULL_VALUES}
+_TRUE_VALUES = {value: 1 for value in ("TRUE", "True", "true", "1")}
+
+
+class ColumnBatch:
+    """A run of rows stored column-wise. Numeric and bool columns are arrays (NaN / 0 where
+    null) with a parallel null mask; everything else is a list of Optional[str].
+    """
+
+    def __init__(self, length: int, columns: Dict[str, Any], nulls: Dict[str, bytearray]):
+        self.length = length
+        self.columns = columns
+        self.nulls = nulls
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, column: str):
+        return self.columns[column]
+
+
+class ProjectedCsvReader:
+    """Streams only the projected columns out of a wide lake csv.
+
+    Column positions are resolved once from the header and checked against the table's DDL.
+    Rows are split no further than the last projected column, so trailing fields are never
+    turned into Python strings; csv parsing is only used for rows where a quoted field appears
+    before that point.
+    """
+
+    def __init__(
+        self,
+        body,
+        columns: Optional[Sequence[str]] = None,
+        dataset: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        chunk_size: int = READ_CHUNK_SIZE,
+    ):
+        self.body = body
+        self.dataset = dataset
+        self.types = column_types(dataset) if dataset else {}
+        self.batch_size = batch_size
+        self._lines = _records(iter_lines(body, chunk_size))
+        self.header: Optional[List[str]] = None
+        self.columns: List[str] = []
+        self.indexes: List[int] = []
+        if columns is not None:
+            self.project(columns)
+
+    def read_header(self) -> List[str]:
+        """Read (once) and return the csv header; an empty object has an empty header."""
+        if self.header is None:
+            line = next(self._lines, None)
+            self.header = next(csv.reader([line])) if line is not None else []
+        return self.header
+
+    def project(self, columns: Sequence[str]):
+        """Set the projection. Must be called before rows() or batches() start."""
+        if not columns:
+            raise ValueError("At least one column must be projected")
+        unknown = [column for column in columns if self.types and column not in self.types]
+        if unknown:
+            raise ValueError(f"Columns {unknown} are not in the {self.dataset} schema")
+        self.columns = list(columns)
+        self.indexes = []
+
+    def _resolve_indexes(self) -> bool:
+        if not self.columns:
+            raise ValueError("No columns have been projected")
+        header = self.read_header()
+        if not header:
+            return False
+        if not self.indexes:
+            index = {name: i for i, name in enumerate(header)}
+            missing = [column for column in self.columns if column not in index]
+            if missing:
+                raise ValueError(f"Columns {missing} are not in the csv header")
+            self.indexes = [index[column] for column in self.columns]
+        return True
+
+    def rows(self) -> Iterator[Tuple[str, ...]]:
+        """Yield the raw projected cells of each row, in projection order."""
+        if not self._resolve_indexes():
+            return
+        indexes = self.indexes
+        max_index = max(indexes)
+        project = _projector(indexes)
+        feeder = _LineFeeder()
+        quoted_reader = csv.reader(feeder)
+        for line in self._lines:
+            quote = line.find('"')
+            if quote == -1 or line.count(",", 0, quote) > max_index:
+                fields = line.split(",", max_index + 1)
+            else:
+                feeder.line = line
+                fields = next(quoted_reader)
+            if len(fields) <= max_index:
+                fields += [""] * (max_index + 1 - len(fields))
+            yield project(fields)
+
+    def batches(self) -> Iterator[ColumnBatch]:
+        """Yield typed ColumnBatch objects of up to batch_size rows."""
+        converters = [_converter(self.types.get(column, "text")) for column in self.columns]
+        pending: List[Tuple[str, ...]] = []
+        for row in self.rows():
+            pending.append(row)
+            if len(pending) == self.batch_size:
+                yield self._batch(pending, converters)
+                pending = []
+        if pending:
+            yield self._batch(pending, converters)
+
+    def close(self):
+        self.body.close()
+
+    def _batch(self, rows: List[Tuple[str, ...]], converters: List[Callable]) -> ColumnBatch:
+        columns: Dict[str, Any] = {}
+        nulls: Dict[str, bytearray] = {}
+        for column, convert, cells in zip(self.columns, converters, zip(*rows)):
+            columns[column], nulls[column] = convert(cells)
+        return ColumnBatch(len(rows), columns, nulls)
+
+
+class _LineFeeder:
+    """Lets one csv.reader be reused for the rows that need real csv parsing."""
+
+    line = ""
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.line
+
+
+def _records(lines: Iterator[str]) -> Iterator[str]:
+    """Strip line endings and rejoin physical lines that belong to one quoted multi-line field."""
+    for line in lines:
+        if line.count('"') % 2:
+            parts = [line]
+            for continuation in lines:
+                parts.append(continuation)
+                if continuation.count('"') % 2:
+                    break
+            line = "".join(parts)
+        yield line.rstrip("\r\n")
+
+
+def _projector(indexes: List[int]):
+    if len(indexes) == 1:
+        only = indexes[0]
+        return lambda fields: (fields[only],)
+    return itemgetter(*indexes)
+
+
+def _null_mask(cells: Sequence[str]) -> bytearray:
+    return bytearray(map(_NULL_FLAGS.get, cells, repeat(0)))
+
+
+def _to_int(cell: str) -> int:
+    if cell in NULL_VALUES:
+        return 0
+    try:
+        return int(cell)
+    except ValueError:
+        return int(float(cell))
+
+
+def _convert_int(cells: Sequence[str]):
+    try:
+        values = array("q", map(int, map(_INT_NULLS.get, cells, cells)))
+    except ValueError:
+        # Integral floats such as 1.0
+        values = array("q", map(_to_int, cells))
+    return values, _null_mask(cells)
+
+
+def _convert_float(cells: Sequence[str]):
+    return array("d", map(float, map(_FLOAT_NULLS.get, cells, cells))), _null_mask(cells)
+
+
+def _convert_bool(cells: Sequence[str]):
+    return array("b", map(_TRUE_VALUES.get, cells, repeat(0))), _null_mask(cells)
+
+
+def _convert_text(cells: Sequence[str]):
+    return list(map(_TEXT_NULLS.get, cells, cells)), _null_mask(cells)
+
+
+def _converter(column_type: str) -> Callable:
+    if column_type in INTEGER_TYPES:
+        return _convert_int
+    if column_type in FLOAT_TYPES:
+        return _convert_float
+    if column_type == "bool":
+        return _convert_bool
+    return _convert_text
@@ -0,0 +1,177 @@
+import io
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Any, List, Union
+
+from shared.repositories.s3_utils import READ_CHUNK_SIZE
+
+MIN_BUFFER_SIZE = 64 << 10
+# Sizes are rounded up to this so files of similar size can share buffers
+BUFFER_ALIGNMENT = 1 << 20
+# Idle buffers kept for reuse; anything beyond this is left to the garbage collector
+MAX_POOLED_BYTES = 512 << 20
+# Compressed input fed to zlib per call, bounding the transient output chunk
+DECOMPRESS_CHUNK_SIZE = 256 << 10
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class BufferPool:
+    """Recycled bytearrays for file bodies, so each unit reuses the memory of the previous ones.
+
+    acquire() hands out the smallest idle buffer that fits (or allocates one, rounded up to a
+    whole MiB) and ties it to the calling thread's scope(); every buffer leased inside a
+    scope returns to the pool when it exits, so views of it must not outlive the scope. Fresh
+    allocations, reuses and whole payload copies are counted on metrics as buffer_allocations,
+    buffer_reuses, bytes_allocated, copies and bytes_copied.
+    """
+
+    def __init__(self, max_pooled_bytes: int = MAX_POOLED_BYTES, metrics: Any = None):
+        self.max_pooled_bytes = max_pooled_bytes
+        self.metrics = metrics
+        self._idle: List[bytearray] = []
+        self._idle_bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def scope(self):
+        leases = self._local.__dict__.setdefault("leases", [])
+        mark = len(leases)
+        try:
+            yield self
+        finally:
+            for buffer in leases[mark:]:
+                self.release(buffer)
+            del leases[mark:]
+
+    def acquire(self, size: int) -> bytearray:
+        with self._lock:
+            fits = [buffer for buffer in self._idle if len(buffer) >= size]
+            buffer = min(fits, key=len) if fits else None
+            if buffer is not None:
+                self._idle.remove(buffer)
+                self._idle_bytes -= len(buffer)
+        if buffer is None:
+            buffer = bytearray(max(MIN_BUFFER_SIZE, -(-size // BUFFER_ALIGNMENT) * BUFFER_ALIGNMENT))
+            self._incr("buffer_allocations")
+            self._incr("bytes_allocated", len(buffer))
+        else:
+            self._incr("buffer_reuses")
+        leases = getattr(self._local, "leases", None)
+        if leases is not None:
+            leases.append(buffer)
+        return buffer
+
+    def release(self, buffer: bytearray):
+        with self._lock:
+            if self._idle_bytes + len(buffer) <= self.max_pooled_bytes:
+                self._idle.append(buffer)
+                self._idle_bytes += len(buffer)
+
+    def grow(self, buffer: bytearray, used: int, size: int) -> bytearray:
+        """A buffer of at least size holding the first used bytes of buffer."""
+        grown = self.acquire(size)
+        grown[:used] = memoryview(buffer)[:used]
+        self.count_copy(used)
+        return grown
+
+    def count_copy(self, nbytes: int):
+        self._incr("copies")
+        self._incr("bytes_copied", nbytes)
+
+    def _incr(self, counter: str, amount: int = 1):
+        if self.metrics is not None:
+            self.metrics.incr(counter, amount)
+
+
+def read_body(response, pool: BufferPool) -> memoryview:
+    """Read an http.client response straight into a pooled buffer with readinto."""
+    buffer = pool.acquire(response.length or MIN_BUFFER_SIZE)
+    used = 0
+    while True:
+        if used == len(buffer):
+            # Chunked or mis-sized response
+            buffer = pool.grow(buffer, used, used * 2)
+        read = response.readinto(memoryview(buffer)[used:])
+        if not read:
+            return memoryview(buffer)[:used]
+        used += read
+
+
+def gunzip_into(data: Buffer, pool: BufferPool) -> memoryview:
+    """Decompress gzip data into one pooled buffer, sized from the gzip trailer.
+
+    The input is fed to zlib as memoryview slices, so the compressed bytes are never copied;
+    zlib's output chunks are copied into the pooled buffer once.
+    """
+    source = memoryview(data)
+    # ISIZE: uncompressed length mod 2**32 of the last member; a hint, checked as we go
+    size_hint = struct.unpack("<I", source[-4:])[0] if len(source) >= 18 else 0
+    buffer = pool.acquire(max(size_hint, len(source)))
+    used = 0
+    offset = 0
+    while offset < len(source):
+        decompressor = zlib.decompressobj(wbits=31)
+        while offset < len(source) and not decompressor.eof:
+            chunk = source[offset:offset + DECOMPRESS_CHUNK_SIZE]
+            piece = decompressor.decompress(chunk)
+            # A member ending inside this chunk leaves the rest of it unused
+            offset += len(chunk) - len(decompressor.unused_data)
+            if used + len(piece) > len(buffer):
+                buffer = pool.grow(buffer, used, used + len(piece))
+            buffer[used:used + len(piece)] = piece
+            used += len(piece)
+        if not decompressor.eof:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+        # Members may be followed by zero padding
+        if not any(source[offset:offset + 1]):
+            break
+    pool.count_copy(used)
+    return memoryview(buffer)[:used]
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable binary file over a buffer without copying it, for boto3 Bodies and csv readers."""
+
+    def __init__(self, data: Buffer):
+        super().__init__()
+        self._view = memoryview(data).cast("B")
+        self._position = 0
+
+    def __len__(self):
+        return len(self._view)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        chunk = self._view[self._position:self._position + len(target)]
+        target[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+def as_body(data: Buffer):
+    """data as an S3 request Body: bytes as they are, buffers wrapped in a BufferReader."""
+    return data if isinstance(data, bytes) else BufferReader(data)
+
+
+def iter_chunks(data: Buffer, chunk_size: int = READ_CHUNK_SIZE):
+    """Zero-copy memoryview slices of data."""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
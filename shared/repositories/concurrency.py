@@ -0,0 +1,169 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# host -> (initial, maximum) concurrent requests; the release CDN takes far more than the origins
+HOST_LIMITS = {
+    "objects.githubusercontent.com": (4, 16),
+    "github.com": (4, 16),
+    "nflgamedata.com": (2, 4),
+    "raw.githubusercontent.com": (2, 6),
+}
+DEFAULT_LIMITS = (2, 8)
+
+THROTTLE_STATUSES = (429, 500, 502, 503, 504)
+DECREASE_FACTOR = 0.5
+# A response slower than LATENCY_SPIKE_FACTOR x the host's typical time to first byte (and at
+# least LATENCY_SPIKE_FLOOR_S) counts as congestion
+LATENCY_SPIKE_FACTOR = 3.0
+LATENCY_SPIKE_FLOOR_S = 0.5
+LATENCY_SMOOTHING = 0.2
+# Throughput within this fraction of the best window so far still counts as improving
+THROUGHPUT_TOLERANCE = 0.05
+
+
+class AimdLimiter:
+    """Adaptive concurrency limit for one upstream host (additive increase, multiplicative decrease).
+
+    Requests hold a slot between acquire() and release(). Completions are grouped into windows
+    of `limit` requests; when a window ran at the full limit and its throughput matches or
+    beats the best window so far, the limit grows by one. A throttling status (429/5xx) or a
+    time to first byte far above the host's smoothed baseline halves it, at most once per
+    window so one burst of failures counts as one congestion signal. Every change is passed
+    to on_change with its reason.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        initial: int = DEFAULT_LIMITS[0],
+        maximum: int = DEFAULT_LIMITS[1],
+        minimum: int = 1,
+        on_change: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.host = host
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.on_change = on_change
+        self.in_flight = 0
+        self.changes: List[Dict[str, Any]] = []
+        self._condition = threading.Condition()
+        self._baseline_ttfb: Optional[float] = None
+        self._best_throughput = 0.0
+        self._window_start = time.perf_counter()
+        self._window_bytes = 0
+        self._window_count = 0
+        self._decreased_this_window = False
+        self._saturated = False
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._saturated = True
+                self._condition.wait()
+            self.in_flight += 1
+            if self.in_flight >= self.limit:
+                self._saturated = True
+
+    def release(self, status: Optional[int], ttfb: Optional[float] = None, nbytes: int = 0):
+        """Return a slot and feed the outcome of the request (status None for connection errors)."""
+        with self._condition:
+            self.in_flight -= 1
+            if status is None or status in THROTTLE_STATUSES:
+                self._decrease(f"status {status or 'connection error'}")
+            elif ttfb is not None:
+                if self._is_latency_spike(ttfb):
+                    self._decrease(f"latency spike {ttfb * 1000:.0f} ms vs {self._baseline_ttfb * 1000:.0f} ms")
+                else:
+                    self._observe_ttfb(ttfb)
+                self._window_bytes += nbytes
+                self._window_count += 1
+                if self._window_count >= self.limit:
+                    self._close_window()
+            self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "baseline_ttfb_ms": round(self._baseline_ttfb * 1000, 1) if self._baseline_ttfb else None,
+                "best_mb_per_s": round(self._best_throughput / 1e6, 3),
+                "changes": len(self.changes),
+            }
+
+    def _is_latency_spike(self, ttfb: float) -> bool:
+        if self._baseline_ttfb is None:
+            return False
+        return ttfb > max(LATENCY_SPIKE_FACTOR * self._baseline_ttfb, LATENCY_SPIKE_FLOOR_S)
+
+    def _observe_ttfb(self, ttfb: float):
+        if self._baseline_ttfb is None:
+            self._baseline_ttfb = ttfb
+        else:
+            self._baseline_ttfb += LATENCY_SMOOTHING * (ttfb - self._baseline_ttfb)
+
+    def _close_window(self):
+        elapsed = time.perf_counter() - self._window_start
+        throughput = self._window_bytes / elapsed if elapsed > 0 else 0.0
+        improving = throughput >= self._best_throughput * (1 - THROUGHPUT_TOLERANCE)
+        # Only a window that actually used the whole limit says anything about raising it
+        if self._saturated and improving and not self._decreased_this_window:
+            if self.limit < self.maximum:
+                self._set_limit(self.limit + 1, f"throughput {throughput / 1e6:.2f} MB/s")
+        self._best_throughput = max(self._best_throughput, throughput)
+        self._window_start = time.perf_counter()
+        self._window_bytes = 0
+        self._window_count = 0
+        self._decreased_this_window = False
+        self._saturated = False
+
+    def _decrease(self, reason: str):
+        if self._decreased_this_window:
+            return
+        self._decreased_this_window = True
+        # Throughput measured at the old limit is no longer a fair bar
+        self._best_throughput = 0.0
+        self._set_limit(max(self.minimum, int(self.limit * DECREASE_FACTOR)), reason)
+
+    def _set_limit(self, limit: int, reason: str):
+        if limit == self.limit:
+            return
+        change = {"host": self.host, "previous": self.limit, "limit": limit, "reason": reason}
+        self.limit = limit
+        self.changes.append(change)
+        if self.on_change is not None:
+            self.on_change(change)
+
+
+class HostConcurrency:
+    """Lazily created AimdLimiter per upstream host."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, tuple]] = None,
+        on_change: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.limits = HOST_LIMITS if limits is None else limits
+        self.on_change = on_change
+        self._limiters: Dict[str, AimdLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host: str) -> AimdLimiter:
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                initial, maximum = self.limits.get(host, DEFAULT_LIMITS)
+                limiter = AimdLimiter(host, initial, maximum, on_change=self._changed)
+                self._limiters[host] = limiter
+            return limiter
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {host: limiter.snapshot() for host, limiter in limiters.items()}
+
+    def _changed(self, change: Dict[str, Any]):
+        if self.on_change is not None:
+            self.on_change(change)
@@ -0,0 +1,49 @@
+from typing import Any, Dict, Optional
+
+from shared.repositories.file_repo import DataFileRepo
+
+
+class DataFileProbe(DataFileRepo):
+    """DataFileRepo whose get_* methods resolve the file with HEAD requests instead of downloading it.
+
+    Each call follows the same redirects as a real fetch and returns the url, final status,
+    whether the asset exists and its Content-Length. Probes share the connection factory and
+    per-host concurrency limits of the repo they were made from.
+    """
+
+    @classmethod
+    def from_repo(cls, repo: DataFileRepo) -> "DataFileProbe":
+        return cls(
+            connection_factory=repo.connection_factory,
+            metrics=repo.metrics,
+            concurrency=repo.concurrency,
+            max_retries=repo.max_retries,
+        )
+
+    def _get_file(self, hostname, path) -> Dict[str, Any]:
+        url = f"https://{hostname}{path}"
+        try:
+            status, reason, headers, _ = self._follow(hostname, path, "HEAD")
+        except Exception as e:
+            return {"url": url, "status": None, "available": None, "bytes": None, "error": f"{type(e).__name__}: {e}"}
+        return {
+            "url": url,
+            "status": status,
+            "available": availability(status),
+            "bytes": content_length(headers) if status == 200 else None,
+        }
+
+
+def availability(status: Optional[int]) -> Optional[bool]:
+    """True/False when the status settles whether the asset exists, None when HEAD can't tell."""
+    if status == 200:
+        return True
+    if status in (404, 410):
+        return False
+    # 403/405 from hosts that refuse HEAD, 5xx after retries: leave it to the real fetch
+    return None
+
+
+def content_length(headers) -> Optional[int]:
+    value = headers.get("Content-Length")
+    return int(value) if value and value.isdigit() else None
@@ -1,15 +1,83 @@
 import datetime
 
 import http.client
+import socket
 import ssl
+import time
+from typing import Optional
 from urllib.parse import urlparse
 from shared.enums.file_type import FileType
+from shared.metrics.events import SyncMetrics
+from shared.repositories.buffers import BufferPool, read_body
+from shared.repositories.concurrency import THROTTLE_STATUSES, HostConcurrency
 
 GITHUB_HOST_NAME = 'github.com'
+MAX_RETRIES = 3
+RETRY_BACKOFF_S = 0.5
+MAX_RETRY_AFTER_S = 30
+
+
+class TimedHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection that records how long DNS resolution and the TCP connect took."""
+
+    def connect(self):
+        self.timings = {}
+        start = time.perf_counter()
+        addresses = socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        self.timings["dns"] = resolved - start
+
+        error = None
+        for family, socktype, proto, _, address in addresses:
+            sock = socket.socket(family, socktype, proto)
+            try:
+                if self.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(self.timeout)
+                sock.connect(address)
+                break
+            except OSError as e:
+                error = e
+                sock.close()
+        else:
+            raise error or OSError(f"Could not resolve {self.host}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.timings["connect"] = time.perf_counter() - resolved
+
+
+class TimedHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPSConnection that records DNS, TCP connect and TLS handshake durations."""
+
+    def connect(self):
+        TimedHTTPConnection.connect(self)
+        start = time.perf_counter()
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host)
+        self.timings["tls"] = time.perf_counter() - start
+
+
+def https_connection(hostname):
+    return TimedHTTPSConnection(hostname, context=ssl.create_default_context())
+
 
 class DataFileRepo:
-    def __init__(self):
+    def __init__(
+        self,
+        connection_factory=https_connection,
+        metrics: Optional[SyncMetrics] = None,
+        concurrency: Optional[HostConcurrency] = None,
+        max_retries: int = MAX_RETRIES,
+        buffers: Optional[BufferPool] = None,
+    ):
         self.this_year = int(datetime.datetime.now().year)
+        # hostname -> http.client connection; swapped out to point the repo at local stand-ins
+        self.connection_factory = connection_factory
+        self.metrics = metrics or SyncMetrics()
+        # Per-host AIMD limits on in-flight requests, shared by every thread using this repo
+        self.concurrency = concurrency or HostConcurrency()
+        self.concurrency.on_change = self._concurrency_changed
+        self.max_retries = max_retries
+        # With a pool, bodies are read into recycled buffers and returned as memoryviews
+        self.buffers = buffers
 
     def get_play_by_play(self, year: int, file_extension: FileType = FileType.CSV):
         if file_extension not in FileType:
@@ -139,28 +207,29 @@ class DataFileRepo:
     def get_player_ids(self):
         return self._get_file("raw.githubusercontent.com", "/dynastyprocess/data/master/files/db_playerids.csv")
 
-    def _get_file(self, hostname, path, max_redirects=5):
-        print(f"Requesting data for host: {hostname} path: {path}")
+    def _get_file(self, hostname, path):
+        with self.metrics.timed("fetch"):
+            return self._request(hostname, path)
 
-        if max_redirects <= 0:
-            raise Exception("Too many redirects")
+    def _request(self, hostname, path):
+        status, reason, _, data = self._follow(hostname, path)
+        if status != 200:
+            raise Exception(f"Request failed with status: {status}, {reason}")
+        return data
 
-        conn = http.client.HTTPSConnection(hostname, context=ssl.create_default_context())
-        conn.request("GET", path)
+    def _follow(self, hostname, path, method="GET", max_redirects=5, attempt=0):
+        """Send method to the url, following redirects and retrying throttled responses.
 
-        response = conn.getresponse()
-        print("Status:", response.status, response.reason)
+        Returns (status, reason, headers, body) of the final response.
+        """
+        if max_redirects <= 0:
+            raise Exception("Too many redirects")
 
-        if response.status == 200:
-            data = response.read()
-            conn.close()
-            return data
-        
-        elif response.status == 302:
-            new_location = response.getheader('Location')
-            print(f"Redirecting to {new_location}")
+        status, reason, headers, data = self._exchange(hostname, path, method)
 
-            conn.close()
+        if status == 302:
+            new_location = headers.get('Location')
+            self.metrics.incr("redirects")
 
             # Parse the new location URL for hostname and path
             new_url = urlparse(new_location)
@@ -169,9 +238,63 @@ class DataFileRepo:
             if new_url.query:
                 new_path += '?' + new_url.query
 
-            # Recursively call _get_file with the new URL
-            return self._get_file(new_hostname, new_path, max_redirects - 1)
-        
-        else:
-            conn.close()
-            raise Exception(f"Request failed with status: {response.status}, {response.reason}")
\ No newline at end of file
+            # Recursively call _follow with the new URL
+            return self._follow(new_hostname, new_path, method, max_redirects - 1)
+
+        elif status in THROTTLE_STATUSES and attempt < self.max_retries:
+            self.metrics.incr("retries")
+            time.sleep(retry_delay(headers.get('Retry-After'), attempt))
+            return self._follow(hostname, path, method, max_redirects, attempt + 1)
+
+        return status, reason, headers, data
+
+    def _exchange(self, hostname, path, method="GET"):
+        """Send one request while holding a slot of the host's adaptive concurrency limit."""
+        limiter = self.concurrency.limiter(hostname)
+        limiter.acquire()
+        status, ttfb, nbytes = None, None, 0
+        try:
+            self.metrics.set("url", f"https://{hostname}{path}")
+            self.metrics.set("concurrency_limit", limiter.limit)
+            self.metrics.incr("requests")
+            conn = self.connection_factory(hostname)
+            try:
+                start = time.perf_counter()
+                conn.request(method, path)
+
+                response = conn.getresponse()
+                first_byte = time.perf_counter()
+                timings = getattr(conn, "timings", {})
+                for phase, seconds in timings.items():
+                    self.metrics.record_duration(phase, seconds)
+                # time to first byte, excluding the connection setup timed above
+                ttfb = first_byte - start - sum(timings.values())
+                self.metrics.record_duration("ttfb", ttfb)
+                self.metrics.set("http_status", response.status)
+
+                if self.buffers is not None and response.status == 200 and method == "GET":
+                    data = read_body(response, self.buffers)
+                else:
+                    data = response.read()
+                if response.status == 200 and method == "GET":
+                    self.metrics.record_duration("download", time.perf_counter() - first_byte)
+                    self.metrics.incr("bytes_in", len(data))
+                elif response.status in THROTTLE_STATUSES:
+                    self.metrics.incr("throttled")
+                status, nbytes = response.status, len(data)
+                return status, response.reason, response.headers, data
+            finally:
+                conn.close()
+        finally:
+            limiter.release(status, ttfb, nbytes)
+
+    def _concurrency_changed(self, change):
+        self.metrics.emit("concurrency_change", {"host": change["host"]}, {"concurrency_limit": change["limit"]},
+                          previous=change["previous"], reason=change["reason"])
+
+
+def retry_delay(retry_after, attempt):
+    """Seconds to wait before retrying a throttled request, honouring a Retry-After in seconds."""
+    if retry_after is not None and retry_after.isdigit():
+        return min(int(retry_after), MAX_RETRY_AFTER_S)
+    return RETRY_BACKOFF_S * 2 ** attempt
@@ -0,0 +1,221 @@
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterable, Optional
+
+from shared.repositories.buffers import BufferReader, iter_chunks
+from shared.repositories.multipart import multipart_etag
+
+METADATA_DIR = ".metadata"
+UPLOADS_DIR = ".uploads"
+# Files being written sit next to their key under this prefix until they are renamed into place
+PARTIAL_PREFIX = ".partial-"
+
+
+class LocalS3Error(Exception):
+    """Mirrors the shape of botocore's ClientError so callers can inspect error.response."""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.response = {"Error": {"Code": code, "Message": message}}
+
+
+class LocalS3Repo:
+    """Directory-backed storage backend implementing the subset of the boto3 S3 client used by
+    the sync. Each bucket is a subdirectory of root and each key a file beneath it.
+
+    Objects are written to a partial file next to their key and renamed into place, so a reader
+    or a crashed sync never sees half an object. Bodies returned by get_object are memory
+    mapped: reads are served from the page cache without a copy through a file buffer, and
+    getbuffer() exposes the whole object as a memoryview.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @property
+    def storage_id(self) -> str:
+        return f"local:{os.path.abspath(self.root)}"
+
+    def put_object(self, Bucket: str, Key: str, Body, Metadata: Optional[Dict[str, str]] = None, **kwargs):
+        md5 = hashlib.md5()
+
+        def chunks():
+            for chunk in _body_chunks(Body):
+                md5.update(chunk)
+                yield chunk
+
+        _write_atomic(self._path(Bucket, Key), chunks())
+        etag = f'"{md5.hexdigest()}"'
+        self._write_metadata(Bucket, Key, {"ETag": etag, "Metadata": Metadata or {}})
+        return {"ETag": etag}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, Metadata: Optional[Dict[str, str]] = None, **kwargs):
+        upload_id = os.urandom(8).hex()
+        os.makedirs(self._upload_path(upload_id))
+        with open(self._upload_path(upload_id, "upload.json"), "w") as f:
+            json.dump({"Bucket": Bucket, "Key": Key, "Metadata": Metadata or {}}, f)
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body, **kwargs):
+        if not os.path.isdir(self._upload_path(UploadId)):
+            raise LocalS3Error("NoSuchUpload", f"No such upload: {UploadId}")
+        md5 = hashlib.md5()
+        with open(self._upload_path(UploadId, str(PartNumber)), "wb") as f:
+            for chunk in _body_chunks(Body):
+                md5.update(chunk)
+                f.write(chunk)
+        return {"ETag": f'"{md5.hexdigest()}"'}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict, **kwargs):
+        with open(self._upload_path(UploadId, "upload.json")) as f:
+            upload = json.load(f)
+        part_md5s = []
+
+        def chunks():
+            for part in MultipartUpload["Parts"]:
+                md5 = hashlib.md5()
+                with open(self._upload_path(UploadId, str(part["PartNumber"])), "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        md5.update(chunk)
+                        yield chunk
+                part_md5s.append(md5.digest())
+
+        _write_atomic(self._path(Bucket, Key), chunks())
+        etag = multipart_etag(part_md5s)
+        self._write_metadata(Bucket, Key, {"ETag": etag, "Metadata": upload["Metadata"]})
+        shutil.rmtree(self._upload_path(UploadId))
+        return {"ETag": etag}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str, **kwargs):
+        shutil.rmtree(self._upload_path(UploadId), ignore_errors=True)
+        return {}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs):
+        response = self.head_object(Bucket=Bucket, Key=Key)
+        response["Body"] = MappedBody(self._path(Bucket, Key))
+        return response
+
+    def head_object(self, Bucket: str, Key: str, **kwargs):
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise LocalS3Error("404", f"Not Found: s3://{Bucket}/{Key}")
+        stat = os.stat(path)
+        metadata = self._read_metadata(Bucket, Key)
+        return {
+            "ContentLength": stat.st_size,
+            "ETag": metadata.get("ETag", ""),
+            "LastModified": datetime.datetime.fromtimestamp(stat.st_mtime, tz=datetime.timezone.utc),
+            "Metadata": metadata.get("Metadata", {}),
+        }
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs):
+        for path in (self._path(Bucket, Key), self._metadata_path(Bucket, Key)):
+            if os.path.isfile(path):
+                os.remove(path)
+        return {}
+
+    def list_objects_v2(
+        self, Bucket: str, Prefix: str = "", ContinuationToken: Optional[str] = None, MaxKeys: int = 1000, **kwargs
+    ):
+        bucket_root = os.path.join(self.root, Bucket)
+        # Only the directory holding the prefix is walked, e.g. play_by_play/ for play_by_play/20
+        keys = []
+        for dirpath, _, filenames in os.walk(os.path.join(bucket_root, *Prefix.split("/")[:-1])):
+            for filename in filenames:
+                if filename.startswith(PARTIAL_PREFIX):
+                    continue
+                key = os.path.relpath(os.path.join(dirpath, filename), bucket_root).replace(os.sep, "/")
+                if key.startswith(Prefix):
+                    keys.append(key)
+        keys.sort()
+        if ContinuationToken:
+            keys = [key for key in keys if key > ContinuationToken]
+
+        page = keys[:MaxKeys]
+        response = {"KeyCount": len(page), "IsTruncated": len(keys) > MaxKeys, "Contents": []}
+        for key in page:
+            head = self.head_object(Bucket=Bucket, Key=key)
+            response["Contents"].append(
+                {"Key": key, "Size": head["ContentLength"], "ETag": head["ETag"], "LastModified": head["LastModified"]}
+            )
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, *key.split("/"))
+
+    def _metadata_path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, METADATA_DIR, bucket, *key.split("/")) + ".json"
+
+    def _upload_path(self, upload_id: str, *name: str) -> str:
+        return os.path.join(self.root, UPLOADS_DIR, upload_id, *name)
+
+    def _write_metadata(self, bucket: str, key: str, metadata: Dict):
+        _write_atomic(self._metadata_path(bucket, key), [json.dumps(metadata).encode()])
+
+    def _read_metadata(self, bucket: str, key: str) -> Dict:
+        path = self._metadata_path(bucket, key)
+        if not os.path.isfile(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+
+class MappedBody(BufferReader):
+    """A get_object Body reading a local object through a read-only memory map."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            # Empty files cannot be mapped
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else None
+        super().__init__(self._map if self._map is not None else b"")
+
+    def read(self, size: int = -1) -> bytes:
+        """One copy out of the map; RawIOBase.read would go through a temporary bytearray."""
+        end = len(self._view) if size is None or size < 0 else self._position + size
+        data = bytes(self._view[self._position:end])
+        self._position += len(data)
+        return data
+
+    def getbuffer(self) -> memoryview:
+        """The whole object without a copy. Release views of it before closing the body."""
+        return self._view
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError:
+                    # A caller still holds a slice of getbuffer(); the map is unmapped with it
+                    pass
+        super().close()
+
+
+def _body_chunks(body) -> Iterable:
+    """A put_object Body (bytes-like or file-like) as chunks, without reading it whole."""
+    if hasattr(body, "read"):
+        return iter(lambda: body.read(1 << 20), b"")
+    return iter_chunks(body)
+
+
+def _write_atomic(path: str, chunks: Iterable):
+    """Write chunks to path through a partial file in the same directory and rename it into place."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, partial = tempfile.mkstemp(prefix=PARTIAL_PREFIX, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(partial, path)
+    except BaseException:
+        os.unlink(partial)
+        raise
@@ -0,0 +1,214 @@
+import hashlib
+import io
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from shared.config.env import UPLOAD_CONCURRENCY, UPLOAD_PART_SIZE_MB
+from shared.repositories.buffers import BufferReader, as_body
+
+# S3 rejects parts under 5 MiB (except the last) and uploads of more than 10,000 parts
+MIN_PART_SIZE = 5 << 20
+MAX_PARTS = 10000
+MAX_PART_RETRIES = 3
+PART_RETRY_BACKOFF_S = 0.5
+
+
+class MultipartUploader:
+    """put_object for an S3 client that splits large bodies into parts uploaded in parallel.
+
+    Bodies under threshold (default one part) go up as a single PUT. Larger ones use
+    create_multipart_upload / upload_part / complete_multipart_upload with up to concurrency
+    parts in flight, so one object can use several connections' worth of bandwidth. A failed
+    part is retried on its own with backoff; if a part still fails the upload is aborted so
+    no orphaned parts are left billed. Works with any client exposing those calls, including
+    LocalS3Repo and the benchmarks' InMemoryS3.
+    """
+
+    def __init__(
+        self,
+        s3_repo: Any,
+        part_size: int = UPLOAD_PART_SIZE_MB << 20,
+        concurrency: int = UPLOAD_CONCURRENCY,
+        threshold: Optional[int] = None,
+        max_retries: int = MAX_PART_RETRIES,
+    ):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        self.s3 = s3_repo
+        self.part_size = part_size
+        self.concurrency = concurrency
+        self.threshold = part_size if threshold is None else threshold
+        self.max_retries = max_retries
+
+    def put_object(self, Bucket: str, Key: str, Body, **kwargs) -> Dict[str, Any]:
+        """Upload Body (bytes or a buffer) to Key; the response has the ETag plus the parts and
+        part retries used.
+        """
+        if len(Body) < self.threshold:
+            response = self.s3.put_object(Bucket=Bucket, Key=Key, Body=as_body(Body), **kwargs)
+            return {"ETag": response.get("ETag"), "parts": 1, "retries": 0}
+        return self._multipart(Bucket, Key, Body, kwargs)
+
+    def part_size_for(self, size: int) -> int:
+        """The configured part size, grown if needed to stay within MAX_PARTS."""
+        return max(self.part_size, -(-size // MAX_PARTS))
+
+    def _multipart(self, bucket: str, key: str, data, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        part_size = self.part_size_for(len(data))
+        upload_id = self.s3.create_multipart_upload(Bucket=bucket, Key=key, **kwargs)["UploadId"]
+        view = memoryview(data)
+        offsets = range(0, len(data), part_size)
+
+        def upload(number: int) -> Dict[str, Any]:
+            start = offsets[number - 1]
+            # Parts are read straight out of data, never copied into their own bytes
+            return self.upload_part(bucket, key, upload_id, number, view[start:start + part_size])
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(offsets)))) as pool:
+                parts: List[Dict[str, Any]] = list(pool.map(upload, range(1, len(offsets) + 1)))
+            response = self.s3.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": [{"PartNumber": p["PartNumber"], "ETag": p["ETag"]} for p in parts]},
+            )
+        except Exception:
+            self.s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            raise
+        return {"ETag": response.get("ETag"), "parts": len(parts), "retries": sum(p["retries"] for p in parts)}
+
+    def upload_part(self, bucket: str, key: str, upload_id: str, number: int, part: memoryview) -> Dict[str, Any]:
+        """Upload one part, retrying it on its own with backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.s3.upload_part(
+                    Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=BufferReader(part)
+                )
+                return {"PartNumber": number, "ETag": response["ETag"], "retries": attempt}
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"Retrying part {number} of s3://{bucket}/{key} after {type(e).__name__}: {e}")
+                time.sleep(PART_RETRY_BACKOFF_S * 2 ** attempt)
+
+    def writer(self, Bucket: str, Key: str, **kwargs) -> "MultipartWriter":
+        """A binary file that streams what is written to it into Key."""
+        return MultipartWriter(self, Bucket, Key, **kwargs)
+
+
+class MultipartWriter(io.RawIOBase):
+    """Writable binary file that uploads to S3 as it is written, for bodies of unknown size.
+
+    Writes are buffered up to one part. Full parts upload in the background with at most the
+    uploader's concurrency in flight; a write that would exceed that waits for a part to
+    finish, so memory stays under (concurrency + 1) parts however large the object grows.
+    The object appears at Key on close(). Leaving a with block on an exception aborts the
+    upload instead. An object smaller than one part is sent as a single PUT. After close,
+    response holds the ETag, bytes, parts and part retries.
+    """
+
+    def __init__(self, uploader: MultipartUploader, Bucket: str, Key: str, **kwargs):
+        super().__init__()
+        self.uploader = uploader
+        self.bucket = Bucket
+        self.key = Key
+        self.kwargs = kwargs
+        self.response: Optional[Dict[str, Any]] = None
+        self._buffer = bytearray()
+        self._written = 0
+        self._upload_id: Optional[str] = None
+        self._parts: List[Future] = []
+        self._slots = threading.BoundedSemaphore(max(1, uploader.concurrency))
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        view = memoryview(data).cast("B")
+        self._buffer += view
+        self._written += len(view)
+        part_size = self.uploader.part_size
+        while len(self._buffer) >= part_size:
+            self._submit(bytes(self._buffer[:part_size]))
+            del self._buffer[:part_size]
+        return len(view)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                response = self.uploader.s3.put_object(
+                    Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer), **self.kwargs
+                )
+                self.response = {"ETag": response.get("ETag"), "bytes": self._written, "parts": 1, "retries": 0}
+            else:
+                if self._buffer:
+                    self._submit(bytes(self._buffer))
+                parts = [future.result() for future in self._parts]
+                response = self.uploader.s3.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": [{"PartNumber": p["PartNumber"], "ETag": p["ETag"]} for p in parts]},
+                )
+                self.response = {
+                    "ETag": response.get("ETag"),
+                    "bytes": self._written,
+                    "parts": len(parts),
+                    "retries": sum(p["retries"] for p in parts),
+                }
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self._shutdown()
+            self._buffer = bytearray()
+            super().close()
+
+    def abort(self):
+        """Drop everything written so far; nothing appears at Key."""
+        self._shutdown()
+        if self._upload_id is not None:
+            self.uploader.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+        self._buffer = bytearray()
+        super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def _submit(self, part: bytes):
+        if self._upload_id is None:
+            self._upload_id = self.uploader.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, **self.kwargs
+            )["UploadId"]
+            self._pool = ThreadPoolExecutor(max_workers=max(1, self.uploader.concurrency))
+        # Surface a failed part now rather than after the rest of the stream is read
+        for future in self._parts:
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+        self._slots.acquire()
+        number = len(self._parts) + 1
+        future = self._pool.submit(
+            self.uploader.upload_part, self.bucket, self.key, self._upload_id, number, memoryview(part)
+        )
+        future.add_done_callback(lambda _: self._slots.release())
+        self._parts.append(future)
+
+    def _shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def multipart_etag(part_md5s: List[bytes]) -> str:
+    """The ETag S3 gives a multipart object: md5 of the parts' binary md5s, dash, part count."""
+    return f'"{hashlib.md5(b"".join(part_md5s)).hexdigest()}-{len(part_md5s)}"'
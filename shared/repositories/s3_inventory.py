@@ -0,0 +1,179 @@
+import datetime
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from shared.config.env import LOCAL_CACHE_DIR
+from shared.repositories.storage import storage_id
+
+INVENTORY_CACHE_FILE = "s3_inventory.json"
+# A cached listing is reused by later invocations for this long (e.g. a self re-invoking init_s3)
+INVENTORY_MAX_AGE_S = 15 * 60
+LIST_WORKERS = 8
+
+# key -> (size, etag, last modified)
+InventoryEntry = Tuple[int, str, datetime.datetime]
+
+
+class S3Inventory:
+    """Index of key -> size, ETag and last-modified for the data lake's table prefixes.
+
+    Built from paginated list_objects_v2 calls, one listing per prefix run in parallel, so
+    existence, size and staleness checks are dict lookups instead of a HEAD request each. The
+    sync records its own uploads as it goes, which keeps the index current for the rest of the
+    run; the listing is cached on local disk and reused by invocations within max_age_s that
+    read the same store (storage_id) and bucket. A listed key the store no longer has, e.g.
+    after the bucket was recreated, is reported with missing(), which lists it again.
+    """
+
+    def __init__(
+        self,
+        s3_repo: Any,
+        s3_bucket: str,
+        prefixes: Iterable[str],
+        cache_path: Optional[str] = None,
+        max_age_s: float = INVENTORY_MAX_AGE_S,
+    ):
+        self.s3 = s3_repo
+        self.s3_bucket = s3_bucket
+        self.store = storage_id(s3_repo)
+        self.prefixes = sorted(set(prefixes))
+        self.cache_path = cache_path or os.path.join(LOCAL_CACHE_DIR, INVENTORY_CACHE_FILE)
+        self.max_age_s = max_age_s
+        self.objects: Dict[str, InventoryEntry] = {}
+        self.listed_at: Optional[float] = None
+        self.list_calls = 0
+        self._lock = threading.Lock()
+
+    def ensure(self) -> "S3Inventory":
+        """Load the index on first use: from the local cache if fresh, otherwise by listing."""
+        with self._lock:
+            if self.listed_at is None and not self._load_cache():
+                self._list()
+                self._save_cache()
+        return self
+
+    def refresh(self):
+        with self._lock:
+            self._list()
+            self._save_cache()
+
+    def invalidate(self):
+        """Drop the index and its cached listing; the next lookup lists the bucket again."""
+        with self._lock:
+            self.objects = {}
+            self.listed_at = None
+            try:
+                os.remove(self.cache_path)
+            except FileNotFoundError:
+                pass
+
+    def missing(self, key: str):
+        """key was listed, but the store answered not found: the listing is out of date. Drop the
+        cached listing and list again; threads reporting keys the new listing lacks don't relist.
+        """
+        with self._lock:
+            if key not in self.objects:
+                return
+            print(f"Listing is stale: {key} is gone; listing the bucket again")
+            self._list()
+            # A store that is only eventually consistent may still list it
+            self.objects.pop(key, None)
+            self._save_cache()
+
+    def get(self, key: str) -> Optional[InventoryEntry]:
+        self.ensure()
+        return self.objects.get(key)
+
+    def exists(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def size(self, key: str) -> Optional[int]:
+        entry = self.get(key)
+        return entry[0] if entry else None
+
+    def etag(self, key: str) -> Optional[str]:
+        entry = self.get(key)
+        return entry[1] if entry else None
+
+    def last_modified(self, key: str) -> Optional[datetime.datetime]:
+        entry = self.get(key)
+        return entry[2] if entry else None
+
+    def is_stale(self, key: str, max_age: datetime.timedelta, now: Optional[datetime.datetime] = None) -> bool:
+        """True when key is missing or was last written more than max_age ago."""
+        modified = self.last_modified(key)
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        return modified is None or now - modified > max_age
+
+    def record(self, key: str, size: int, etag: str):
+        """Note an object this process just wrote."""
+        with self._lock:
+            self.objects[key] = (size, etag, datetime.datetime.now(datetime.timezone.utc))
+
+    def forget(self, key: str):
+        with self._lock:
+            self.objects.pop(key, None)
+
+    def save(self):
+        with self._lock:
+            if self.listed_at is not None:
+                self._save_cache()
+
+    def _list(self):
+        def list_prefix(prefix: str) -> Tuple[List[Tuple[str, InventoryEntry]], int]:
+            entries, calls = [], 0
+            kwargs = {"Bucket": self.s3_bucket, "Prefix": prefix}
+            while True:
+                page = self.s3.list_objects_v2(**kwargs)
+                calls += 1
+                for item in page.get("Contents", []):
+                    entries.append((item["Key"], (item["Size"], item["ETag"], item["LastModified"])))
+                if not page.get("IsTruncated"):
+                    return entries, calls
+                kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(LIST_WORKERS, len(self.prefixes)))) as pool:
+            listings = list(pool.map(list_prefix, self.prefixes))
+        self.objects = {key: entry for entries, _ in listings for key, entry in entries}
+        self.list_calls += sum(calls for _, calls in listings)
+        self.listed_at = time.time()
+        print(f"Listed {len(self.objects)} objects under {len(self.prefixes)} prefixes "
+              f"in {sum(calls for _, calls in listings)} calls ({time.perf_counter() - start:.2f}s)")
+
+    def _load_cache(self) -> bool:
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if (
+            cached.get("store") != self.store
+            or cached.get("bucket") != self.s3_bucket
+            or not set(self.prefixes) <= set(cached.get("prefixes", ()))
+            or time.time() - cached.get("listed_at", 0) > self.max_age_s
+        ):
+            return False
+        self.objects = {
+            key: (size, etag, datetime.datetime.fromisoformat(modified))
+            for key, (size, etag, modified) in cached["objects"].items()
+        }
+        self.listed_at = cached["listed_at"]
+        return True
+
+    def _save_cache(self):
+        body = {
+            "store": self.store,
+            "bucket": self.s3_bucket,
+            "prefixes": self.prefixes,
+            "listed_at": self.listed_at,
+            "objects": {key: [size, etag, modified.isoformat()] for key, (size, etag, modified) in self.objects.items()},
+        }
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(body, f)
+        os.replace(tmp_path, self.cache_path)
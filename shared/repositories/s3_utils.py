@@ -0,0 +1,38 @@
+import codecs
+from typing import Iterator
+
+READ_CHUNK_SIZE = 1 << 20
+
+
+def is_not_found(error: Exception) -> bool:
+    """True if error is a boto3 (or LocalS3Repo) missing key/bucket error."""
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+def list_keys(s3_repo, s3_bucket: str, prefix: str) -> Iterator[str]:
+    kwargs = {"Bucket": s3_bucket, "Prefix": prefix}
+    while True:
+        page = s3_repo.list_objects_v2(**kwargs)
+        for item in page.get("Contents", []):
+            yield item["Key"]
+        if not page.get("IsTruncated"):
+            return
+        kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+
+def iter_lines(body, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[str]:
+    """Stream decoded text lines (line endings kept) from a file-like object body."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    while True:
+        chunk = body.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
@@ -0,0 +1,66 @@
+import os
+from typing import Any, Dict, Optional, Protocol
+
+STORAGE_BACKENDS = ("s3", "local")
+
+
+class StorageBackend(Protocol):
+    """The subset of the boto3 S3 client the sync, queries and exports call.
+
+    A boto3 S3 client is the S3 backend; LocalS3Repo implements the same calls over a directory
+    mirror of the lake. Responses have boto3's shape, and a missing key raises an error that
+    s3_utils.is_not_found recognizes.
+    """
+
+    def put_object(self, Bucket: str, Key: str, Body: Any, **kwargs) -> Dict[str, Any]: ...
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]: ...
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]: ...
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]: ...
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", **kwargs) -> Dict[str, Any]: ...
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]: ...
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: Any, **kwargs) -> Dict[str, Any]: ...
+
+    def complete_multipart_upload(
+        self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict, **kwargs
+    ) -> Dict[str, Any]: ...
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str, **kwargs) -> Dict[str, Any]: ...
+
+
+def open_storage(root: Optional[str] = None, backend: Optional[str] = None) -> StorageBackend:
+    """The lake's storage: a local mirror under root, or S3 when root is empty.
+
+    backend forces one or the other; "local" needs a root.
+    """
+    backend = backend or ("local" if root else "s3")
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"backend must be one of {STORAGE_BACKENDS}")
+    if backend == "local":
+        if not root:
+            raise ValueError("The local storage backend needs a root directory")
+        from shared.repositories.local_s3_repo import LocalS3Repo
+
+        return LocalS3Repo(root)
+    import boto3
+
+    return boto3.client("s3")
+
+
+def storage_id(s3_repo: Any) -> str:
+    """Which store s3_repo reads and writes, for caches of its contents: the mirror's root, the
+    S3 endpoint, or a backend's own storage_id.
+    """
+    own = getattr(s3_repo, "storage_id", None)
+    if own:
+        return own
+    meta = getattr(s3_repo, "meta", None)
+    if meta is not None and getattr(meta, "endpoint_url", None):
+        return f"s3:{meta.endpoint_url}"
+    # Unknown backends are only trusted within this process
+    return f"{type(s3_repo).__name__}:{os.getpid()}:{id(s3_repo):x}"
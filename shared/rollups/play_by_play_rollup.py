@@ -0,0 +1,142 @@
+import csv
+import io
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from shared.readers.projected_csv_reader import ProjectedCsvReader
+
+NULL_VALUES = ("", "NA")
+
+TEAM_WEEK_METRICS = ("epa", "wpa", "success", "air_yards", "pass", "rush")
+
+# role -> (id column, metrics) for the player-week rollup
+PLAYER_ROLES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "passing": ("passer_player_id", ("epa", "wpa", "success", "air_yards", "complete_pass")),
+    "rushing": ("rusher_player_id", ("epa", "wpa", "success", "yards_gained")),
+    "receiving": ("receiver_player_id", ("epa", "wpa", "success", "air_yards", "complete_pass")),
+}
+
+
+class GroupedSums:
+    """Running sums and non-null counts per group, stored column-wise in compact arrays.
+    Each distinct key is assigned a slot once; every metric owns one array('d') of sums
+    and one array('q') of counts indexed by that slot.
+    """
+
+    def __init__(self, metrics: Sequence[str]):
+        self.metrics = list(metrics)
+        self.slots: Dict[Tuple, int] = {}
+        self.keys: List[Tuple] = []
+        self.rows = array("q")
+        self.sums = [array("d") for _ in self.metrics]
+        self.counts = [array("q") for _ in self.metrics]
+
+    def slot(self, key: Tuple) -> int:
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = len(self.keys)
+            self.keys.append(key)
+            self.rows.append(0)
+            for sums, counts in zip(self.sums, self.counts):
+                sums.append(0.0)
+                counts.append(0)
+        return slot
+
+    def add(self, key: Tuple, values: Iterable[str]):
+        slot = self.slot(key)
+        self.rows[slot] += 1
+        for sums, counts, cell in zip(self.sums, self.counts, values):
+            if cell in NULL_VALUES:
+                continue
+            number = float(cell)
+            if math.isnan(number):
+                continue
+            sums[slot] += number
+            counts[slot] += 1
+
+    def header(self, key_columns: Sequence[str]) -> List[str]:
+        columns = list(key_columns) + ["plays"]
+        for metric in self.metrics:
+            columns += [f"{metric}_total", f"{metric}_count"]
+        return columns
+
+    def records(self) -> Iterator[List]:
+        for slot in sorted(range(len(self.keys)), key=self.keys.__getitem__):
+            record = list(self.keys[slot]) + [self.rows[slot]]
+            for sums, counts in zip(self.sums, self.counts):
+                record += [round(sums[slot], 6), counts[slot]]
+            yield record
+
+
+class PlayByPlayRollup:
+    """Single pass over a play_by_play season csv producing team-week and player-week totals.
+
+    Only offensive snaps (pass or rush) with a possession team are counted, matching how
+    nflfastR summaries define a play.
+    """
+
+    TEAM_KEY = ("season", "week", "team")
+
+    def __init__(self):
+        self.team_week = GroupedSums(TEAM_WEEK_METRICS)
+        self.player_week: Dict[str, GroupedSums] = {
+            role: GroupedSums(metrics) for role, (_, metrics) in PLAYER_ROLES.items()
+        }
+
+    def consume(self, body) -> "PlayByPlayRollup":
+        """Fold a play_by_play csv, read from the binary file-like object body, into the rollups."""
+        role_columns = []
+        for id_column, metrics in PLAYER_ROLES.values():
+            role_columns += [id_column] + list(metrics)
+        columns = ["season", "week", "posteam", "pass", "rush"] + list(TEAM_WEEK_METRICS) + role_columns
+        reader = ProjectedCsvReader(body, columns, "pbp")
+
+        team_metrics = slice(5, 5 + len(TEAM_WEEK_METRICS))
+        roles = []
+        position = team_metrics.stop
+        for role, (_, metrics) in PLAYER_ROLES.items():
+            roles.append((self.player_week[role], position, slice(position + 1, position + 1 + len(metrics))))
+            position += 1 + len(metrics)
+
+        for row in reader.rows():
+            season, week, team, is_pass, is_rush = row[:5]
+            if team in NULL_VALUES or (is_pass != "1" and is_rush != "1"):
+                continue
+            season, week = int(float(season)), int(float(week))
+            self.team_week.add((season, week, team), row[team_metrics])
+            for sums, id_position, metrics in roles:
+                player_id = row[id_position]
+                if player_id not in NULL_VALUES:
+                    sums.add((season, week, player_id), row[metrics])
+        return self
+
+    def team_week_csv(self) -> bytes:
+        return _to_csv(self.team_week.header(self.TEAM_KEY), self.team_week.records())
+
+    def player_week_csv(self) -> bytes:
+        """One row per (season, week, player_id) with each role's metrics prefixed by the role."""
+        header = ["season", "week", "player_id"]
+        for role, sums in self.player_week.items():
+            header += [f"{role}_{column}" for column in sums.header(())]
+
+        players: Dict[Tuple, List] = {}
+        width = 0
+        for sums in self.player_week.values():
+            role_width = 1 + 2 * len(sums.metrics)
+            for record in sums.records():
+                key = tuple(record[:3])
+                players.setdefault(key, [0] * width)
+                players[key] += record[3:]
+            width += role_width
+            for values in players.values():
+                values.extend([0] * (width - len(values)))
+        return _to_csv(header, (list(key) + values for key, values in sorted(players.items())))
+
+
+def _to_csv(header: List[str], records: Iterable[List]) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(records)
+    return out.getvalue().encode()
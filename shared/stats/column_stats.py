@@ -0,0 +1,217 @@
+import codecs
+import csv
+import hashlib
+import io
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+from shared.config.nfl_config import config_map
+from shared.config.schema import NUMERIC_TYPES, column_types
+from shared.repositories.buffers import iter_chunks
+
+NULL_VALUES = ("", "NA")
+BATCH_SIZE = 4096
+KEY_COLUMNS = ("season", "week")
+HLL_PRECISION = 12
+SKETCH_CACHE_SIZE = 1 << 16
+
+
+class HyperLogLog:
+    """Fixed size distinct count sketch (standard error ~1.04 / sqrt(2 ** precision))."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str):
+        hashed = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        register = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+
+    def update(self, values: Iterable[str]):
+        for value in values:
+            self.add(value)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+
+class ColumnStats:
+    def __init__(self, numeric: bool, distinct: bool):
+        self.numeric = numeric
+        self.nulls = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.sketch = HyperLogLog() if distinct else None
+        self._sketched = set()
+
+    def update(self, cells) -> None:
+        values = [cell for cell in cells if cell not in NULL_VALUES]
+        self.nulls += len(cells) - len(values)
+        if not values:
+            return
+        if self.numeric:
+            try:
+                numbers = list(map(float, values))
+            except ValueError:
+                numbers = [number for number in map(_to_number, values) if number is not None]
+            if numbers:
+                low, high = min(numbers), max(numbers)
+                self.min = low if self.min is None else min(self.min, low)
+                self.max = high if self.max is None else max(self.max, high)
+        if self.sketch is not None:
+            # Ids repeat heavily; hash each value once while the exact set stays small
+            unseen = set(values).difference(self._sketched)
+            self.sketch.update(unseen)
+            if len(self._sketched) < SKETCH_CACHE_SIZE:
+                self._sketched.update(unseen)
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"nulls": self.nulls}
+        if self.numeric:
+            stats["min"] = _compact(self.min)
+            stats["max"] = _compact(self.max)
+        if self.sketch is not None:
+            stats["distinct"] = self.sketch.estimate()
+        return stats
+
+
+class ObjectStatsCollector:
+    """Computes per-column stats for a lake csv from the byte chunks of the uploaded object.
+
+    object_stats() feeds it an object held in memory and StatsWriter one streamed up as it is
+    written. feed() accepts arbitrary chunks of the object; rows are parsed in batches and transposed,
+    so each column is folded with list-level operations. Numeric columns (by DDL) and key
+    columns get min/max, every tracked column gets a null count, and id columns get a
+    HyperLogLog distinct count.
+    """
+
+    def __init__(self, dataset: str):
+        self.dataset = dataset
+        self.types = column_types(dataset)
+        nfl_config = config_map.get(dataset)
+        self.key_columns = set(KEY_COLUMNS)
+        for constraint in nfl_config.constraints:
+            self.key_columns.update(column.strip() for column in constraint.split(","))
+        self.rows = 0
+        self.columns: Dict[str, ColumnStats] = {}
+        self._header: Optional[List[str]] = None
+        self._tracked: List[int] = []
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._pending = ""
+        self._batch: List[str] = []
+
+    def feed(self, chunk: bytes):
+        lines = (self._pending + self._decoder.decode(chunk)).split("\n")
+        self._pending = lines.pop()
+        for start in range(0, len(lines), BATCH_SIZE):
+            self._batch.extend(lines[start:start + BATCH_SIZE])
+            if len(self._batch) >= BATCH_SIZE:
+                self._flush()
+
+    def finish(self) -> Dict[str, Any]:
+        self._pending += self._decoder.decode(b"", final=True)
+        if self._pending:
+            self._batch.append(self._pending)
+            self._pending = ""
+        self._flush(final=True)
+        return {"rows": self.rows, "columns": {name: stats.to_dict() for name, stats in self.columns.items()}}
+
+    def _flush(self, final: bool = False):
+        # Only hand whole records to the csv parser; a quoted field may span lines
+        boundary = len(self._batch)
+        if not final:
+            parity = 0
+            for i, line in enumerate(self._batch):
+                parity ^= line.count('"') & 1
+                if not parity:
+                    boundary = i + 1
+        lines, self._batch = self._batch[:boundary], self._batch[boundary:]
+        if not lines:
+            return
+        rows = list(csv.reader(lines))
+        if self._header is None:
+            self._start(rows.pop(0))
+        rows = [row for row in rows if row]
+        if not rows:
+            return
+        self.rows += len(rows)
+        width = len(self._header)
+        columns = list(zip(*(row if len(row) == width else (row + [""] * width)[:width] for row in rows)))
+        for position in self._tracked:
+            self.columns[self._header[position]].update(columns[position])
+
+    def _start(self, header: List[str]):
+        self._header = header
+        for position, name in enumerate(header):
+            numeric = self.types.get(name) in NUMERIC_TYPES
+            is_id = name.endswith("_id") or name == "game_id"
+            is_key = name in self.key_columns
+            if not self.types or numeric or is_id or is_key:
+                self._tracked.append(position)
+                self.columns[name] = ColumnStats(
+                    numeric=numeric or (not self.types and name in KEY_COLUMNS),
+                    distinct=is_id or (is_key and not numeric),
+                )
+
+
+class StatsWriter(io.RawIOBase):
+    """Writable binary file that passes writes through to target, collecting the size, sha256
+    and column stats of what is written, for objects uploaded while they are built.
+    """
+
+    def __init__(self, target, dataset: str):
+        super().__init__()
+        self.target = target
+        self.collector = ObjectStatsCollector(dataset)
+        self.written = 0
+        self._sha256 = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        view = memoryview(data).cast("B")
+        self.target.write(view)
+        self._sha256.update(view)
+        self.collector.feed(view)
+        self.written += len(view)
+        return len(view)
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    def finish(self) -> Dict[str, Any]:
+        return self.collector.finish()
+
+
+def object_stats(dataset: str, data) -> Dict[str, Any]:
+    collector = ObjectStatsCollector(dataset)
+    # Fed in slices so the whole object is never decoded into one string
+    for chunk in iter_chunks(data):
+        collector.feed(chunk)
+    return collector.finish()
+
+
+def _to_number(cell: str) -> Optional[float]:
+    try:
+        number = float(cell)
+    except ValueError:
+        return None
+    return None if math.isnan(number) else number
+
+
+def _compact(number: Optional[float]):
+    if number is not None and number.is_integer():
+        return int(number)
+    return number
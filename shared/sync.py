@@ -1,289 +1,888 @@
 #!/usr/bin/python
-import datetime
-import gzip
-from io import BytesIO, StringIO
-from typing import Any
-
-from shared.config.env import  RAW_SCHEMA
+import functools
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from shared.config.env import  CPU_WORKERS, LOCAL_CACHE_DIR, NFL_DATA_BUCKET, RAW_SCHEMA, STORAGE_ROOT, SYNC_WORKERS
 from shared.enums.file_type import FileType
 from shared.config.nfl_config import config_map
+from shared.manifest.checkpoint import SyncCheckpoint, SyncUnit
+from shared.manifest.sync_manifest import SyncManifest
+from shared.metrics.events import SyncMetrics
+from shared.metrics.run_report import SLOWEST_UNITS, RunReport, load_run_report
+from shared.pipeline.transform_pool import TransformPool
+from shared.planning.dry_run import prune_missing, summarize_probes
+from shared.planning.freshness import FreshnessPolicy
+from shared.planning.season_calendar import (
+    is_season_closed,
+    nfl_in_season_year_for_today,
+    nfl_off_season_year_for_today,
+)
+from shared.repositories.file_probe import DataFileProbe
+from shared.repositories.buffers import BufferPool, gunzip_into
 from shared.repositories.file_repo import DataFileRepo
+from shared.repositories.multipart import MultipartUploader
+from shared.repositories.s3_inventory import S3Inventory
+from shared.repositories.s3_utils import is_not_found
+from shared.repositories.storage import STORAGE_BACKENDS, StorageBackend, open_storage
+
+# dataset -> (UpdateS3 method syncing one unit, first season or None for single-file datasets),
+# in the order a full sync runs them
+SYNC_UNITS: Dict[str, Tuple[str, Optional[int]]] = {
+    "pbp": ("insert_play_by_play_csv", 1999),
+    "players": ("insert_all_players_csvs", None),
+    "weekly": ("insert_weekly_csv", 1999),
+    "combine": ("insert_all_combine_csvs", None),
+    "injuries": ("insert_injury_csv", 2009),
+    "ngs_rushing": ("insert_ngs_rushing_csv", 2016),
+    "ngs_passing": ("insert_ngs_passing_csv", 2016),
+    "ngs_receiving": ("insert_ngs_receiving_csv", 2016),
+    "depth_chart": ("insert_depth_chart_csv", 2001),
+    "pfr_rushing": ("insert_pfr_rushing_csv", 2018),
+    "pfr_passing": ("insert_pfr_passing_csv", 2018),
+    "pfr_receiving": ("insert_pfr_receiving_csv", 2018),
+    "snaps": ("insert_snaps_csv", 2012),
+    "odds": ("insert_all_game_odds_csvs", None),
+    "ftn": ("insert_ftn_csv", 2022),
+    "weekly_rosters": ("insert_roster_csv", 2002),
+    "player_ids": ("insert_all_player_ids_csvs", None),
+}
+
+# dataset -> DataFileRepo method downloading one unit
+UNIT_FETCHERS: Dict[str, str] = {
+    "pbp": "get_play_by_play",
+    "players": "get_players",
+    "weekly": "get_weekly",
+    "combine": "get_combine",
+    "injuries": "get_injuries",
+    "ngs_rushing": "get_ngs_rushing",
+    "ngs_passing": "get_ngs_passing",
+    "ngs_receiving": "get_ngs_receiving",
+    "depth_chart": "get_depth_charts",
+    "pfr_rushing": "get_pfr_rushing",
+    "pfr_passing": "get_pfr_passing",
+    "pfr_receiving": "get_pfr_receiving",
+    "snaps": "get_snaps",
+    "odds": "get_game_odds",
+    "ftn": "get_ftn",
+    "weekly_rosters": "get_weekly_rosters",
+    "player_ids": "get_player_ids",
+}
+
+
+# Objects written alongside a dataset's own, e.g. the pbp rollups
+DERIVED_DATASETS = ("team_week_rollup", "player_week_rollup", "pbp_ftn", "player_week")
+
+# derived dataset -> (UpdateS3 method building one season of it from objects already in the lake,
+# the datasets it is built from, first season)
+DERIVED_UNITS: Dict[str, Tuple[str, Tuple[str, ...], int]] = {
+    "pbp_ftn": ("join_play_by_play_ftn", ("pbp", "ftn"), 2022),
+    "player_week": (
+        "materialize_player_week",
+        ("weekly", "snaps", "ngs_passing", "ngs_rushing", "ngs_receiving", "pfr_passing", "pfr_rushing",
+         "pfr_receiving", "player_ids"),
+        1999,
+    ),
+}
+
+
+def lake_prefixes() -> List[str]:
+    """The table prefixes the sync writes under, and the prefix of their reject objects."""
+    from shared.coercion.type_coercion import REJECTS_PREFIX
+
+    tables = [f"{config_map.get(dataset).table}/" for dataset in list(SYNC_UNITS) + list(DERIVED_DATASETS)]
+    return tables + [f"{REJECTS_PREFIX}/"]
+
+
+def unit_object_key(dataset: str, year: Optional[int] = None) -> str:
+    """S3 key of the object a unit writes: a csv, or whatever the dataset's current key is."""
+    nfl_config = config_map.get(dataset)
+    extension = os.path.splitext(nfl_config.current_s3_key)[1]
+    return f"{nfl_config.table}/{nfl_config.table if year is None else year}{extension}"
+
+
+def sync_unit(dataset):
+    """Record the decorated insert method as one metrics unit for dataset (and its year argument)."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            year = args[0] if args else kwargs.get("year")
+            # Buffers leased for the unit's files return to the pool when it ends
+            with self.metrics.unit(dataset, year), self.buffers.scope():
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
 
 class UpdateS3:
-    def __init__(self, s3_repo: Any, s3_bucket: str):
+    def __init__(
+        self,
+        s3_repo: StorageBackend,
+        s3_bucket: str,
+        file_repo: Optional[DataFileRepo] = None,
+        metrics: Optional[SyncMetrics] = None,
+        workers: int = SYNC_WORKERS,
+        freshness: Optional[FreshnessPolicy] = None,
+        uploader: Optional[MultipartUploader] = None,
+        inventory: Optional[S3Inventory] = None,
+        cpu_workers: int = CPU_WORKERS,
+    ):
         self.s3 = s3_repo
-        self.file_repo = DataFileRepo()
+        self.uploader = uploader or MultipartUploader(s3_repo)
+        self.workers = workers
+        self.freshness = freshness or FreshnessPolicy()
+        self.metrics = metrics or SyncMetrics()
+        self.file_repo = file_repo or DataFileRepo()
+        self.file_repo.metrics = self.metrics
+        self.buffers = BufferPool(metrics=self.metrics)
+        self.file_repo.buffers = self.buffers
+        # Casting, stats and rollups run here while fetches and uploads stay on the sync threads
+        self.transforms = TransformPool(cpu_workers, metrics=self.metrics)
+        # The published player id crosswalk, opened once per run by the first unit that needs it
+        self._crosswalk: Optional[Any] = None
+        self._crosswalk_lock = threading.Lock()
         self.in_season_year = nfl_in_season_year_for_today()
         self.off_season_year = nfl_off_season_year_for_today()
         self.s3_bucket = s3_bucket
-
-    def initialize_s3(self):
+        self.manifest = SyncManifest.load(s3_repo, s3_bucket)
+        # Listed on first use; answers existence/ETag checks without a HEAD per object
+        self.inventory = inventory or S3Inventory(s3_repo, s3_bucket, lake_prefixes())
+
+    def initialize_s3(
+        self, prune: bool = True, resume: bool = True, deadline: Optional[float] = None, reseal: bool = False
+    ) -> Dict[str, Any]:
+        """Backfill every season. With resume, progress is checkpointed to S3 after each unit and a
+        later call carries on with the units that are not done yet; stop starting units once
+        time.monotonic() passes deadline. Sealed seasons are only verified in place unless
+        reseal is set, which fetches and seals them again against a fresh bucket listing.
+        """
         print("initializing s3..")
-        self.insert_all_play_by_play_csvs()
-        self.insert_all_players_csvs()
-        self.insert_all_weekly_csvs()
-        self.insert_all_combine_csvs()
-        self.insert_all_injury_csvs()
-        self.insert_all_ngs_rushing_csvs()
-        self.insert_all_ngs_passing_csvs()
-        self.insert_all_ngs_receiving_csvs()
-        self.insert_all_depth_chart_csvs()
-        self.insert_all_pfr_rushing_csvs()
-        self.insert_all_pfr_passing_csvs()
-        self.insert_all_pfr_receiving_csvs()
-        self.insert_all_snaps_csvs()
-        self.insert_all_game_odds_csvs()
-        self.insert_all_ftn_csvs()
-        self.insert_all_roster_csvs()
-        self.insert_all_player_ids_csvs()
-
-    def update_s3(self):
+        if reseal:
+            self.inventory.invalidate()
+        units = self.initialize_plan()
+        if not resume:
+            return self.run(units, "init_s3", prune=prune, deadline=deadline, skip_sealed=not reseal)
+        checkpoint = SyncCheckpoint.load(self.s3, self.s3_bucket, "init_s3")
+        remaining = checkpoint.remaining(units)
+        print(f"resuming init_s3: {len(units) - len(remaining)} of {len(units)} units already done")
+        checkpoint.start(units)
+        # Missing assets are found and marked done on the first invocation; later ones skip the HEADs
+        prune = prune and checkpoint.invocations == 1
+        report = self.run(
+            remaining, "init_s3", prune=prune, checkpoint=checkpoint, deadline=deadline, skip_sealed=not reseal
+        )
+        if not report["checkpoint"]["remaining"]:
+            checkpoint.clear()
+        return report
+
+    def update_s3(self, prune: bool = False, force: bool = False) -> Dict[str, Any]:
+        """Refresh the current season. Units whose refresh schedule shows they cannot have changed
+        since they were last checked are skipped unless force is set.
+        """
         print("updating s3 data..")
-        self.insert_play_by_play_csv(self.in_season_year)
-        self.insert_all_players_csvs()
-        self.insert_weekly_csv(self.in_season_year)
-        self.insert_all_combine_csvs()
-        self.insert_injury_csv(self.in_season_year)
-        self.insert_ngs_rushing_csv(self.in_season_year)
-        self.insert_ngs_passing_csv(self.in_season_year)
-        self.insert_ngs_receiving_csv(self.in_season_year)
-        self.insert_depth_chart_csv(self.in_season_year)
-        self.insert_pfr_rushing_csv(self.in_season_year)
-        self.insert_pfr_passing_csv(self.in_season_year)
-        self.insert_pfr_receiving_csv(self.in_season_year)
-        self.insert_snaps_csv(self.in_season_year)
-        self.insert_all_game_odds_csvs()
-        self.insert_ftn_csv(self.in_season_year)
-        self.insert_roster_csv(self.off_season_year)
-        self.insert_all_player_ids_csvs()
+        return self.run(self.update_plan(), "update_s3", prune=prune, skip_fresh=not force)
+
+    def dry_run(self, method: str = "update_s3", force: bool = False) -> Dict[str, Any]:
+        """Resolve every planned url with HEAD requests and estimate the run without moving any data."""
+        units = self.initialize_plan() if method == "init_s3" else self.update_plan()
+        fresh, sealed = [], []
+        if method == "update_s3" and not force:
+            units, fresh = self.due_units(units)
+        if method == "init_s3" and not force:
+            units, sealed = self.verify_sealed(units)
+        print(f"planning {method}: probing {len(units)} units..")
+        previous = load_run_report(self.s3, self.s3_bucket)
+        mb_per_s = previous["totals"]["mb_per_s"] if previous and previous["totals"]["bytes_in"] else None
+        plan = summarize_probes(method, self.probe(units), mb_per_s)
+        plan["fresh"] = [{"dataset": dataset, "year": year, **decision} for (dataset, year), decision in fresh]
+        plan["sealed"] = len(sealed)
+        return plan
+
+    def derived_plan(self, units: List[SyncUnit]) -> List[SyncUnit]:
+        """The derived units built from any season in units. Each only rebuilds when its sources changed."""
+        plan = []
+        for derived, (_, sources, first_year) in DERIVED_UNITS.items():
+            years = {year for dataset, year in units if dataset in sources and year is not None and year >= first_year}
+            # Single-file sources (player_ids) feed every season already in the plan
+            if any(dataset in sources and year is None for dataset, year in units):
+                years |= {year for _, year in units if year is not None and year >= first_year}
+            plan += [(derived, year) for year in sorted(years)]
+        return plan
+
+    def due_units(self, units: List[SyncUnit]):
+        """Split units into (due, fresh) by their dataset's refresh schedule and last check."""
+        last_checked = {unit: self.manifest.checked_at(unit_object_key(*unit)) for unit in units}
+        return self.freshness.split(units, last_checked)
+
+    def verify_sealed(self, units: List[SyncUnit]):
+        """Split units into (to_sync, sealed): sealed units' objects are checked against the ETag and
+        size recorded when they were sealed, from the bucket inventory, without downloading them.
+        """
+        to_sync, sealed = [], []
+        for unit in units:
+            key = unit_object_key(*unit)
+            seal = self.manifest.sealed(key)
+            if seal is None:
+                to_sync.append(unit)
+                continue
+            listed = self.inventory.get(key)
+            if listed is not None and listed[1] == seal["etag"] and listed[0] == self.manifest.get(key)["bytes"]:
+                sealed.append(unit)
+                continue
+            # The object no longer matches its manifest entry, so the entry can't vouch for an upload
+            print(f"Sealed object {key} is missing or changed; syncing it again")
+            self.manifest.forget(key)
+            to_sync.append(unit)
+        return to_sync, sealed
+
+    def seal(self, unit: SyncUnit):
+        """Seal a synced unit of a closed season, recording its object's current ETag."""
+        key = unit_object_key(*unit)
+        if self.manifest.get(key) is None:
+            return
+        etag = self.inventory.etag(key)
+        if etag is None:
+            etag = self.s3.head_object(Bucket=self.s3_bucket, Key=key)["ETag"]
+        self.manifest.seal(key, etag)
+
+    def probe(self, units: List[SyncUnit]) -> List[Dict[str, Any]]:
+        """HEAD each unit's source file (following redirects) for its availability and size."""
+        probe = DataFileProbe.from_repo(self.file_repo)
+
+        def resolve(unit: SyncUnit) -> Dict[str, Any]:
+            dataset, year = unit
+            fetch = getattr(probe, UNIT_FETCHERS[dataset])
+            return {"dataset": dataset, "year": year, **(fetch() if year is None else fetch(year))}
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            return list(pool.map(resolve, units))
+
+    def redrive(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Re-run only the units that failed in run_id (default: the latest run)."""
+        previous = load_run_report(self.s3, self.s3_bucket, run_id)
+        if previous is None:
+            raise ValueError(f"No run report found for {run_id or 'the latest run'}")
+        print(f"re-driving {len(previous['failed'])} failed units of run {previous['run_id']}..")
+        units = [(unit["dataset"], unit["year"]) for unit in previous["failed"]]
+        return self.run(units, "redrive")
+
+    def initialize_plan(self) -> List[SyncUnit]:
+        units = []
+        for dataset, (_, first_year) in SYNC_UNITS.items():
+            if first_year is None:
+                units.append((dataset, None))
+            else:
+                units += [(dataset, year) for year in range(first_year, self.in_season_year + 1)]
+        return units
+
+    def update_plan(self) -> List[SyncUnit]:
+        units = []
+        for dataset, (_, first_year) in SYNC_UNITS.items():
+            if first_year is None:
+                units.append((dataset, None))
+            elif dataset == "weekly_rosters":
+                units.append((dataset, self.off_season_year))
+            else:
+                units.append((dataset, self.in_season_year))
+        return units
+
+    def run(
+        self,
+        units: Iterable[SyncUnit],
+        method: str,
+        slowest: int = SLOWEST_UNITS,
+        prune: bool = False,
+        checkpoint: Optional[SyncCheckpoint] = None,
+        deadline: Optional[float] = None,
+        skip_fresh: bool = False,
+        skip_sealed: bool = False,
+    ) -> Dict[str, Any]:
+        """Sync every unit, carrying on past failures, and return the persisted run report.
+
+        Units run on a pool of workers; how many requests actually reach each upstream host at
+        once is governed by the file repo's per-host adaptive limits. With prune, units whose
+        source file a HEAD request shows to be missing are dropped before anything is fetched
+        and reported as missing. Each finished unit is recorded in checkpoint, and units not
+        started by deadline (a time.monotonic() value) are reported as deferred. With skip_fresh,
+        units that cannot have changed since they were last checked are reported as fresh. With
+        skip_sealed, units of closed seasons whose sealed objects are intact are reported as
+        sealed; units of closed seasons that do sync are sealed afterwards.
+        """
+        report = RunReport(method, slowest)
+        units = list(units)
+        derived = self.derived_plan(units)
+        # Units settled before anything runs are checkpointed together, in one save
+        settled = 0
+        if skip_sealed:
+            units, sealed = self.verify_sealed(list(units))
+            for dataset, year in sealed:
+                report.add_sealed(dataset, year)
+                if checkpoint is not None:
+                    checkpoint.mark((dataset, year), "sealed", save=False)
+                    settled += 1
+            if sealed:
+                print(f"verified {len(sealed)} sealed units in place")
+        if skip_fresh:
+            units, fresh = self.due_units(list(units))
+            for (dataset, year), decision in fresh:
+                report.add_fresh(dataset, year, decision["schedule"])
+            if fresh:
+                print(f"skipped {len(fresh)} units not due by their refresh schedule")
+        if prune:
+            units = list(units)
+            units, missing = prune_missing(units, self.probe(units))
+            for dataset, year in missing:
+                report.add_missing(dataset, year)
+                if checkpoint is not None:
+                    checkpoint.mark((dataset, year), "missing", save=False)
+                    settled += 1
+            if missing:
+                print(f"pruned {len(missing)} missing assets from the plan")
+        if settled:
+            checkpoint.save()
+        # Memory profiles are process wide, so profiled runs stay sequential and in this process
+        workers = 1 if self.metrics.profiler is not None else self.workers
+        if self.metrics.profiler is None and units:
+            self.transforms.start()
+        started = itertools.count()
+        self.metrics.add_sink(report)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                list(pool.map(lambda unit: self._run_unit(unit, report, checkpoint, deadline, started), units))
+            # Derived units read their sources from the lake, so they wait until every source is written.
+            # They are planned from this invocation's sources and never checkpointed, so they run
+            # past the deadline: a resumed run would not plan them again once their sources are done
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                list(pool.map(lambda unit: self._run_unit(unit, report), derived))
+        finally:
+            self.transforms.close()
+            self._close_crosswalk()
+            self.metrics.remove_sink(report)
+            self.manifest.save()
+            self.inventory.save()
+        result = report.finish(
+            concurrency=self.file_repo.concurrency.snapshot(),
+            checkpoint=checkpoint.summary() if checkpoint is not None else None,
+        )
+        report.save(self.s3, self.s3_bucket)
+        return result
+
+    def _run_unit(
+        self,
+        unit: SyncUnit,
+        report: RunReport,
+        checkpoint: Optional[SyncCheckpoint] = None,
+        deadline: Optional[float] = None,
+        started: Optional[Iterator[int]] = None,
+    ):
+        dataset, year = unit
+        # The first unit of a run always starts, so every invocation makes progress
+        first = started is None or next(started) == 0
+        if deadline is not None and not first and time.monotonic() > deadline:
+            # Out of time for this invocation; the checkpoint still lists it for the next one
+            report.add_deferred(dataset, year)
+            return
+        status = "ok"
+        try:
+            self.sync(dataset, year)
+        except Exception as e:
+            # The unit's metrics event counts the failure; keep going with the rest
+            self.metrics.log(
+                "sync_unit_failed", f"Sync of {dataset} {year} failed: {type(e).__name__}: {e}",
+                dataset=dataset, year=year, error_type=type(e).__name__, error=str(e), traceback=traceback.format_exc(),
+            )
+            status = "failed"
+        if status == "ok" and year is not None and is_season_closed(year):
+            try:
+                self.seal(unit)
+            except Exception as e:
+                # Unsealed units are simply synced again next time
+                self.metrics.log(
+                    "seal_failed", f"Could not seal {dataset} {year}: {type(e).__name__}: {e}",
+                    dataset=dataset, year=year, error_type=type(e).__name__, error=str(e),
+                )
+        if checkpoint is not None:
+            # The unit's manifest entry must be durable before the checkpoint calls it done
+            self.manifest.save()
+            checkpoint.mark(unit, status)
+
+    def sync(self, dataset: str, year: Optional[int] = None):
+        method = DERIVED_UNITS[dataset][0] if dataset in DERIVED_UNITS else SYNC_UNITS[dataset][0]
+        if year is None:
+            getattr(self, method)()
+        else:
+            getattr(self, method)(year)
+
+    def _put_csv(self, dataset, key, data, season=None, inputs: Optional[str] = None) -> bool:
+        """Cast data to the table's DDL types and upload it to key, unless the manifest shows it was
+        already synced from this source; return whether it was written. inputs is the fingerprint
+        of the objects a derived dataset was built from.
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        # The manifest only vouches for the object while the bucket still holds it at that size
+        if self.manifest.unchanged(key, data, sha256) and self.inventory.size(key) == self.manifest.get(key)["bytes"]:
+            self.manifest.touch(key, inputs=inputs)
+            self.metrics.incr("unchanged")
+            return False
+        from shared.coercion.type_coercion import reject_key
+        from shared.pipeline.transforms import cast_and_describe
+
+        source_bytes, rejected = len(data), 0
+        coerced, stats = self._transform(cast_and_describe, data, dataset)
+        if coerced is not None:
+            self._put_rejects(key, coerced.rejects)
+            self.metrics.incr("cells_nulled", coerced.nulled)
+            self.metrics.incr("cells_recast", coerced.recast)
+            if coerced.data is not None:
+                data = coerced.data
+            rejected = coerced.rejected
+            if rejected:
+                self.metrics.incr("rows_rejected", rejected)
+                self.metrics.log(
+                    "rows_rejected", f"Rejected {rejected} of {coerced.rows} rows of {key}; see {reject_key(key)}",
+                    key=key, rejects_key=reject_key(key), rows_rejected=rejected, rows=coerced.rows,
+                )
+        self._upload(
+            dataset, key, data, stats, season,
+            source_bytes=source_bytes, source_sha256=sha256, rejected=rejected, inputs=inputs,
+        )
+        return True
+
+    def _transform(self, transform, data, *args) -> tuple:
+        """Run a CPU-bound transform from shared.pipeline.transforms on the transform pool, or inline
+        when the pool is not running, and record its phases on the unit.
+        """
+        if not self.transforms.started:
+            *result, _ = transform(data, *args, self.metrics.timed)
+            return tuple(result)
+        *result, durations = self.transforms.run(transform, data, *args)
+        for phase, seconds in durations.items():
+            self.metrics.record_duration(phase, seconds)
+        return tuple(result)
+
+    def _upload(self, dataset, key, data, stats: Dict[str, Any], season=None, **entry):
+        """Upload data to key and record it in the inventory, metrics and manifest."""
+        with self.metrics.timed("upload"):
+            upload = self.uploader.put_object(Bucket=self.s3_bucket, Key=key, Body=data)
+        self.inventory.record(key, len(data), upload["ETag"])
+        self.metrics.incr("upload_parts", upload["parts"])
+        if upload["retries"]:
+            self.metrics.incr("upload_retries", upload["retries"])
+        self.metrics.incr("bytes_out", len(data))
+        self.metrics.incr("objects")
+        self.manifest.record(key, dataset, data, stats, season, **entry)
+
+    def _upload_stream(self, dataset, key, write, *args, season=None, **entry):
+        """Upload what write(*args, target) writes to the binary file target, in parts as it is
+        written, and record it like _upload. For derived csvs that have no DDL types to cast to.
+        """
+        from shared.stats.column_stats import StatsWriter
+
+        with self.uploader.writer(Bucket=self.s3_bucket, Key=key) as upload:
+            target = StatsWriter(upload, dataset)
+            write(*args, target)
+        stats = target.finish()
+        self.inventory.record(key, target.written, upload.response["ETag"])
+        self.metrics.incr("upload_parts", upload.response["parts"])
+        if upload.response["retries"]:
+            self.metrics.incr("upload_retries", upload.response["retries"])
+        self.metrics.incr("bytes_out", target.written)
+        self.metrics.incr("objects")
+        self.manifest.record(key, dataset, None, stats, season, sha256=target.sha256, size=target.written, **entry)
+
+    def _put_rejects(self, key: str, rejects: Optional[bytes]):
+        """Write the rows of key that could not be cast, or clear the previous sync's rejects."""
+        from shared.coercion.type_coercion import reject_key
+
+        rejects_key = reject_key(key)
+        if rejects:
+            upload = self.uploader.put_object(Bucket=self.s3_bucket, Key=rejects_key, Body=rejects)
+            self.inventory.record(rejects_key, len(rejects), upload["ETag"])
+        elif self.inventory.exists(rejects_key):
+            self.s3.delete_object(Bucket=self.s3_bucket, Key=rejects_key)
+            self.inventory.forget(rejects_key)
+
+    def _gunzip(self, data) -> memoryview:
+        with self.metrics.timed("decompress"):
+            return gunzip_into(data, self.buffers)
 
     def run_transform_stored_proc(self):
         self.sql_loader.run_stored_proc("transform_raw_data()")
 
+    @sync_unit("pbp")
     def insert_play_by_play_csv(self, year):
         nfl_config = config_map.get("pbp")
         table_name = nfl_config.table
-        print(f"Extracting all play by play data from NflVerse for year: {year}")
         response = self.file_repo.get_play_by_play(year)
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{year}.csv", Body=response)
+        key = f"{table_name}/{year}.csv"
+        self._put_csv("pbp", key, response, year)
+        self.insert_play_by_play_rollups(year, response, self._derived_inputs([key]))
+
+    def insert_play_by_play_rollups(self, year, play_by_play_csv, inputs: str):
+        """Write the season's team-week and player-week rollups, unless both were already built
+        from this play_by_play (inputs) and are still in the lake.
+        """
+        from shared.pipeline.transforms import play_by_play_rollups
+
+        keys = {
+            dataset: f"{config_map.get(dataset).table}/{year}.csv"
+            for dataset in ("team_week_rollup", "player_week_rollup")
+        }
+        stale = [dataset for dataset, key in keys.items() if not self._derived_unchanged(key, inputs)]
+        if not stale:
+            return
+        rollups = dict(zip(keys, self._transform(play_by_play_rollups, play_by_play_csv)))
+        for dataset in stale:
+            self._put_csv(dataset, keys[dataset], rollups[dataset], year, inputs=inputs)
 
     def insert_all_play_by_play_csvs(self):
         for year in range(1999, self.in_season_year + 1):
             self.insert_play_by_play_csv(year)
 
+    @sync_unit("players")
     def insert_all_players_csvs(self):
         nfl_config = config_map.get("players")
         table_name = nfl_config.table
-        print("Extracting all players data from NflVerse")
         response = self.file_repo.get_players()
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{table_name}.csv", Body=response)
+        self._put_csv("players", f"{table_name}/{table_name}.csv", response)
 
+    @sync_unit("weekly")
     def insert_weekly_csv(self, year):
         nfl_config = config_map.get("weekly")
         table_name = nfl_config.table
         response = self.file_repo.get_weekly(year)
-        self.s3.put_object(
-            Bucket=self.s3_bucket,
-            Key=f"{table_name}/{year}.csv",
-            Body=response,
-        )
+        self._put_csv("weekly", f"{table_name}/{year}.csv", response, year)
 
     def insert_all_weekly_csvs(self):
         for year in range(1999, self.in_season_year + 1):
             self.insert_weekly_csv(year)
 
+    @sync_unit("injuries")
     def insert_injury_csv(self, year):
         nfl_config = config_map.get("injuries")
         table_name = nfl_config.table
         response = self.file_repo.get_injuries(year)
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{year}.csv", Body=response)
+        self._put_csv("injuries", f"{table_name}/{year}.csv", response, year)
 
     def insert_all_injury_csvs(self):
         for year in range(2009, self.in_season_year + 1):
             self.insert_injury_csv(year)
 
+    @sync_unit("combine")
     def insert_all_combine_csvs(self):
         nfl_config = config_map.get("combine")
         table_name = nfl_config.table
         response = self.file_repo.get_combine()
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{table_name}.csv", Body=response)
+        self._put_csv("combine", f"{table_name}/{table_name}.csv", response)
 
+    @sync_unit("ngs_rushing")
     def insert_ngs_rushing_csv(self, year):
         nfl_config = config_map.get("ngs_rushing")
         table_name = nfl_config.table
         response = self.file_repo.get_ngs_rushing(year)
-        with BytesIO(response) as gzip_buffer:
-            with gzip.GzipFile(fileobj=gzip_buffer, mode="rb") as f:
-                decompressed_data = f.read()
-        self.s3.put_object(
-            Bucket=self.s3_bucket,
-            Key=f"{table_name}/{year}.csv",
-            Body=decompressed_data,
-        )
+        decompressed_data = self._gunzip(response)
+        self._put_csv("ngs_rushing", f"{table_name}/{year}.csv", decompressed_data, year)
 
     def insert_all_ngs_rushing_csvs(self):
         for year in range(2016, self.in_season_year + 1):
             self.insert_ngs_rushing_csv(year)
 
+    @sync_unit("ngs_passing")
     def insert_ngs_passing_csv(self, year):
         nfl_config = config_map.get("ngs_passing")
         table_name = nfl_config.table
         response = self.file_repo.get_ngs_passing(year)
-        with BytesIO(response) as gzip_buffer:
-            with gzip.GzipFile(fileobj=gzip_buffer, mode="rb") as f:
-                decompressed_data = f.read()
-        self.s3.put_object(
-            Bucket=self.s3_bucket,
-            Key=f"{table_name}/{year}.csv",
-            Body=decompressed_data,
-        )
+        decompressed_data = self._gunzip(response)
+        self._put_csv("ngs_passing", f"{table_name}/{year}.csv", decompressed_data, year)
 
     def insert_all_ngs_passing_csvs(self):
         for year in range(2016, self.in_season_year + 1):
             self.insert_ngs_passing_csv(year)
 
+    @sync_unit("ngs_receiving")
     def insert_ngs_receiving_csv(self, year):
         nfl_config = config_map.get("ngs_receiving")
         table_name = nfl_config.table
         response = self.file_repo.get_ngs_receiving(year, FileType.GZIPPED)
-        with BytesIO(response) as gzip_buffer:
-            with gzip.GzipFile(fileobj=gzip_buffer, mode="rb") as f:
-                decompressed_data = f.read()
-        self.s3.put_object(
-            Bucket=self.s3_bucket,
-            Key=f"{table_name}/{year}.csv",
-            Body=decompressed_data,
-        )
+        decompressed_data = self._gunzip(response)
+        self._put_csv("ngs_receiving", f"{table_name}/{year}.csv", decompressed_data, year)
 
     def insert_all_ngs_receiving_csvs(self):
         for year in range(2016, self.in_season_year + 1):
             self.insert_ngs_receiving_csv(year)
 
+    @sync_unit("depth_chart")
     def insert_depth_chart_csv(self, year):
         nfl_config = config_map.get("depth_chart")
         table_name = nfl_config.table
         response = self.file_repo.get_depth_charts(year)
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{year}.csv", Body=response)
+        self._put_csv("depth_chart", f"{table_name}/{year}.csv", response, year)
 
     def insert_all_depth_chart_csvs(self):
         for year in range(2001, self.in_season_year + 1):
             self.insert_depth_chart_csv(year)
 
+    @sync_unit("pfr_receiving")
     def insert_pfr_receiving_csv(self, year):
         nfl_config = config_map.get("pfr_receiving")
         table_name = nfl_config.table
         response = self.file_repo.get_pfr_receiving(year)
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{year}.csv", Body=response)
+        self._put_csv("pfr_receiving", f"{table_name}/{year}.csv", response, year)
 
     def insert_all_pfr_receiving_csvs(self):
         for year in range(2018, self.in_season_year + 1):
             self.insert_pfr_receiving_csv(year)
 
+    @sync_unit("pfr_rushing")
     def insert_pfr_rushing_csv(self, year):
         nfl_config = config_map.get("pfr_rushing")
         table_name = nfl_config.table
         response = self.file_repo.get_pfr_rushing(year)
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{year}.csv", Body=response)
+        self._put_csv("pfr_rushing", f"{table_name}/{year}.csv", response, year)
 
     def insert_all_pfr_rushing_csvs(self):
         for year in range(2018, self.in_season_year + 1):
             self.insert_pfr_rushing_csv(year)
 
+    @sync_unit("pfr_passing")
     def insert_pfr_passing_csv(self, year):
         nfl_config = config_map.get("pfr_passing")
         table_name = nfl_config.table
         response = self.file_repo.get_pfr_passing(year)
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{year}.csv", Body=response)
+        self._put_csv("pfr_passing", f"{table_name}/{year}.csv", response, year)
 
     def insert_all_pfr_passing_csvs(self):
         for year in range(2018, self.in_season_year + 1):
             self.insert_pfr_passing_csv(year)
 
+    @sync_unit("snaps")
     def insert_snaps_csv(self, year):
         nfl_config = config_map.get("snaps")
         table_name = nfl_config.table
         response = self.file_repo.get_snaps(year)
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{year}.csv", Body=response)
+        self._put_csv("snaps", f"{table_name}/{year}.csv", response, year)
 
     def insert_all_snaps_csvs(self):
         for year in range(2012, self.in_season_year + 1):
             self.insert_snaps_csv(year)
 
+    @sync_unit("ftn")
     def insert_ftn_csv(self, year):
         nfl_config = config_map.get("ftn")
         table_name = nfl_config.table
         response = self.file_repo.get_ftn(year)
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{year}.csv", Body=response)
+        self._put_csv("ftn", f"{table_name}/{year}.csv", response, year)
 
     def insert_all_ftn_csvs(self):
         for year in range(2022, self.in_season_year + 1):
             self.insert_ftn_csv(year)
 
+    @sync_unit("pbp_ftn")
+    def join_play_by_play_ftn(self, year):
+        """Write play_by_play_ftn/<year>.csv: every play of the season with its FTN charting columns."""
+        from shared.joins.play_by_play_ftn_join import PlayByPlayFtnJoin
+
+        key, pbp_key, ftn_key = (unit_object_key(dataset, year) for dataset in ("pbp_ftn", "pbp", "ftn"))
+        if not (self.inventory.exists(pbp_key) and self.inventory.exists(ftn_key)):
+            self.metrics.log(
+                "unit_skipped", f"Skipping the FTN join for {year}: {pbp_key} or {ftn_key} is not in the lake",
+                sources=[pbp_key, ftn_key],
+            )
+            return
+        inputs = self._derived_inputs([pbp_key, ftn_key])
+        if self._derived_unchanged(key, inputs):
+            return
+        with self.metrics.timed("join"):
+            ftn_body = self._lake_body(ftn_key)
+            if ftn_body is None:
+                return
+            with closing(ftn_body):
+                join = PlayByPlayFtnJoin(ftn_body)
+            # play_by_play is streamed from the lake, and the joined csv up to it, rather than read whole
+            pbp_body = self._lake_body(pbp_key)
+            if pbp_body is None:
+                return
+            with closing(pbp_body):
+                self._upload_stream("pbp_ftn", key, join.join, pbp_body, season=year, inputs=inputs)
+        rates = join.match_rates()
+        for counter in ("plays", "plays_charted", "ftn_plays", "ftn_unmatched"):
+            self.metrics.incr(counter, rates[counter])
+        self.metrics.log(
+            "ftn_joined",
+            f"Joined FTN {year}: {rates['plays_charted']} of {rates['plays']} plays charted "
+            f"({rates['charted_rate']:.1%}), {rates['ftn_unmatched']} of {rates['ftn_plays']} FTN plays unmatched",
+            key=key, **rates,
+        )
+
+    @sync_unit("player_week")
+    def materialize_player_week(self, year):
+        """Write player_weeks/<year>.cols: weekly, snaps, NGS and PFR joined per player-week, columnar."""
+        from shared.columnar.columnar_file import dumps
+        from shared.joins.player_week_table import PLAYER_WEEK_SOURCES, PlayerWeekTable
+
+        key = unit_object_key("player_week", year)
+        sources = {dataset: unit_object_key(dataset, year) for dataset in PLAYER_WEEK_SOURCES}
+        sources = {dataset: source for dataset, source in sources.items() if self.inventory.exists(source)}
+        if "weekly" not in sources:
+            self.metrics.log(
+                "unit_skipped",
+                f"Skipping the player-week table for {year}: {unit_object_key('weekly', year)} is not in the lake",
+                sources=[unit_object_key("weekly", year)],
+            )
+            return
+        inputs = self._derived_inputs(list(sources.values()) + [unit_object_key("player_ids")])
+        if self._derived_unchanged(key, inputs):
+            return
+        with self.metrics.timed("join"):
+            table = PlayerWeekTable(year, self._player_id_crosswalk())
+            for dataset, source in sources.items():
+                body = self._lake_body(source)
+                if body is None:
+                    if dataset == "weekly":
+                        return
+                    continue
+                with closing(body):
+                    table.add(dataset, body)
+            dataset = table.finish()
+            data = dumps(dataset)
+        report = table.match_report()
+        self.metrics.incr("player_weeks", report["rows"])
+        self.metrics.incr("ids_unmatched", sum(source["unmatched_ids"] for source in report["sources"].values()))
+        self.metrics.log(
+            "player_week_built",
+            f"Built player-week table {year}: {report['rows']} player-weeks of {report['players']} players from "
+            f"{len(report['sources'])} sources, {len(dataset.columns)} columns",
+            key=key, player_weeks=report["rows"], players=report["players"], sources=sorted(report["sources"]),
+            columns=len(dataset.columns),
+        )
+        self._upload("player_week", key, data, {"rows": len(dataset), "columns": {}}, year, inputs=inputs)
+
+    def _player_id_crosswalk(self):
+        """The published crosswalk, downloaded and opened once per run; None until player_ids has synced."""
+        from shared.indexes.player_id_crosswalk import PlayerIdCrosswalk
+
+        with self._crosswalk_lock:
+            if self._crosswalk is None:
+                table_name = config_map.get("player_ids").table
+                key = f"{table_name}/{table_name}.idx"
+                if not self.inventory.exists(key):
+                    return None
+                try:
+                    self._crosswalk = PlayerIdCrosswalk.from_s3(
+                        self.s3, self.s3_bucket, key, os.path.join(LOCAL_CACHE_DIR, f"{table_name}.idx")
+                    )
+                except Exception as e:
+                    if not is_not_found(e):
+                        raise
+                    self.inventory.missing(key)
+            return self._crosswalk
+
+    def _close_crosswalk(self):
+        with self._crosswalk_lock:
+            if self._crosswalk is not None:
+                self._crosswalk.close()
+                self._crosswalk = None
+
+    def _lake_body(self, key: str):
+        """The Body of a lake object the inventory lists, or None when the store no longer has it.
+        A missing object means the listing was stale, so it is listed again.
+        """
+        try:
+            return self.s3.get_object(Bucket=self.s3_bucket, Key=key)["Body"]
+        except Exception as e:
+            if not is_not_found(e):
+                raise
+        self.metrics.log("object_missing", f"Skipping {key}: listed in the inventory but not in the lake", key=key)
+        self.inventory.missing(key)
+        return None
+
+    def _derived_inputs(self, keys: List[str]) -> str:
+        """Fingerprint of the lake objects a derived unit reads, from their manifest sha256s."""
+        entries = {key: (self.manifest.get(key) or {}).get("sha256") for key in sorted(keys)}
+        return hashlib.sha256(json.dumps(entries, sort_keys=True).encode()).hexdigest()
+
+    def _derived_unchanged(self, key: str, inputs: str) -> bool:
+        """True, and counted as unchanged, when key was built from exactly these inputs and is still there."""
+        entry = self.manifest.get(key)
+        if entry is None or entry.get("inputs") != inputs or not self.inventory.exists(key):
+            return False
+        self.manifest.touch(key)
+        self.metrics.incr("unchanged")
+        return True
+
+    @sync_unit("weekly_rosters")
     def insert_roster_csv(self, year):
         nfl_config = config_map.get("weekly_rosters")
         table_name = nfl_config.table
         response = self.file_repo.get_weekly_rosters(year)
-        self.s3.put_object(Bucket=self.s3_bucket, Key=f"{table_name}/{year}.csv", Body=response)
+        self._put_csv("weekly_rosters", f"{table_name}/{year}.csv", response, year)
 
     def insert_all_roster_csvs(self):
         for year in range(2002, self.in_season_year + 1):
             self.insert_roster_csv(year)
 
+    @sync_unit("odds")
     def insert_all_game_odds_csvs(self):
         nfl_config = config_map.get("odds")
         table_name = nfl_config.table
         response = self.file_repo.get_game_odds()
-        self.s3.put_object(
-            Bucket=self.s3_bucket,
-            Key=f"{table_name}/{table_name}.csv",
-            Body=response,
-        )
+        self._put_csv("odds", f"{table_name}/{table_name}.csv", response)
 
+    @sync_unit("player_ids")
     def insert_all_player_ids_csvs(self):
+        from shared.indexes.player_id_crosswalk import publish_crosswalk
+
         nfl_config = config_map.get("player_ids")
         table_name = nfl_config.table
         response = self.file_repo.get_player_ids()
-        self.s3.put_object(
-            Bucket=self.s3_bucket,
-            Key=f"{table_name}/{table_name}.csv",
-            Body=response,
-        )
-
-def nfl_in_season_year_for_today():
-    """Return the NFL season year based on today's date.
-    If today's date is on or after this year's first Sunday of the NFL season,
-    return this year. Otherwise, return the previous year.
-    """
-    today = datetime.date.today()
-    year = today.year
-
-    # 1. Find this year's first Sunday of the NFL
-    sept_first = datetime.date(year, 9, 1)
-    first_monday_offset = (0 - sept_first.weekday()) % 7
-    labor_day = sept_first + datetime.timedelta(days=first_monday_offset)
-
-    first_nfl_sunday = labor_day + datetime.timedelta(days=6)  # Labor Day + 6 = Sunday
-
-    if today >= first_nfl_sunday:
-        return year
+        self._put_csv("player_ids", f"{table_name}/{table_name}.csv", response)
+        with self.metrics.timed("index"):
+            publish_crosswalk(
+                self.s3,
+                self.s3_bucket,
+                f"{table_name}/{table_name}.idx",
+                response,
+                os.path.join(LOCAL_CACHE_DIR, f"{table_name}.idx"),
+            )
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync nflverse data into the lake, in S3 or a local mirror.")
+    parser.add_argument("method", choices=("update_s3", "init_s3", "redrive"), nargs="?", default="update_s3")
+    parser.add_argument("--root", default=STORAGE_ROOT, help="Local directory mirror of the lake (uses S3 when omitted)")
+    parser.add_argument("--backend", choices=STORAGE_BACKENDS, help="Storage backend (default: local when --root is set)")
+    parser.add_argument("--bucket", default=NFL_DATA_BUCKET or "nfl-staging-datalake")
+    parser.add_argument("--dry-run", action="store_true", help="Only HEAD the planned files and estimate the run")
+    parser.add_argument("--force", action="store_true", help="update_s3: refresh datasets that are not due")
+    parser.add_argument("--reseal", action="store_true", help="init_s3: fetch sealed seasons again")
+    parser.add_argument("--no-resume", action="store_true", help="init_s3: ignore an unfinished checkpoint")
+    parser.add_argument("--run-id", help="redrive: the run to re-drive (default: the latest)")
+    parser.add_argument("--workers", type=int, default=SYNC_WORKERS)
+    parser.add_argument("--cpu-workers", type=int, default=CPU_WORKERS)
+    args = parser.parse_args(argv)
+
+    storage = open_storage(args.root, args.backend)
+    updater = UpdateS3(storage, args.bucket, workers=args.workers, cpu_workers=args.cpu_workers)
+    if args.dry_run:
+        report = updater.dry_run(args.method, force=args.force or args.reseal)
+    elif args.method == "init_s3":
+        report = updater.initialize_s3(resume=not args.no_resume, reseal=args.reseal)
+    elif args.method == "redrive":
+        report = updater.redrive(args.run_id)
     else:
-        return year - 1
-
-import datetime
+        report = updater.update_s3(force=args.force)
+    print(json.dumps(report, indent=2))
 
-def nfl_off_season_year_for_today():
-    """Return the NFL season year based on today's date.
-    If today's date is on or after this year's NFL offseason start (new league year),
-    return this year. Otherwise, return the previous year.
-    """
-    today = datetime.date.today()
-    year = today.year
 
-    # Approximate new league year start (offseason begins)
-    # In reality, it's usually around March 12 at 4 p.m. ET.
-    offseason_start = datetime.date(year, 3, 12)
-
-    if today >= offseason_start:
-        return year
-    else:
-        return year - 1
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import time
+
+from benchmarks.stubs import InMemoryS3
+from shared.manifest.checkpoint import CHECKPOINT_KEY, SyncCheckpoint
+from shared.metrics.events import MemorySink, SyncMetrics
+from shared.sync import UpdateS3
+
+UNITS = [("pbp", 2020), ("pbp", 2021), ("weekly", 2021), ("player_ids", None)]
+
+
+def test_mark_saves_each_unit():
+    s3 = InMemoryS3()
+    checkpoint = SyncCheckpoint(s3, "b", "init_s3")
+    checkpoint.start(UNITS)
+    checkpoint.mark(UNITS[0], "ok")
+    checkpoint.mark(UNITS[1], "failed")
+    assert s3.calls["put_object"] == 3
+    loaded = SyncCheckpoint.load(s3, "b", "init_s3")
+    assert loaded.remaining(UNITS) == UNITS[1:]
+    assert loaded.attempts == {"pbp/2021": 1}
+
+
+def test_batched_marks_are_saved_once():
+    s3 = InMemoryS3()
+    checkpoint = SyncCheckpoint(s3, "b", "init_s3")
+    checkpoint.start(UNITS)
+    for unit in UNITS[:3]:
+        checkpoint.mark(unit, "sealed", save=False)
+    assert s3.calls["put_object"] == 1
+    assert SyncCheckpoint.load(s3, "b", "init_s3").remaining(UNITS) == UNITS
+    checkpoint.save()
+    assert s3.calls["put_object"] == 2
+    loaded = SyncCheckpoint.load(s3, "b", "init_s3")
+    assert loaded.remaining(UNITS) == [("player_ids", None)]
+    assert loaded.summary()["completed"] == 3
+    assert f"b/{CHECKPOINT_KEY}" in s3.objects
+
+
+class ResumedSync:
+    """Invocations of a checkpointed run whose units only record that they ran."""
+
+    def __init__(self, monkeypatch, tmp_path, slow=()):
+        monkeypatch.setattr("shared.repositories.s3_inventory.LOCAL_CACHE_DIR", str(tmp_path))
+        self.s3 = InMemoryS3()
+        self.slow = set(slow)
+        self.ran = []
+
+    def invoke(self, units, seconds: float):
+        updater = UpdateS3(self.s3, "b", metrics=SyncMetrics(MemorySink()), workers=1, cpu_workers=1)
+        updater.sync = self.sync
+        checkpoint = SyncCheckpoint.load(self.s3, "b", "init_s3")
+        remaining = checkpoint.remaining(units)
+        checkpoint.start(units)
+        report = updater.run(remaining, "init_s3", checkpoint=checkpoint, deadline=time.monotonic() + seconds)
+        return report, checkpoint
+
+    def sync(self, dataset, year=None):
+        self.ran.append((dataset, year))
+        if (dataset, year) in self.slow:
+            # Outlasts the invocation's deadline
+            time.sleep(0.3)
+
+
+def test_derived_units_run_past_the_deadline_once_their_sources_are_done(monkeypatch, tmp_path):
+    units = [("pbp", 2023), ("ftn", 2023)]
+    run = ResumedSync(monkeypatch, tmp_path, slow=[("ftn", 2023)])
+
+    report, checkpoint = run.invoke(units, seconds=0.1)
+    assert run.ran == [("pbp", 2023), ("ftn", 2023), ("pbp_ftn", 2023)]
+    assert report["checkpoint"]["remaining"] == 0
+
+    # Resuming finds nothing left, and the join is not lost
+    report, _ = run.invoke(units, seconds=60)
+    assert run.ran.count(("pbp_ftn", 2023)) == 1
+    assert report["checkpoint"]["remaining"] == 0
+
+
+def test_derived_units_of_deferred_sources_run_again_on_resume(monkeypatch, tmp_path):
+    units = [("pbp", 2023), ("ftn", 2023)]
+    run = ResumedSync(monkeypatch, tmp_path, slow=[("pbp", 2023)])
+
+    report, _ = run.invoke(units, seconds=0.1)
+    assert run.ran == [("pbp", 2023), ("pbp_ftn", 2023)]
+    assert report["checkpoint"]["remaining"] == 1
+
+    report, _ = run.invoke(units, seconds=60)
+    assert run.ran[2:] == [("ftn", 2023), ("pbp_ftn", 2023)]
+    assert report["checkpoint"]["remaining"] == 0
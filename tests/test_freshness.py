@@ -0,0 +1,20 @@
+import datetime
+
+import pytest
+
+from shared.planning.freshness import Daily, Schedule
+
+
+def test_schedule_subclasses_must_define_due_since():
+    class Never(Schedule):
+        name = "never"
+
+    with pytest.raises(TypeError):
+        Schedule()
+    with pytest.raises(TypeError):
+        Never()
+
+
+def test_daily_is_due_since_midnight():
+    now = datetime.datetime(2026, 10, 19, 13, 30, tzinfo=datetime.timezone.utc)
+    assert Daily().due_since(now) == datetime.datetime(2026, 10, 19, tzinfo=datetime.timezone.utc)
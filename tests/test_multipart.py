@@ -0,0 +1,116 @@
+import hashlib
+import os
+
+import pytest
+
+from benchmarks.stubs import InMemoryS3
+from shared.repositories import multipart
+from shared.repositories.local_s3_repo import UPLOADS_DIR, LocalS3Repo
+from shared.repositories.multipart import MIN_PART_SIZE, MultipartUploader, multipart_etag
+
+PART_SIZE = MIN_PART_SIZE
+
+
+def body(size: int) -> bytes:
+    return bytes(i % 251 for i in range(size))
+
+
+def composite_etag(data: bytes, part_size: int) -> str:
+    return multipart_etag([hashlib.md5(data[i:i + part_size]).digest() for i in range(0, len(data), part_size)])
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(multipart, "PART_RETRY_BACKOFF_S", 0)
+
+
+@pytest.fixture(params=["memory", "local"])
+def s3(request, tmp_path):
+    return InMemoryS3() if request.param == "memory" else LocalS3Repo(str(tmp_path))
+
+
+def stored(s3, key: str) -> bytes:
+    return s3.get_object(Bucket="b", Key=key)["Body"].read()
+
+
+def test_put_object_below_part_size_is_a_single_put(s3):
+    data = body(PART_SIZE - 1)
+    response = MultipartUploader(s3, part_size=PART_SIZE).put_object(Bucket="b", Key="small.csv", Body=data)
+    assert response == {"ETag": f'"{hashlib.md5(data).hexdigest()}"', "parts": 1, "retries": 0}
+    assert stored(s3, "small.csv") == data
+
+
+def test_put_object_splits_into_parts_with_composite_etag(s3):
+    data = body(2 * PART_SIZE + 1234)
+    response = MultipartUploader(s3, part_size=PART_SIZE, concurrency=2).put_object(Bucket="b", Key="big.csv", Body=data)
+    assert response["parts"] == 3
+    assert response["ETag"] == composite_etag(data, PART_SIZE)
+    assert stored(s3, "big.csv") == data
+
+
+def test_failed_part_is_retried_on_its_own():
+    s3 = InMemoryS3(fail_parts=2)
+    data = body(2 * PART_SIZE)
+    response = MultipartUploader(s3, part_size=PART_SIZE, concurrency=1).put_object(Bucket="b", Key="big.csv", Body=data)
+    assert response["retries"] == 2
+    assert s3.calls["upload_part"] == 4
+    assert s3.calls["create_multipart_upload"] == 1
+    assert stored(s3, "big.csv") == data
+
+
+def test_part_failing_every_retry_aborts_the_upload():
+    s3 = InMemoryS3(fail_parts=100)
+    with pytest.raises(Exception, match="Injected failure"):
+        MultipartUploader(s3, part_size=PART_SIZE, max_retries=1).put_object(Bucket="b", Key="big.csv", Body=body(PART_SIZE))
+    assert s3.calls["abort_multipart_upload"] == 1
+    assert not s3.uploads and "b/big.csv" not in s3.objects
+
+
+def test_writer_below_part_size_is_a_single_put(s3):
+    data = body(1000)
+    with MultipartUploader(s3, part_size=PART_SIZE).writer(Bucket="b", Key="small.csv") as writer:
+        writer.write(data[:10])
+        writer.write(data[10:])
+    assert writer.response == {"ETag": f'"{hashlib.md5(data).hexdigest()}"', "bytes": 1000, "parts": 1, "retries": 0}
+    assert stored(s3, "small.csv") == data
+
+
+def test_writer_streams_parts_with_composite_etag(s3):
+    data = body(2 * PART_SIZE + 77)
+    with MultipartUploader(s3, part_size=PART_SIZE, concurrency=2).writer(Bucket="b", Key="big.csv") as writer:
+        for offset in range(0, len(data), 1 << 20):
+            writer.write(data[offset:offset + (1 << 20)])
+    assert writer.response["parts"] == 3
+    assert writer.response["bytes"] == len(data)
+    assert writer.response["ETag"] == composite_etag(data, PART_SIZE)
+    assert stored(s3, "big.csv") == data
+
+
+def test_writer_retries_a_failed_part():
+    s3 = InMemoryS3(fail_parts=1)
+    data = body(PART_SIZE + 1)
+    with MultipartUploader(s3, part_size=PART_SIZE).writer(Bucket="b", Key="big.csv") as writer:
+        writer.write(data)
+    assert writer.response["retries"] == 1
+    assert stored(s3, "big.csv") == data
+
+
+def test_exception_inside_writer_aborts_the_upload():
+    s3 = InMemoryS3()
+    with pytest.raises(ValueError):
+        with MultipartUploader(s3, part_size=PART_SIZE).writer(Bucket="b", Key="big.csv") as writer:
+            writer.write(body(PART_SIZE + 1))
+            raise ValueError("bad row")
+    assert s3.calls["abort_multipart_upload"] == 1
+    assert "complete_multipart_upload" not in s3.calls
+    assert not s3.uploads and "b/big.csv" not in s3.objects
+
+
+def test_exception_inside_writer_leaves_nothing_in_the_local_mirror(tmp_path):
+    s3 = LocalS3Repo(str(tmp_path))
+    with pytest.raises(ValueError):
+        with MultipartUploader(s3, part_size=PART_SIZE).writer(Bucket="b", Key="big.csv") as writer:
+            writer.write(body(PART_SIZE + 1))
+            raise ValueError("bad row")
+    assert s3.list_objects_v2(Bucket="b").get("KeyCount", 0) == 0
+    assert not os.listdir(tmp_path / UPLOADS_DIR)
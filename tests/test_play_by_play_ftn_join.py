@@ -0,0 +1,82 @@
+import csv
+import io
+
+from shared.joins.play_by_play_ftn_join import PlayByPlayFtnJoin
+
+PBP = """game_id,play_id,season,week,epa
+2023_01_A_B,1,2023,1,0.1
+2023_01_A_B,2,2023,1,0.2
+2023_01_C_D,1,2023,1,0.3
+2023_01_C_D,2.0,2023,1,0.4
+2023_01_E_F,1,2023,1,0.5
+"""
+FTN = """ftn_game_id,nflverse_game_id,ftn_play_id,nflverse_play_id,season,week,is_motion
+10,2023_01_A_B,100,1,2023,1,TRUE
+10,2023_01_A_B,101,3,2023,1,FALSE
+11,2023_01_C_D,102,2,2023,1,TRUE
+11,2023_01_C_D,102,2,2023,1,TRUE
+12,2023_01_X_Y,103,1,2023,1,FALSE
+12,2023_01_X_Y,103,1,2023,1,FALSE
+"""
+
+
+class RecordingWriter(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data) -> int:
+        self.writes += 1
+        return super().write(data)
+
+
+def joined(ftn: str = FTN, pbp: str = PBP):
+    join = PlayByPlayFtnJoin(io.BytesIO(ftn.encode()))
+    out = RecordingWriter()
+    join.join(io.BytesIO(pbp.encode()), out)
+    return join, out
+
+
+def test_every_play_gets_a_row_with_its_charting():
+    _, out = joined()
+    rows = list(csv.reader(io.StringIO(out.getvalue().decode())))
+    assert rows == [
+        ["game_id", "play_id", "season", "week", "ftn_game_id", "ftn_play_id", "is_motion"],
+        ["2023_01_A_B", "1", "2023", "1", "10", "100", "TRUE"],
+        ["2023_01_A_B", "2", "2023", "1", "", "", ""],
+        ["2023_01_C_D", "1", "2023", "1", "", "", ""],
+        ["2023_01_C_D", "2.0", "2023", "1", "11", "102", "TRUE"],
+        ["2023_01_E_F", "1", "2023", "1", "", "", ""],
+    ]
+
+
+def test_rows_are_written_game_by_game():
+    _, out = joined()
+    # One write per game, then whatever is left (nothing) after the last
+    assert out.writes == 4
+
+
+def test_ftn_unmatched_counts_distinct_keys():
+    join, _ = joined()
+    rates = join.match_rates()
+    assert rates["plays"] == 5
+    assert rates["plays_charted"] == 2
+    assert rates["ftn_plays"] == 6
+    # Play 3 of 2023_01_A_B, and play 1 of 2023_01_X_Y listed twice in a game play_by_play does not have
+    assert rates["ftn_unmatched"] == 2
+    assert rates["games_charted"] == 2
+
+
+def test_game_listed_twice_in_play_by_play_is_charted_once():
+    pbp = PBP + "2023_01_A_B,3,2023,1,0.6\n"
+    join, _ = joined(pbp=pbp)
+    rates = join.match_rates()
+    assert rates["plays_charted"] == 3
+    assert rates["ftn_unmatched"] == 1
+    assert rates["games_charted"] == 2
+
+
+def test_empty_play_by_play_writes_the_header():
+    join, out = joined(pbp="game_id,play_id,season,week\n")
+    assert out.getvalue() == b"game_id,play_id,season,week,ftn_game_id,ftn_play_id,is_motion\n"
+    assert join.match_rates()["ftn_unmatched"] == 4
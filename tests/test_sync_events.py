@@ -0,0 +1,46 @@
+import pytest
+
+from benchmarks.stubs import InMemoryS3
+from shared.metrics.events import MemorySink, SyncMetrics
+from shared.sync import UpdateS3
+
+
+@pytest.fixture
+def sink(monkeypatch, tmp_path):
+    monkeypatch.setattr("shared.repositories.s3_inventory.LOCAL_CACHE_DIR", str(tmp_path))
+    return MemorySink()
+
+
+def updater(sink) -> UpdateS3:
+    return UpdateS3(InMemoryS3(), "b", metrics=SyncMetrics(sink), cpu_workers=1)
+
+
+def test_failed_unit_emits_its_error(sink, monkeypatch):
+    s3 = updater(sink)
+
+    def sync(dataset, year=None):
+        with s3.metrics.unit(dataset, year):
+            raise ValueError("bad header")
+
+    monkeypatch.setattr(s3, "sync", sync)
+    report = s3.run([("weekly", 2023)], "redrive")
+
+    assert report["units"][0]["status"] == "failed"
+    assert report["units"][0]["error"] == "ValueError: bad header"
+    unit_event = next(event for event in sink.events if event["event"] == "sync_unit")
+    assert unit_event["error_type"] == "ValueError"
+    failed = next(event for event in sink.events if event["event"] == "sync_unit_failed")
+    assert failed["dataset"] == "weekly" and failed["year"] == 2023
+    assert failed["error_type"] == "ValueError"
+    assert failed["error"] == "bad header"
+    assert "raise ValueError" in failed["traceback"]
+
+
+def test_log_tags_the_current_unit(sink):
+    metrics = SyncMetrics(sink)
+    metrics.log("outside", "no unit")
+    with metrics.unit("pbp", 2023):
+        metrics.log("ftn_joined", "Joined FTN 2023", plays=3)
+
+    assert sink.events[0] == {"event": "outside", "message": "no unit"}
+    assert sink.events[1] == {"event": "ftn_joined", "message": "Joined FTN 2023", "dataset": "pbp", "year": 2023, "plays": 3}
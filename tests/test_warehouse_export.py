@@ -0,0 +1,95 @@
+import csv
+import gzip
+import io
+import os
+import uuid
+
+import pytest
+
+from benchmarks.stubs import InMemoryS3
+from shared.export.warehouse_export import NO_SEASON, WarehouseExport, connect_postgres
+from shared.repositories.multipart import MIN_PART_SIZE, MultipartUploader
+
+# A throwaway local Postgres, e.g. postgresql://localhost/postgres; the tests create and drop their own table
+DSN = os.environ.get("TEST_WAREHOUSE_DSN")
+
+pytestmark = pytest.mark.skipif(not DSN, reason="TEST_WAREHOUSE_DSN is not set")
+
+ROWS = [(season, week, f"{season}_{week:02d}_{i}", i + 0.25, "a,b" if i % 5 == 0 else None)
+        for season in (2022, 2023) for week in (1, 2) for i in range(40)]
+NULL_SEASON_ROWS = [(None, 1, f"unknown_{i}", 0.5, "x") for i in range(3)]
+
+
+def connect():
+    return connect_postgres(DSN)
+
+
+@pytest.fixture(scope="module")
+def table():
+    name = f"export_test_{uuid.uuid4().hex[:12]}"
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE {name} (season integer, week integer, game_id text, epa double precision, note text)")
+            cursor.executemany(f"INSERT INTO {name} VALUES (%s, %s, %s, %s, %s)", ROWS + NULL_SEASON_ROWS)
+        connection.commit()
+        yield name
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {name}")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def exporter(s3, mode: str) -> WarehouseExport:
+    return WarehouseExport(s3, "b", connect, uploader=MultipartUploader(s3, part_size=MIN_PART_SIZE), mode=mode)
+
+
+def exported(s3, key: str):
+    text = gzip.decompress(s3.objects[f"b/{key}"]["Body"]).decode()
+    header, *rows = csv.reader(io.StringIO(text))
+    return header, rows
+
+
+def expected(rows):
+    return sorted([["" if value is None else str(value) for value in row] for row in rows])
+
+
+@pytest.mark.parametrize("mode", ["copy", "cursor"])
+def test_export_splits_by_season(table, mode):
+    s3 = InMemoryS3()
+    report = exporter(s3, mode).export_query("plays", f"SELECT * FROM {table}")
+
+    assert report["objects"] == 3
+    assert report["rows"] == len(ROWS) + len(NULL_SEASON_ROWS)
+    for season in (2022, 2023):
+        header, rows = exported(s3, f"exports/plays/{season}.csv.gz")
+        assert header == ["season", "week", "game_id", "epa", "note"]
+        assert sorted(rows) == expected(row for row in ROWS if row[0] == season)
+    _, rows = exported(s3, f"exports/plays/{NO_SEASON}.csv.gz")
+    assert sorted(rows) == expected(NULL_SEASON_ROWS)
+
+
+@pytest.mark.parametrize("mode", ["copy", "cursor"])
+def test_export_only_requested_seasons(table, mode):
+    s3 = InMemoryS3()
+    report = exporter(s3, mode).export_query("plays", f"SELECT * FROM {table}", seasons=[2023])
+
+    assert [partition["key"] for partition in report["partitions"]] == ["exports/plays/2023.csv.gz"]
+    assert report["rows"] == sum(1 for row in ROWS if row[0] == 2023)
+
+
+@pytest.mark.parametrize("mode", ["copy", "cursor"])
+def test_export_without_season_column_is_one_object(table, mode):
+    s3 = InMemoryS3()
+    report = exporter(s3, mode).export_query("games", f"SELECT DISTINCT game_id FROM {table};")
+
+    assert [partition["key"] for partition in report["partitions"]] == ["exports/games/games.csv.gz"]
+    header, rows = exported(s3, "exports/games/games.csv.gz")
+    assert header == ["game_id"]
+    assert sorted(row[0] for row in rows) == sorted(row[2] for row in ROWS + NULL_SEASON_ROWS)
+
+
+def test_seasons_without_season_column_raise(table):
+    with pytest.raises(ValueError, match="no season column"):
+        exporter(InMemoryS3(), "copy").export_query("games", f"SELECT game_id FROM {table}", seasons=[2023])